@@ -11,15 +11,32 @@ import numpy as np
 import pickle
 import requests
 import time
+import struct
 import threading
-import queue
 from collections import deque
 from typing import Optional
 import calendar
 import serial
 import json
 import itertools
+from contextlib import contextmanager
 from config import config
+from frame_store import FrameSlot, FrameRing, JPEG_VARIANTS, DEFAULT_VARIANT
+from ingest_engine import AsyncIngestEngine
+from recorder import SegmentRecorder, iter_range, list_segments
+from motion_gate import MotionGate
+from capture_hub import CaptureHub
+from reconnect_policy import ReconnectPolicy
+from recognition_pool import RecognitionPool, recognize_plan
+from face_quality import FaceQualityGate
+from face_tracker import FaceTracker
+from recognition_scheduler import RecognitionScheduler
+from lbp_recognizer import LBPHistogramRecognizer
+try:
+    from flask_sock import Sock
+except ImportError:  # WebSocket streaming is optional; pages fall back to MJPEG
+    Sock = None
+from frame_bus import BusSlot, FrameBusPublisher, SharedStatusBoard, ring_name, status_name
 
 # Get configuration based on environment
 config_name = os.environ.get('FLASK_ENV', 'development')
@@ -32,10 +49,42 @@ ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'bmp'}
 ESP32_IP = app.config['ESP32_IP']
 STREAM_URL = app.config['STREAM_URL']
 ESP32_STREAM_URL = app.config['ESP32_STREAM_URL']
+ESP32_BASE_URL = app.config['ESP32_BASE_URL']
+ESP32_STREAM_BASE_URL = app.config['ESP32_STREAM_BASE_URL']
+INGEST_MODE = app.config['INGEST_MODE']
 DATASET_DIR = app.config['DATASET_DIR']
 FACE_SIZE = app.config['FACE_SIZE']
 BUFFER_DURATION_SEC = app.config['BUFFER_DURATION_SEC']
 CONFIDENCE_THRESHOLD = app.config['CONFIDENCE_THRESHOLD']
+# Face detection runs on a 1/DETECTION_SCALE grayscale image (1, 2, 4 or 8)
+DETECTION_SCALE = app.config['DETECTION_SCALE'] if app.config['DETECTION_SCALE'] in (1, 2, 4, 8) else 1
+FACE_MIN_SIZE = 60
+FACE_MAX_SIZE = 300
+# Skip face detection on frames where nothing moved
+MOTION_GATE_ENABLED = app.config['MOTION_GATE_ENABLED']
+# 'vectorized' scores faces against a NumPy histogram matrix instead of OpenCV's per-sample LBPH loop
+RECOGNIZER_BACKEND = app.config['RECOGNIZER_BACKEND'] if app.config['RECOGNIZER_BACKEND'] in ('lbph', 'vectorized') else 'lbph'
+# Worker processes for detection + prediction of stream frames (0 = recognize in-process)
+RECOGNITION_PROCESSES = max(app.config['RECOGNITION_PROCESSES'], 0)
+# Full-frame detection every N recognition passes; tracked faces keep their identity in between
+TRACKER_DETECT_EVERY = max(app.config['TRACKER_DETECT_EVERY'], 1)
+TRACKER_IDENTITY_HALF_LIFE_SEC = app.config['TRACKER_IDENTITY_HALF_LIFE_SEC']
+# Recognition passes are paced to a per-camera CPU budget and to scene activity
+RECOGNITION_CPU_BUDGET = app.config['RECOGNITION_CPU_BUDGET']
+RECOGNITION_MIN_INTERVAL_SEC = max(app.config['RECOGNITION_MIN_INTERVAL_SEC'], 0.02)
+RECOGNITION_MAX_INTERVAL_SEC = max(app.config['RECOGNITION_MAX_INTERVAL_SEC'], RECOGNITION_MIN_INTERVAL_SEC)
+OPENCV_THREADS = app.config['OPENCV_THREADS']
+# Face crops failing these checks are tracked but never predicted
+FACE_QUALITY_ENABLED = app.config['FACE_QUALITY_ENABLED']
+FACE_QUALITY_SETTINGS = {
+    # Never below what the detector accepts, so a detected face is not rejected as small by default
+    'min_size': max(app.config['FACE_QUALITY_MIN_SIZE'], FACE_MIN_SIZE),
+    'min_sharpness': app.config['FACE_QUALITY_MIN_SHARPNESS'],
+    'min_brightness': app.config['FACE_QUALITY_MIN_BRIGHTNESS'],
+    'max_brightness': app.config['FACE_QUALITY_MAX_BRIGHTNESS']
+}
+if OPENCV_THREADS > 0:
+    cv2.setNumThreads(OPENCV_THREADS)
 
 # Arduino Configuration
 SERIAL_PORT = app.config['SERIAL_PORT']
@@ -46,18 +95,15 @@ face_recognizer = None
 label_map = {}
 pred_buffer = deque()
 time_buffer = deque()
-display_name = "Waiting..."
 prev_name_serial = ""
 ser = None
 
 # Global variables for improved streaming
-frame_buffer = queue.Queue(maxsize=2)  # Minimal buffer to prevent ghosting
+FRAME_RING_CAPACITY = 4
+frame_ring = FrameRing(FRAME_RING_CAPACITY)  # preallocated processed frames, written in place
 streaming_active = False
 stream_thread = None
-current_frame = None
-frame_lock = threading.Lock()
 last_frame_time = time.time()  # Track when last frame was processed
-frame_timestamp = 0  # Track frame age to prevent ghosting
 
 # Streaming configuration constants
 STREAM_FPS = 10  # Very low FPS for maximum stability and responsiveness
@@ -66,20 +112,159 @@ STREAM_DELAY = 1.0 / STREAM_FPS  # Delay between frames for smooth streaming
 
 db = SQLAlchemy(app)
 
+# ---------- CAPTURE HUB (one upstream per camera, shared JPEG bytes) ----------
+# One event loop for every camera connection (INGEST_MODE=asyncio)
+ingest_engine = AsyncIngestEngine(max_workers=app.config['INGEST_WORKERS'])
+
+def _reconnect_policy() -> ReconnectPolicy:
+    """Backoff/circuit state for one camera upstream, shared by both ingest modes"""
+    return ReconnectPolicy(base_delay=app.config['RECONNECT_BASE_DELAY'],
+                           max_delay=app.config['RECONNECT_MAX_DELAY'],
+                           failure_threshold=app.config['RECONNECT_FAILURE_THRESHOLD'],
+                           open_sec=app.config['RECONNECT_OPEN_SEC'])
+
+capture_hub = CaptureHub(ingest_engine if INGEST_MODE == 'asyncio' else None, INGEST_MODE,
+                         linger_sec=app.config['CAPTURE_LINGER_SEC'], policy_factory=_reconnect_policy)
+# Default camera slot: latest JPEG + sequence number; BGR decoded lazily on first access
+basic_slot = capture_hub.slot(ESP32_STREAM_URL)
+default_pipeline_started = False
+
+# ---------- FRAME BUS (multi-process deployments) ----------
+# 'owner': this process captures and publishes frames + recognition status to shared memory
+# 'attach': this (web worker) process serves what the owner publishes and never captures
+FRAME_BUS_MODE = app.config['FRAME_BUS_MODE']
+FRAME_BUS_PREFIX = app.config['FRAME_BUS_PREFIX']
+FRAME_BUS_STATUS_INTERVAL = 0.2  # seconds between recognition status (and overlay) publishes
+FRAME_BUS_SYNC_INTERVAL = 10.0   # seconds between camera registry re-syncs in the owner
+FRAME_BUS_STATUS_STALE_SEC = 5.0
+FRAME_BUS_STATUS_MAX_FACES = 8  # overlay faces kept per camera when the status outgrows its segment
+FRAME_BUS_STATUS_KB_PER_CAMERA = 16  # status segment sized for the cameras registered at start (64 KB minimum)
+frame_bus = None  # FrameBusPublisher (owner)
+bus_slots = {}    # camera key -> BusSlot (attach)
+bus_lock = threading.Lock()
+_status_board = None
+
+def _bus_slot(camera_key) -> BusSlot:
+    key = str(camera_key)
+    with bus_lock:
+        slot = bus_slots.get(key)
+        if slot is None:
+            slot = bus_slots[key] = BusSlot(ring_name(FRAME_BUS_PREFIX, key))
+    return slot
+
+def _bus_status() -> Optional[dict]:
+    """Recognition status last published by the capture owner, None if there is none"""
+    global _status_board
+    with bus_lock:
+        for _ in range(2):
+            if _status_board is None:
+                try:
+                    _status_board = SharedStatusBoard.attach(status_name(FRAME_BUS_PREFIX))
+                except (FileNotFoundError, ValueError):
+                    return None
+            status = _status_board.read()
+            if status is not None and time.time() - status.get('published_at', 0) < FRAME_BUS_STATUS_STALE_SEC:
+                return status
+            # Owner gone or restarted under a new segment: attach again once
+            _status_board.close()
+            _status_board = None
+    return None
+
+@contextmanager
+def _frame_source(url: str, camera_key, consumer: str):
+    """Slot a viewer reads a camera from: a capture hub reference, or the owner's ring in attach mode"""
+    if FRAME_BUS_MODE == 'attach':
+        yield _bus_slot(camera_key)
+    else:
+        with capture_hub.subscription(url, consumer) as slot:
+            yield slot
+
+# ---------- RECORDING ----------
+RECORDING_ENABLED = app.config['RECORDING_ENABLED']
+RECORDINGS_DIR = app.config['RECORDINGS_DIR']
+recorders = {}  # camera key ('default' or camera id) -> SegmentRecorder
+recorders_lock = threading.Lock()
+
+def _recording_dir(camera_key) -> str:
+    return os.path.join(RECORDINGS_DIR, secure_filename(str(camera_key)))
+
+def start_recorder(camera_key, slot: FrameSlot) -> Optional[SegmentRecorder]:
+    """Record every frame published to ``slot`` when recording is enabled."""
+    if not RECORDING_ENABLED:
+        return None
+    key = str(camera_key)
+    with recorders_lock:
+        recorder = recorders.get(key)
+        if recorder is None:
+            recorder = SegmentRecorder(_recording_dir(key),
+                                       segment_seconds=app.config['RECORDING_SEGMENT_SECONDS'],
+                                       retention_seconds=app.config['RECORDING_RETENTION_HOURS'] * 3600,
+                                       max_bytes=app.config['RECORDING_MAX_MB'] * 1024 * 1024)
+            recorder.start()
+            slot.add_listener(recorder.submit)
+            recorders[key] = recorder
+            print(f"[Recorder] Recording camera {key} to {recorder.directory}")
+    return recorder
+
+def stop_recorder(camera_key, slot: FrameSlot):
+    with recorders_lock:
+        recorder = recorders.pop(str(camera_key), None)
+    if recorder is not None:
+        slot.remove_listener(recorder.submit)
+        recorder.stop()
+
 # ---------- MINIMAL STREAM (single OpenCV capture, shared JPEG bytes) ----------
-basic_frame = None  # raw JPEG bytes
-basic_frame_bgr = None  # last decoded BGR frame
-basic_frame_lock = threading.Lock()
-basic_capture_started = False
 recognition_active = False
 recognition_thread = None
-recognition_recent_names = deque(maxlen=7)
-recognition_last_change_time = 0.0
-recognition_last_seen_time = 0.0
 NAME_WINDOW_MIN_COUNT = 3
 NAME_UPDATE_COOLDOWN_SEC = 0.2
 UNKNOWN_RESET_TIMEOUT_SEC = 1.0
 
+class IdentityWindow:
+    """Identity stabilizer state of one face track: short name window and change cooldown."""
+    def __init__(self):
+        self.recent_names = deque(maxlen=7)
+        self.last_change_time = 0.0
+        self.last_seen_time = 0.0
+        self.display_name = "Waiting..."
+
+class RecognitionState:
+    """Face tracker, per-track identity stabilizers and motion gate state for one camera."""
+    def __init__(self, min_interval: float = RECOGNITION_MIN_INTERVAL_SEC):
+        self.motion = MotionGate(app.config['MOTION_PIXEL_THRESHOLD'], app.config['MOTION_MIN_CHANGED'],
+                                 app.config['MOTION_KEEPALIVE_SEC']) if MOTION_GATE_ENABLED else None
+        self.tracker = FaceTracker(TRACKER_DETECT_EVERY, identity_half_life=TRACKER_IDENTITY_HALF_LIFE_SEC,
+                                   confidence_threshold=CONFIDENCE_THRESHOLD)
+        self.quality = FaceQualityGate(**FACE_QUALITY_SETTINGS) if FACE_QUALITY_ENABLED else None
+        self.scheduler = RecognitionScheduler(RECOGNITION_CPU_BUDGET, min_interval,
+                                              max(RECOGNITION_MAX_INTERVAL_SEC, min_interval))
+        self.identities = {}  # track id -> IdentityWindow, so faces stabilize independently
+        self.display_name = "Waiting..."  # person most recently confirmed on this camera
+        # Latest recognition result for client-side overlays: (overlay dict, compact JSON)
+        self.overlay_cond = threading.Condition()
+        self.overlay = None
+        self.overlay_json = b'null'
+        self.publish_overlay(0, 0.0, None, [])
+
+    def publish_overlay(self, seq: int, timestamp: float, size, faces: list):
+        """Replace the overlay (boxes are in pixels of the full-size frame) and wake long-polls"""
+        with self.overlay_cond:
+            version = self.overlay['version'] + 1 if self.overlay is not None else 0
+            overlay = {
+                'version': version,
+                'seq': seq,
+                'timestamp': round(timestamp, 3),
+                'width': size[0] if size else None,
+                'height': size[1] if size else None,
+                'person': self.display_name,
+                'faces': faces
+            }
+            self.overlay, self.overlay_json = overlay, json.dumps(overlay, separators=(',', ':')).encode()
+            self.overlay_cond.notify_all()
+
+# State of the default (ESP32_IP) camera used by /video_feed and the legacy stream
+recognition_state = RecognitionState()
+
 # ---------- LAB MANAGEMENT: RFID → Student, Computers, Sessions ----------
 class RFIDCard(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -100,6 +285,21 @@ class LabSession(db.Model):
     end_time = db.Column(db.DateTime, nullable=True)
     password = db.Column(db.String(32), nullable=False)
 
+# ---------- CAMERA REGISTRY ----------
+class Camera(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(50), unique=True, nullable=False)
+    host = db.Column(db.String(100), nullable=False)  # ESP32-CAM IP or hostname
+    stream_url = db.Column(db.String(255), nullable=True)  # overrides http://<host>:81/stream
+    location = db.Column(db.String(100), nullable=True)
+    enabled = db.Column(db.Boolean, default=True)
+    recognition_enabled = db.Column(db.Boolean, default=True)
+    recognition_interval = db.Column(db.Float, default=0.1)  # seconds between recognition passes
+    date_created = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def get_stream_url(self) -> str:
+        return self.stream_url or f"http://{self.host}:81/stream"
+
 def _generate_session_password(length: int = 8) -> str:
     import secrets
     alphabet = 'ABCDEFGHJKLMNPQRSTUVWXYZ23456789'
@@ -133,30 +333,18 @@ def _end_active_session_for_user(user_id: int) -> Optional[LabSession]:
     db.session.commit()
     return active
 
-def _capture_basic_frames():
-    global basic_frame
-    print(f"[BasicStream] Opening {ESP32_STREAM_URL}...")
-    cap = cv2.VideoCapture(ESP32_STREAM_URL)
-    while True:
-        ok, img = cap.read()
-        if not ok or img is None:
-            time.sleep(0.05)
-            continue
-        ok, buf = cv2.imencode('.jpg', img)
-        if not ok:
-            continue
-        with basic_frame_lock:
-            basic_frame = buf.tobytes()
-            # store decoded frame for recognition thread
-            global basic_frame_bgr
-            basic_frame_bgr = img
-
-def _ensure_basic_capture_started():
-    global basic_capture_started
-    if not basic_capture_started:
-        t = threading.Thread(target=_capture_basic_frames, daemon=True)
-        t.start()
-        basic_capture_started = True
+def _ensure_default_pipeline():
+    """Attach the recorder and recognition to the default camera slot (once).
+
+    Neither holds a capture hub reference: they process frames while some
+    viewer keeps the upstream open.
+    """
+    global default_pipeline_started
+    if FRAME_BUS_MODE == 'attach':
+        return  # the capture owner records and recognizes
+    if not default_pipeline_started:
+        default_pipeline_started = True
+        start_recorder('default', basic_slot)
         _ensure_recognition_started()
 
 def _ensure_recognition_started():
@@ -173,26 +361,27 @@ def _recognition_loop():
         face_cascade = cv2.CascadeClassifier(cv2.data.haarcascades + "haarcascade_frontalface_default.xml")
     except Exception:
         face_cascade = None
+    last_seq = 0
     while recognition_active:
-        # Snapshot the latest frame
-        with basic_frame_lock:
-            frame_bgr = None if basic_frame_bgr is None else basic_frame_bgr.copy()
-        if frame_bgr is not None and frame_bgr.size > 0 and face_cascade is not None:
+        # Only work on frames we have not seen yet
+        frame = basic_slot.newer_than(last_seq)
+        if frame is None:
+            time.sleep(recognition_state.scheduler.min_interval)
+            continue
+        last_seq = frame.seq
+        if face_cascade is not None:
             try:
-                # Run recognition updates (overlays not required for stream)
-                _ = process_frame_for_recognition(frame_bgr, face_cascade)
+                # Run recognition updates (overlays not required for stream);
+                # detection decodes a reduced grayscale image straight from the JPEG
+                _ = process_frame_for_recognition(None, face_cascade, frame=frame)
             except Exception as e:
                 # Keep going even if recognition fails
                 pass
-        time.sleep(0.1)
+        # Faster while faces are in view, slower over an empty scene or a busy machine
+        time.sleep(recognition_state.scheduler.delay())
 
-# ---------- FAST MJPEG CAPTURE (single upstream, multi-client) ----------
-fast_capture_active = False
-fast_capture_thread = None
-fast_capture_frame = None  # raw JPEG bytes
-fast_capture_lock = threading.Lock()
+# ---------- DIRECT STREAM (best ESP32 URL, shared through the capture hub) ----------
 fast_capture_url = None
-fast_capture_timestamp = 0.0
 
 def _probe_url(url: str, timeout: float = 2.0) -> bool:
     try:
@@ -212,9 +401,13 @@ def _select_stream_url(preferred: Optional[str] = None) -> str:
         candidates.append(preferred)
     # try port 81 first, then default
     candidates.extend([
-        f"http://{ESP32_IP}:81/stream",
-        f"http://{ESP32_IP}/stream",
+        f"{ESP32_STREAM_BASE_URL}/stream",
+        f"{ESP32_BASE_URL}/stream",
     ])
+    # An upstream that is already open wins; probing would open another stream
+    for u in candidates:
+        if capture_hub.is_running(u):
+            return u
     seen = []
     for u in candidates:
         if u in seen:
@@ -228,71 +421,347 @@ def _select_stream_url(preferred: Optional[str] = None) -> str:
     print(f"[FastCapture] Probing failed, using fallback: {fallback}")
     return fallback
 
-def start_fast_capture(url: Optional[str] = None):
-    """Start a single OpenCV capture on ESP32 MJPEG stream and share frames."""
-    global fast_capture_active, fast_capture_thread, fast_capture_url
-    fast_capture_url = _select_stream_url(url)
-    if fast_capture_active:
-        return
-    fast_capture_active = True
-    fast_capture_thread = threading.Thread(target=_fast_capture_loop, daemon=True)
-    fast_capture_thread.start()
-    print(f"[FastCapture] Started for {fast_capture_url}")
-
-def stop_fast_capture():
-    global fast_capture_active, fast_capture_thread
-    fast_capture_active = False
-    if fast_capture_thread and fast_capture_thread.is_alive():
-        fast_capture_thread.join(timeout=2)
-        print("[FastCapture] Stopped")
-
-def _fast_capture_loop():
-    global fast_capture_frame
-    cap = None
-    while fast_capture_active:
+def _direct_stream_url() -> str:
+    """Stream URL for /video_direct, selected once and then reused."""
+    global fast_capture_url
+    if FRAME_BUS_MODE == 'attach':
+        return ESP32_STREAM_URL  # served from the owner's 'default' ring, never probed
+    if fast_capture_url is None:
+        fast_capture_url = _select_stream_url(None)
+    return fast_capture_url
+
+# ---------- PER-CAMERA CAPTURE WORKERS ----------
+_thread_local = threading.local()
+
+def _thread_face_cascade():
+    """Haar cascade owned by the calling thread (CascadeClassifier is not thread-safe)."""
+    cascade = getattr(_thread_local, 'face_cascade', None)
+    if cascade is None:
+        cascade = cv2.CascadeClassifier(cv2.data.haarcascades + "haarcascade_frontalface_default.xml")
+        _thread_local.face_cascade = cascade
+    return cascade
+
+class CameraWorker:
+    """Capture and recognition for one registered ESP32-CAM.
+
+    Each worker owns its health counters and recognition state, so cameras
+    never contend for each other's locks. The upstream connection and FrameSlot
+    belong to the capture hub, where the worker holds a reference for as long
+    as it runs (viewers of the same camera share that connection). With
+    INGEST_MODE=asyncio recognition runs on the ingest engine's bounded
+    executor; with INGEST_MODE=threads the worker keeps a recognition thread.
+    """
+
+    def __init__(self, camera_id: int, name: str, stream_url: str,
+                 recognition_enabled: bool = True, recognition_interval: float = 0.1):
+        self.camera_id = camera_id
+        self.name = name
+        self.stream_url = stream_url
+        self.recognition_enabled = recognition_enabled
+        self.recognition_interval = max(recognition_interval or 0.1, 0.02)
+        self.slot = capture_hub.slot(stream_url)
+        # The camera's configured interval is the fastest the scheduler may recognize it
+        self.recognition = RecognitionState(self.recognition_interval)
+        self.active = False
+        self.connected = False
+        self.frames = 0
+        self.errors = 0
+        self.last_error = None
+        self.started_at = None
+        self.fps = 0.0
+        self._threads = []
+        self._last_frame_time = 0.0
+        self._recognizing = False
+        self._last_recognized_seq = 0
+
+    def start(self):
+        if self.active:
+            return
+        self.active = True
+        self.started_at = time.time()
+        start_recorder(self.camera_id, self.slot)
+        self.slot.add_listener(self._on_frame)
+        capture_hub.acquire(self.stream_url, f'camera-{self.camera_id}')
+        if INGEST_MODE != 'asyncio' and self.recognition_enabled:
+            self._threads = [threading.Thread(target=self._recognition_loop, daemon=True,
+                                              name=f"camera-{self.camera_id}-recognition")]
+            for t in self._threads:
+                t.start()
+        print(f"[Camera {self.name}] Worker started for {self.stream_url} ({INGEST_MODE})")
+
+    def stop(self):
+        if not self.active:
+            return
+        self.active = False
+        self.slot.remove_listener(self._on_frame)
+        capture_hub.release(self.stream_url, f'camera-{self.camera_id}')
+        for t in self._threads:
+            if t.is_alive():
+                t.join(timeout=2)
+        self._threads = []
+        self.connected = False
+        stop_recorder(self.camera_id, self.slot)
+        print(f"[Camera {self.name}] Worker stopped")
+
+    def _on_frame(self, frame):
+        """Slot listener for every received frame (hub thread or event loop); must stay cheap."""
+        self.frames += 1
+        now = time.time()
+        if self._last_frame_time:
+            self.fps = 0.9 * self.fps + 0.1 / max(now - self._last_frame_time, 1e-3)
+        self._last_frame_time = now
+        if (INGEST_MODE == 'asyncio' and self.recognition_enabled and not self._recognizing
+                and self.recognition.scheduler.due(now)):
+            self._recognizing = True
+            if not ingest_engine.submit(self._recognize_latest):
+                self._recognizing = False
+
+    def _recognize_latest(self):
         try:
-            if cap is None or not cap.isOpened():
-                print(f"[FastCapture] Opening {fast_capture_url}...")
-                # Prefer FFMPEG backend for HTTP MJPEG
-                try:
-                    cap = cv2.VideoCapture(fast_capture_url, cv2.CAP_FFMPEG)
-                except Exception:
-                    cap = cv2.VideoCapture(fast_capture_url)
-                if not cap.isOpened():
-                    print("[FastCapture] Failed to open stream, retrying in 2s")
-                    time.sleep(2)
-                    continue
+            self._recognize(self.slot.newer_than(self._last_recognized_seq), _thread_face_cascade())
+        finally:
+            self._recognizing = False
 
-            ok, img = cap.read()
-            if not ok or img is None:
-                # transient error; try to reopen
-                print("[FastCapture] Read failed, reopening...")
-                try:
-                    cap.release()
-                except:
-                    pass
-                cap = None
-                time.sleep(0.2)
-                continue
+    def _recognize(self, frame, face_cascade):
+        if frame is None:
+            return
+        self._last_recognized_seq = frame.seq
+        try:
+            process_frame_for_recognition(None, face_cascade, self.recognition, frame=frame)
+        except Exception:
+            pass
 
-            # Encode once to JPEG and store bytes
-            ok, buf = cv2.imencode('.jpg', img, [cv2.IMWRITE_JPEG_QUALITY, 85])
-            if not ok:
+    def _recognition_loop(self):
+        try:
+            face_cascade = _thread_face_cascade()
+        except Exception:
+            return
+        while self.active:
+            frame = self.slot.newer_than(self._last_recognized_seq)
+            if frame is None:
+                time.sleep(self.recognition.scheduler.min_interval)
                 continue
-            with fast_capture_lock:
-                fast_capture_frame = buf.tobytes()
-                global fast_capture_timestamp
-                fast_capture_timestamp = time.time()
+            self._recognize(frame, face_cascade)
+            time.sleep(self.recognition.scheduler.delay())
+
+    def health(self) -> dict:
+        upstream = capture_hub.upstream_stats(self.stream_url)
+        reconnect = None
+        if upstream is not None:
+            self.connected = upstream['connected']
+            self.errors = upstream['reconnects']
+            self.last_error = upstream['last_error']
+            reconnect = upstream['reconnect']
+        frame = self.slot.latest()
+        age = time.time() - frame.timestamp if frame is not None else None
+        if not self.active:
+            status = 'stopped'
+        elif age is None or age >= 10.0:
+            status = 'unhealthy'
+        else:
+            status = 'healthy' if age < 5.0 else 'degraded'
+        return {
+            'camera_id': self.camera_id,
+            'name': self.name,
+            'stream_url': self.stream_url,
+            'ingest_mode': INGEST_MODE,
+            'active': self.active,
+            'connected': self.connected,
+            'frames': self.frames,
+            'fps': round(self.fps, 1),
+            'last_frame_age_seconds': round(age, 2) if age is not None else None,
+            'errors': self.errors,
+            'last_error': self.last_error,
+            'reconnect_state': reconnect['state'] if reconnect is not None else None,
+            'recognition_enabled': self.recognition_enabled,
+            'current_person': self.recognition.display_name,
+            'status': status
+        }
 
-        except Exception as e:
-            print(f"[FastCapture] Error: {e}")
-            time.sleep(0.5)
-    # Cleanup
+camera_workers = {}  # camera_id -> CameraWorker
+camera_workers_lock = threading.Lock()
+
+def get_camera_worker(camera_id: int) -> Optional[CameraWorker]:
+    """Return the running worker for a camera, starting it if needed."""
+    if FRAME_BUS_MODE == 'attach':
+        return None  # workers run in the capture owner
+    with camera_workers_lock:
+        worker = camera_workers.get(camera_id)
+    if worker is not None:
+        return worker
+    camera = db.session.get(Camera, camera_id)
+    if camera is None or not camera.enabled:
+        return None
+    with camera_workers_lock:
+        worker = camera_workers.get(camera_id)
+        if worker is None:
+            worker = CameraWorker(camera.id, camera.name, camera.get_stream_url(),
+                                  camera.recognition_enabled, camera.recognition_interval)
+            camera_workers[camera_id] = worker
+            worker.start()
+    return worker
+
+def stop_camera_worker(camera_id: int):
+    with camera_workers_lock:
+        worker = camera_workers.pop(camera_id, None)
+    if worker is not None:
+        worker.stop()
+
+def start_camera_workers():
+    """Start a worker for every enabled camera in the registry."""
+    for camera in Camera.query.filter_by(enabled=True).order_by(Camera.id.asc()).all():
+        get_camera_worker(camera.id)
+
+def stop_camera_workers():
+    for camera_id in list(camera_workers.keys()):
+        stop_camera_worker(camera_id)
+
+def _registered_camera_url(camera_id: int) -> Optional[str]:
+    """Stream URL of an enabled registered camera, starting its worker unless attached to the frame bus"""
+    if FRAME_BUS_MODE == 'attach':
+        camera = db.session.get(Camera, camera_id)
+        return camera.get_stream_url() if camera is not None and camera.enabled else None
+    worker = get_camera_worker(camera_id)
+    return worker.stream_url if worker is not None else None
+
+def _recognition_snapshot() -> dict:
+    """Recognition results of this process; the capture owner publishes it on the frame bus"""
+    with camera_workers_lock:
+        workers = list(camera_workers.values())
+    motion = {'default': recognition_state.motion.stats() if recognition_state.motion is not None else None}
+    tracker = {'default': recognition_state.tracker.stats()}
+    scheduler = {'default': recognition_state.scheduler.stats()}
+    quality = {'default': recognition_state.quality.stats() if recognition_state.quality is not None else None}
+    overlays = {'default': recognition_state.overlay}
+    for worker in workers:
+        if worker.recognition.motion is not None:
+            motion[str(worker.camera_id)] = worker.recognition.motion.stats()
+        tracker[str(worker.camera_id)] = worker.recognition.tracker.stats()
+        scheduler[str(worker.camera_id)] = worker.recognition.scheduler.stats()
+        if worker.recognition.quality is not None:
+            quality[str(worker.camera_id)] = worker.recognition.quality.stats()
+        overlays[str(worker.camera_id)] = worker.recognition.overlay
+    return {
+        'current_person': recognition_state.display_name,
+        'total_faces_trained': len(label_map) if label_map else 0,
+        'motion_gate': motion,
+        'tracker': tracker,
+        'scheduler': scheduler,
+        'opencv_threads': cv2.getNumThreads(),
+        'face_quality': quality,
+        'overlays': overlays,
+        'cameras': {str(worker.camera_id): worker.health() for worker in workers},
+        'recognition_pool': recognition_pool.stats() if recognition_pool is not None else None,
+        'published_at': time.time()
+    }
+
+OVERLAY_BUS_CACHE_SEC = 0.1  # attached workers re-read the status board at most this often per camera
+_overlay_bus_cache = {}  # camera key -> (read at, overlay, JSON) in FRAME_BUS_MODE=attach
+
+def _recognition_state_for(camera_key) -> Optional[RecognitionState]:
+    """Recognition state of 'default' or a running camera worker (never starts one)"""
+    key = str(camera_key)
+    if key == 'default':
+        return recognition_state
+    with camera_workers_lock:
+        worker = camera_workers.get(int(key)) if key.isdigit() else None
+    return worker.recognition if worker is not None else None
+
+def _current_overlay(camera_key):
+    """(overlay dict or None, compact JSON) of a camera's latest recognition result"""
+    key = str(camera_key)
+    if FRAME_BUS_MODE == 'attach':
+        cached = _overlay_bus_cache.get(key)
+        if cached is None or time.time() - cached[0] > OVERLAY_BUS_CACHE_SEC:
+            overlay = ((_bus_status() or {}).get('overlays') or {}).get(key)
+            cached = (time.time(), overlay, json.dumps(overlay, separators=(',', ':')).encode())
+            _overlay_bus_cache[key] = cached
+        return cached[1], cached[2]
+    state = _recognition_state_for(key)
+    if state is None:
+        return None, b'null'
+    with state.overlay_cond:
+        return state.overlay, state.overlay_json
+
+def _sync_camera_workers():
+    """Match running workers to the camera registry and publish their slots (capture owner)."""
     try:
-        if cap is not None:
-            cap.release()
-    except:
-        pass
+        cameras = {camera.id: camera for camera in Camera.query.filter_by(enabled=True).all()}
+        with camera_workers_lock:
+            running = dict(camera_workers)
+        for camera_id, worker in running.items():
+            camera = cameras.get(camera_id)
+            if camera is None or worker.stream_url != camera.get_stream_url():
+                frame_bus.unpublish_slot(camera_id)
+                stop_camera_worker(camera_id)
+            elif (worker.recognition_enabled != camera.recognition_enabled
+                  or worker.recognition_interval != max(camera.recognition_interval or 0.1, 0.02)):
+                stop_camera_worker(camera_id)  # same upstream and slot, so the ring stays published
+        for camera_id in cameras:
+            worker = get_camera_worker(camera_id)
+            if worker is not None:
+                frame_bus.publish_slot(camera_id, worker.slot)
+    finally:
+        db.session.remove()
+
+def _trim_status(status: dict) -> dict:
+    """Bus status without per-track lists and with at most FRAME_BUS_STATUS_MAX_FACES overlay faces per camera"""
+    trimmed = dict(status, truncated=True)
+    trimmed['tracker'] = {key: dict(stats, tracks=[], tracks_omitted=len(stats['tracks']))
+                          for key, stats in status['tracker'].items()}
+    overlays = {}
+    for key, overlay in status['overlays'].items():
+        if overlay is not None and len(overlay['faces']) > FRAME_BUS_STATUS_MAX_FACES:
+            overlay = dict(overlay, faces=overlay['faces'][:FRAME_BUS_STATUS_MAX_FACES],
+                           faces_omitted=len(overlay['faces']) - FRAME_BUS_STATUS_MAX_FACES)
+        overlays[key] = overlay
+    trimmed['overlays'] = overlays
+    return trimmed
+
+def _frame_bus_loop():
+    last_sync = time.time()
+    overflowing = False
+    while frame_bus is not None:
+        try:
+            published = frame_bus.publish_status(_recognition_snapshot(), _trim_status)
+            # Logged once per change; /camera_status counts every trimmed and dropped publish
+            if not published and not overflowing:
+                print(f"[FrameBus] Recognition status does not fit the {frame_bus.status.size // 1024} KB "
+                      "status segment even trimmed; attached workers will report it as stale")
+            elif published and overflowing:
+                print("[FrameBus] Recognition status fits the status segment again")
+            overflowing = not published
+            if time.time() - last_sync >= FRAME_BUS_SYNC_INTERVAL:
+                last_sync = time.time()
+                with app.app_context():
+                    _sync_camera_workers()
+        except Exception as e:
+            print(f"[FrameBus] Publish error: {e}")
+        time.sleep(FRAME_BUS_STATUS_INTERVAL)
+
+def start_frame_bus():
+    """Publish every camera slot and the recognition status to shared memory (call in an app context)."""
+    global frame_bus
+    if frame_bus is not None:
+        return
+    # Cameras registered later still fit: an oversized status is trimmed before it is published
+    status_kb = max(64, FRAME_BUS_STATUS_KB_PER_CAMERA * (Camera.query.count() + 1))
+    frame_bus = FrameBusPublisher(FRAME_BUS_PREFIX, app.config['FRAME_BUS_SLOTS'],
+                                  app.config['FRAME_BUS_SLOT_KB'] * 1024, status_kb * 1024)
+    frame_bus.publish_slot('default', basic_slot)
+    # Viewers in other processes hold no hub references, so the owner keeps the default camera open
+    capture_hub.acquire(ESP32_STREAM_URL, 'frame_bus')
+    _ensure_default_pipeline()
+    _sync_camera_workers()
+    threading.Thread(target=_frame_bus_loop, daemon=True, name='frame-bus').start()
+    print(f"[FrameBus] Owner publishing {len(frame_bus.stats())} camera(s) with prefix '{FRAME_BUS_PREFIX}'")
+
+def stop_frame_bus():
+    global frame_bus
+    bus, frame_bus = frame_bus, None
+    if bus is not None:
+        capture_hub.release(ESP32_STREAM_URL, 'frame_bus')
+        bus.close()
 
 # Initialize Flask-Login
 login_manager = LoginManager()
@@ -368,6 +837,12 @@ def create_dataset_folder(username):
         return False
 
 # ---------- FACE RECOGNITION FUNCTIONS ----------
+def _create_recognizer():
+    """Untrained recognizer for RECOGNIZER_BACKEND; both expose train/predict/write/read"""
+    if RECOGNIZER_BACKEND == 'vectorized':
+        return LBPHistogramRecognizer()
+    return cv2.face.LBPHFaceRecognizer_create()
+
 def prepare_training_data(dataset_path):
     """Prepare training data for face recognition"""
     global face_recognizer, label_map
@@ -398,8 +873,16 @@ def prepare_training_data(dataset_path):
         
         if len(faces) > 0:
             # Train the face recognizer
-            face_recognizer = cv2.face.LBPHFaceRecognizer_create()
+            face_recognizer = _create_recognizer()
             face_recognizer.train(faces, np.array(labels))
+            if recognition_pool is not None:
+                recognition_pool.set_model(face_recognizer)
+            # Labels may have been renumbered: tracked faces are predicted again
+            recognition_state.tracker.forget_identities()
+            with camera_workers_lock:
+                workers = list(camera_workers.values())
+            for worker in workers:
+                worker.recognition.tracker.forget_identities()
             print(f"Trained {len(faces)} images for {len(label_map)} people")
             return True
         else:
@@ -451,7 +934,7 @@ def start_streaming_thread():
     if 'STREAM_URL' not in globals() or 'ESP32_IP' not in globals():
         print("[Streaming Error] Required variables not defined, initializing...")
         ESP32_IP = app.config.get('ESP32_IP', '192.168.1.100')
-        STREAM_URL = f"http://{ESP32_IP}/stream"
+        STREAM_URL = f"{ESP32_BASE_URL}/stream"
     
     if not streaming_active:
         streaming_active = True
@@ -469,156 +952,194 @@ def stop_streaming_thread():
         print("[Streaming] Background streaming thread stopped")
 
 def stream_esp32_frames():
-    """Background thread for continuous ESP32-CAM streaming and processing"""
-    global current_frame, frame_timestamp, last_frame_time, STREAM_URL
+    """Background thread: recognition overlays on the shared ESP32-CAM stream"""
+    global last_frame_time
     
     print("[Streaming] Background streaming thread started")
     frame_count = 0
     start_time = time.time()
-    
-    # Ensure STREAM_URL is defined
-    if 'STREAM_URL' not in globals():
-        print("[Streaming Error] STREAM_URL not defined, initializing...")
-        global ESP32_IP
-        STREAM_URL = f"http://{ESP32_IP}/stream"
-    
-    while streaming_active:
-        try:
-            # Use a session for persistent connection
-            session = requests.Session()
-            print(f"[Streaming] Attempting to connect to ESP32-CAM at {STREAM_URL}...")
+    face_cascade = cv2.CascadeClassifier(cv2.data.haarcascades + "haarcascade_frontalface_default.xml")
+    last_seq = 0
+    
+    # Subscribe to the capture hub instead of opening another connection to the camera
+    with capture_hub.subscription(ESP32_STREAM_URL, 'legacy_stream') as slot:
+        while streaming_active:
+            frame = slot.wait_newer(last_seq, timeout=1.0)
+            if frame is None:
+                continue
+            last_seq = frame.seq
+
+            shared = frame.bgr()
+            if shared is None or shared.size == 0:
+                print("[Streaming] Invalid image decoded, skipping frame")
+                continue
             
-            # Test connection first
+            # Additional validation
+            if shared.shape[0] < 10 or shared.shape[1] < 10:
+                print("[Streaming] Image too small, skipping frame")
+                continue
+
+            # The shared decode is read-only; overlays are drawn on a private copy
+            img = shared.copy()
+
+            # Process frame for face recognition with error handling; between scheduled
+            # passes the latest overlay is drawn again
             try:
-                test_response = session.get(f"http://{ESP32_IP}/", timeout=5)
-                print(f"[Streaming] ESP32-CAM main page status: {test_response.status_code}")
+                if not recognition_state.scheduler.due():
+                    _draw_overlay(img, recognition_state.overlay)
+                    processed_img = img
+                else:
+                    processed_img = process_frame_for_recognition(img, face_cascade)
+                if processed_img is None:
+                    print("[Streaming] Face recognition failed, using original frame")
+                    processed_img = img
             except Exception as e:
-                print(f"[Streaming] ESP32-CAM main page test failed: {e}")
+                print(f"[Streaming] Face recognition error: {e}, using original frame")
+                processed_img = img
             
-            stream = session.get(STREAM_URL, stream=True, timeout=10)
+            # Copy into the preallocated ring (no allocation once slots exist)
+            frame_ring.write(processed_img)
+            if frame_count % 200 == 0:  # Log much less frequently
+                print(f"[Streaming] Frame {frame_count} stored: {processed_img.shape}")
             
-            if stream.status_code != 200:
-                print(f"[Streaming Error] ESP32 stream returned status {stream.status_code}")
-                print(f"[Streaming] Trying alternative stream URLs...")
-                
-                # Try alternative stream URLs (prioritizing high quality)
-                alternative_urls = [
-                    f"http://{ESP32_IP}:81/stream",  # Port 81 often has better quality
-                    f"http://{ESP32_IP}/cam-hi.jpg",  # High quality single images
-                    f"http://{ESP32_IP}/cam-lo.jpg",  # Low quality fallback
-                    f"http://{ESP32_IP}/stream",      # Original stream as fallback
-                    f"http://{ESP32_IP}:81/cam-hi.jpg" # Port 81 high quality images
-                ]
-                
-                for alt_url in alternative_urls:
-                    try:
-                        print(f"[Streaming] Trying: {alt_url}")
-                        alt_stream = session.get(alt_url, stream=True, timeout=5)
-                        if alt_stream.status_code == 200:
-                            print(f"[Streaming] Alternative URL works: {alt_url}")
-                            stream = alt_stream
-                            STREAM_URL = alt_url  # Update the global URL
-                            break
-                    except Exception as e:
-                        print(f"[Streaming] Alternative URL failed: {alt_url} - {e}")
-                else:
-                    print(f"[Streaming] All stream URLs failed, retrying in 15 seconds...")
-                    time.sleep(15)
-                    continue
+            # Optimized delay for smooth streaming without ghosting
+            time.sleep(STREAM_DELAY)  # Using configurable delay for stable streaming
             
-            print(f"[Streaming] Successfully connected to ESP32-CAM!")
-            bytes_buffer = b''
-            face_cascade = cv2.CascadeClassifier(cv2.data.haarcascades + "haarcascade_frontalface_default.xml")
+            # Performance monitoring (reduced frequency)
+            frame_count += 1
+            if frame_count % 500 == 0:  # Log every 500 frames
+                elapsed = time.time() - start_time
+                fps = frame_count / elapsed
+                print(f"[Streaming] Performance: {fps:.1f} FPS, {frame_count} frames processed")
             
-            for chunk in stream.iter_content(chunk_size=1024):
-                if not streaming_active:
-                    break
-                    
-                bytes_buffer += chunk
-                a = bytes_buffer.find(b'\xff\xd8')
-                b = bytes_buffer.find(b'\xff\xd9')
-                
-                if a != -1 and b != -1:
-                    jpg = bytes_buffer[a:b+2]
-                    bytes_buffer = bytes_buffer[b+2:]
-                    
-                    if len(jpg) < 100:
-                        continue
-
-                    img = cv2.imdecode(np.frombuffer(jpg, np.uint8), cv2.IMREAD_COLOR)
-                    if img is None or img.size == 0:
-                        print("[Streaming] Invalid image decoded, skipping frame")
-                        continue
-                    
-                    # Additional validation
-                    if img.shape[0] < 10 or img.shape[1] < 10:
-                        print("[Streaming] Image too small, skipping frame")
-                        continue
-
-                    # Process frame for face recognition with error handling
-                    try:
-                        if img is not None and img.size > 0:
-                            print(f"[Streaming] Processing frame: {img.shape}, size: {img.size}")
-                            processed_img = process_frame_for_recognition(img, face_cascade)
-                            if processed_img is None:
-                                print("[Streaming] Face recognition failed, using original frame")
-                                processed_img = img
-                        else:
-                            print("[Streaming] Invalid image, skipping processing")
-                            processed_img = img
-                    except Exception as e:
-                        print(f"[Streaming] Face recognition error: {e}, using original frame")
-                        processed_img = img
-                    
-                    # Store the latest frame efficiently
-                    with frame_lock:
-                        current_frame = processed_img
-                        frame_timestamp = time.time()  # Update timestamp
-                        if frame_count % 200 == 0:  # Log much less frequently
-                            print(f"[Streaming] Frame {frame_count} stored: {processed_img.shape}")
-                    
-                    # Add frame to buffer without clearing (let it manage itself)
-                    try:
-                        if frame_buffer.full():
-                            frame_buffer.get_nowait()  # Remove oldest frame only if full
-                        frame_buffer.put_nowait(processed_img)
-                    except queue.Full:
-                        pass  # Should not happen with proper management
-                    
-                    # Optimized delay for smooth streaming without ghosting
-                    time.sleep(STREAM_DELAY)  # Using configurable delay for stable streaming
-                    
-                    # Performance monitoring (reduced frequency)
-                    frame_count += 1
-                    if frame_count % 500 == 0:  # Log every 500 frames
-                        elapsed = time.time() - start_time
-                        fps = frame_count / elapsed
-                        print(f"[Streaming] Performance: {fps:.1f} FPS, {frame_count} frames processed")
-                    
-                    # Update heartbeat
-                    global last_frame_time
-                    last_frame_time = time.time()
-                    
-        except requests.exceptions.ConnectTimeout:
-            print(f"[Streaming] Connection timeout - ESP32-CAM not responding. Retrying in 30 seconds...")
-            time.sleep(30)
-        except requests.exceptions.ConnectionError:
-            print(f"[Streaming] Connection refused - ESP32-CAM not accessible. Retrying in 30 seconds...")
-            time.sleep(30)
-        except Exception as e:
-            print(f"[Streaming Error] {e}. Retrying in 30 seconds...")
-            time.sleep(30)
-        finally:
-            try:
-                session.close()
-            except:
-                pass
+            # Update heartbeat
+            last_frame_time = time.time()
     
     print("[Streaming] Background streaming thread ended")
 
-def process_frame_for_recognition(img, face_cascade):
-    """Process a frame for face recognition and return the processed frame"""
-    global pred_buffer, time_buffer, display_name
+# ---------- RECOGNITION PROCESS POOL ----------
+recognition_pool = None
+recognition_pool_lock = threading.Lock()
+
+def _get_recognition_pool() -> Optional[RecognitionPool]:
+    """The recognition worker pool, started on first use (None when RECOGNITION_PROCESSES=0)"""
+    global recognition_pool
+    if not RECOGNITION_PROCESSES:
+        return None
+    if recognition_pool is None:
+        with recognition_pool_lock:
+            if recognition_pool is None:
+                pool = RecognitionPool(_apply_pool_result, RECOGNITION_PROCESSES, DETECTION_SCALE, FACE_SIZE,
+                                       FACE_MIN_SIZE, FACE_MAX_SIZE,
+                                       quality=FACE_QUALITY_SETTINGS if FACE_QUALITY_ENABLED else None)
+                if face_recognizer is not None:
+                    pool.set_model(face_recognizer)
+                pool.start()
+                recognition_pool = pool
+    return recognition_pool
+
+def stop_recognition_pool():
+    global recognition_pool
+    pool, recognition_pool = recognition_pool, None
+    if pool is not None:
+        pool.stop()
+
+def _apply_pool_result(state: RecognitionState, result: dict):
+    """Apply one worker result to a camera's recognition state (pool collector thread)"""
+    if state.quality is not None and result['quality']:
+        state.quality.merge(result['quality'])
+    if result['error']:
+        state.scheduler.record((result['elapsed_ms'] or 0.0) / 1000, 0, _motion_seen(state))
+        return  # an undecodable frame says nothing about the tracks
+    faces = _apply_tracking(state, result['plan'], result['faces'], time.time(), result['seq'], result['timestamp'],
+                            result['size'])
+    # Workers run OpenCV single-threaded, so their wall time is the pass's CPU time
+    state.scheduler.record(result['elapsed_ms'] / 1000, len(faces), _motion_seen(state))
+
+def _motion_seen(state: RecognitionState) -> bool:
+    """Whether the motion gate saw something move on the latest frame (someone may be entering)"""
+    return state.motion is not None and state.motion.last_changed >= state.motion.min_changed
+
+def _apply_tracking(state: RecognitionState, plan: dict, faces: list, now: float, seq: int, timestamp: float,
+                    size) -> list:
+    """Fold recognize_plan() output into the camera's tracks and publish the overlay; returns [(track, decided name)]"""
+    tracks = state.tracker.apply(plan, faces, now)
+    if state.motion is not None:
+        state.motion.note_faces(len(tracks))
+    overlay_faces = []
+    confirmed = []
+    for track in tracks:
+        window = state.identities.get(track.id)
+        if window is None:
+            window = state.identities[track.id] = IdentityWindow()
+        previous = window.display_name
+        name = None
+        if track.resolved:
+            # A resolved track counts as one prediction per pass, as if LBPH had run again
+            name = _record_prediction(window, track.label, track.distance)
+        elif track.predicted_at == now:
+            name = _record_prediction(window, track.last_label, track.distance)
+        if window.display_name != previous:
+            confirmed.append(window.display_name)
+        if face_recognizer is not None and name is None:
+            name = "Unknown"
+        overlay_faces.append({
+            'track': track.id,
+            'box': [int(v) for v in track.box],
+            'name': name,
+            'confidence': round(track.distance, 1) if track.predicted_at else None,
+            'recognized': name is not None and name != "Unknown"
+        })
+    # Windows of tracks the tracker has dropped
+    live = state.tracker.track_ids()
+    for track_id in [track_id for track_id in state.identities if track_id not in live]:
+        del state.identities[track_id]
+    if confirmed:
+        # Everyone who settled in this pass is marked together
+        state.display_name = confirmed[-1]
+        mark_attendance_batch(confirmed)
+    state.publish_overlay(seq, timestamp, size, overlay_faces)
+    return overlay_faces
+
+def _draw_overlay(img, overlay: Optional[dict]):
+    """Burn an overlay into a BGR frame (legacy stream; other viewers draw it client-side)"""
+    for face in (overlay or {}).get('faces', []):
+        x, y, w, h = face['box']
+        if face['name'] is None:
+            cv2.rectangle(img, (x, y), (x+w, y+h), (255, 0, 0), 2)
+            cv2.putText(img, "Face Detected", (x, y-5), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 0), 2)
+            continue
+        # Color coding: Green for recognized, Red for unknown
+        color = (0, 255, 0) if face['recognized'] else (0, 0, 255)
+        label = face['name'] if face['confidence'] is None else f"{face['name']} ({face['confidence']:.1f})"
+        cv2.rectangle(img, (x, y), (x+w, y+h), color, 2)
+        cv2.putText(img, label, (x, y-5), cv2.FONT_HERSHEY_SIMPLEX, 0.6, color, 2)
+    person = overlay['person'] if overlay else "Waiting..."
+    cv2.putText(img, f"Status: {person}", (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 255), 2)
+
+def _record_prediction(window: IdentityWindow, label_id: int, confidence: float) -> str:
+    """Feed one face prediction through its track's stabilizer; a newly settled person becomes window.display_name"""
+    name = label_map.get(label_id, "Unknown")
+    # Better confidence handling for low-quality video
+    # Debounce and require short consistency before switching
+    pred_this_frame = name if confidence < CONFIDENCE_THRESHOLD else "Unknown"
+    # Stabilize identity decision using short-term window and cooldown
+    decided_name = _stabilize_identity(pred_this_frame, window)
+    if decided_name != "Unknown" and decided_name != window.display_name:
+        window.display_name = decided_name
+    return decided_name
+
+def process_frame_for_recognition(img, face_cascade, state: Optional[RecognitionState] = None, frame=None):
+    """Process a frame for face recognition and return the processed frame.
+
+    Results are published as the camera's overlay (RecognitionState.overlay),
+    which viewers draw client-side. When ``frame`` (a frame_store.Frame) is
+    given, detection runs on a reduced grayscale decode of its JPEG and
+    ``img`` may be None; a given ``img`` gets the overlay drawn into it.
+    """
+    global pred_buffer, time_buffer
+    if state is None:
+        state = recognition_state
     
     # Use a simple counter for logging control
     if not hasattr(process_frame_for_recognition, 'frame_count'):
@@ -626,114 +1147,104 @@ def process_frame_for_recognition(img, face_cascade):
     process_frame_for_recognition.frame_count += 1
     
     # Validate image before processing
-    if img is None or img.size == 0:
+    if frame is None and (img is None or img.size == 0):
         print("[Face Detection] Invalid image received, skipping processing")
         return img
     
-    # Get image dimensions safely
-    try:
-        height, width = img.shape[:2]
-    except:
-        print("[Face Detection] Error getting image dimensions")
-        return img
-    
     # Enhanced face detection with better parameters for low-quality video
+    now = time.time()
+    faces = []
+    state.scheduler.begin(now)
+    started = time.thread_time()  # CPU of this thread only: other cameras and requests are not billed
+    submitted = False
     try:
-        gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
-        # Use more sensitive parameters for low-quality video
-        faces_rects = face_cascade.detectMultiScale(
-            gray, 
-            scaleFactor=1.05,  # More sensitive scaling
-            minNeighbors=3,    # Fewer neighbors required
-            minSize=(60, 60),  # Larger minimum face size
-            maxSize=(300, 300) # Maximum face size
-        )
+        if frame is not None:
+            # The motion gate looks at a 1/8 decode before anything larger is decoded
+            if state.motion is not None:
+                tiny = frame.gray(8)
+                if tiny is None:
+                    print("[Face Detection] Could not decode frame, skipping processing")
+                    return img
+                if not state.motion.should_detect(tiny):
+                    return img
+            pool = _get_recognition_pool() if img is None else None
+            if pool is not None:
+                # Detection and prediction run in a worker process; _apply_pool_result updates state
+                submitted = True
+                pool.submit(frame, state, state.tracker.plan(now))
+                return img
+            small = frame.gray(DETECTION_SCALE)
+            if small is None:
+                print("[Face Detection] Could not decode frame, skipping processing")
+                return img
+            load_gray = lambda: frame.gray(1)
+        else:
+            gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+            small = gray
+            if DETECTION_SCALE > 1:
+                small = cv2.resize(gray, (gray.shape[1] // DETECTION_SCALE, gray.shape[0] // DETECTION_SCALE),
+                                   interpolation=cv2.INTER_AREA)
+            if state.motion is not None and not state.motion.should_detect(small):
+                _draw_overlay(img, state.overlay)
+                return img
+            load_gray = lambda: gray
+        # Full-frame detection only every TRACKER_DETECT_EVERY passes; otherwise tracks are
+        # re-detected around their last box and only faces without a settled identity are predicted
+        plan = state.tracker.plan(now)
+        results = recognize_plan(small, load_gray, face_cascade, face_recognizer, plan, DETECTION_SCALE, FACE_SIZE,
+                                 FACE_MIN_SIZE, FACE_MAX_SIZE, state.quality)
+        if frame is not None:
+            seq, timestamp = frame.seq, frame.timestamp
+            size = (small.shape[1] * DETECTION_SCALE, small.shape[0] * DETECTION_SCALE)
+        else:
+            seq, timestamp, size = 0, now, (img.shape[1], img.shape[0])
+        faces = _apply_tracking(state, plan, results, now, seq, timestamp, size)
     except Exception as e:
-        print(f"[Face Detection] Error in face detection: {e}")
-        faces_rects = []
+        print(f"[Face Detection] Error in face recognition: {e}")
+    finally:
+        if not submitted:
+            # Pool passes are accounted when their result comes back
+            state.scheduler.record(time.thread_time() - started, len(faces), _motion_seen(state))
     
-    if len(faces_rects) > 0:
+    if len(faces) > 0:
         # Reduced logging for performance
         if process_frame_for_recognition.frame_count % 100 == 0:
-            print(f"[Face Detection] Found {len(faces_rects)} face(s) in frame")
-        
-        for (x, y, w, h) in faces_rects:
-            # Always draw rectangle first
-            cv2.rectangle(img, (x, y), (x+w, y+h), (255, 0, 0), 2)
-            
-            # Perform face recognition if model is available
-            if face_recognizer is not None:
-                try:
-                    roi = gray[y:y+h, x:x+w]
-                    roi_resized = cv2.resize(roi, FACE_SIZE)
-                    label_id, confidence = face_recognizer.predict(roi_resized)
-                    name = label_map.get(label_id, "Unknown")
-                    
-                    # Better confidence handling for low-quality video
-                    # Debounce and require short consistency before switching
-                    if confidence < CONFIDENCE_THRESHOLD:
-                        pred_this_frame = name
-                    else:
-                        pred_this_frame = "Unknown"
-                    
-                    # Color coding: Green for recognized, Red for unknown
-                    # Stabilize identity decision using short-term window and cooldown
-                    decided_name = _stabilize_identity(pred_this_frame)
-
-                    if decided_name != "Unknown":
-                        color = (0, 255, 0)
-                        cv2.rectangle(img, (x, y), (x+w, y+h), color, 2)
-                        cv2.putText(img, f"{decided_name} ({confidence:.1f})", (x, y-5),
-                                   cv2.FONT_HERSHEY_SIMPLEX, 0.6, color, 2)
-                        if decided_name != display_name:
-                            display_name = decided_name
-                            mark_attendance_from_recognition(display_name)
-                    else:
-                        color = (0, 0, 255)
-                        cv2.rectangle(img, (x, y), (x+w, y+h), color, 2)
-                        cv2.putText(img, f"Unknown ({confidence:.1f})", (x, y-5),
-                                   cv2.FONT_HERSHEY_SIMPLEX, 0.6, color, 2)
-                        
-                except Exception as e:
-                    print(f"[Recognition Error] {e}")
-                    cv2.putText(img, "Unknown", (x, y-5), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 0, 0), 2)
-            else:
-                cv2.putText(img, "Face Detected", (x, y-5), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 0), 2)
+            print(f"[Face Detection] Tracking {len(faces)} face(s) in frame")
     else:
         # Reduced logging for performance
         if process_frame_for_recognition.frame_count % 200 == 0:
             print("[Face Detection] No faces detected in frame")
     
-    # Add status text overlay
-    cv2.putText(img, f"Status: {display_name}", (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 255), 2)
+    if img is not None:
+        _draw_overlay(img, state.overlay)
     
     return img
 
-def _stabilize_identity(candidate_name: str) -> str:
+def _stabilize_identity(candidate_name: str, state: IdentityWindow) -> str:
     """Stabilize identity by requiring short agreement window and cooldown."""
-    global recognition_recent_names, recognition_last_change_time, recognition_last_seen_time, display_name
     now = time.time()
+    display_name = state.display_name
 
     # Record latest candidate
-    recognition_recent_names.append(candidate_name)
-    recognition_last_seen_time = now
+    state.recent_names.append(candidate_name)
+    state.last_seen_time = now
 
     # If the current display_name keeps appearing, keep it unless strong contradiction
-    if display_name != "Waiting..." and display_name in recognition_recent_names:
+    if display_name != "Waiting..." and display_name in state.recent_names:
         # Only allow change after cooldown
-        if now - recognition_last_change_time < NAME_UPDATE_COOLDOWN_SEC:
+        if now - state.last_change_time < NAME_UPDATE_COOLDOWN_SEC:
             return display_name
 
     # Require the new candidate to appear at least NAME_WINDOW_MIN_COUNT times in window
-    if candidate_name != "Unknown" and recognition_recent_names.count(candidate_name) >= NAME_WINDOW_MIN_COUNT:
+    if candidate_name != "Unknown" and state.recent_names.count(candidate_name) >= NAME_WINDOW_MIN_COUNT:
         if candidate_name != display_name:
-            recognition_last_change_time = now
+            state.last_change_time = now
         return candidate_name
 
     # If we see mostly unknown for a while, allow reset to Unknown
-    if recognition_recent_names.count("Unknown") >= NAME_WINDOW_MIN_COUNT and (now - recognition_last_change_time) > UNKNOWN_RESET_TIMEOUT_SEC:
+    if state.recent_names.count("Unknown") >= NAME_WINDOW_MIN_COUNT and (now - state.last_change_time) > UNKNOWN_RESET_TIMEOUT_SEC:
         if display_name != "Unknown":
-            recognition_last_change_time = now
+            state.last_change_time = now
         return "Unknown"
 
     # Default: keep current name to avoid flicker
@@ -741,6 +1252,13 @@ def _stabilize_identity(candidate_name: str) -> str:
 
 def mark_attendance_from_recognition(username):
     """Mark attendance when a person is recognized"""
+    mark_attendance_batch([username])
+
+def mark_attendance_batch(usernames):
+    """Mark attendance for everyone recognized in one frame with a single query and commit"""
+    usernames = list(dict.fromkeys(usernames))
+    if not usernames:
+        return []
     try:
         conn = sqlite3.connect('./instance/User.db')
         cursor = conn.cursor()
@@ -748,34 +1266,37 @@ def mark_attendance_from_recognition(username):
         today = date.today()
         current_time = datetime.now()
         
-        # Check if attendance already marked today
-        cursor.execute('''
-            SELECT id FROM attendance 
-            WHERE user_name = ? AND date = ?
-        ''', (username, today))
+        # Check who already has attendance marked today
+        placeholders = ','.join('?' * len(usernames))
+        cursor.execute(f'''
+            SELECT user_name FROM attendance 
+            WHERE date = ? AND user_name IN ({placeholders})
+        ''', (today, *usernames))
         
-        existing = cursor.fetchone()
+        existing = {row[0] for row in cursor.fetchall()}
+        marked = [username for username in usernames if username not in existing]
         
-        if not existing:
+        if marked:
             # Mark new attendance
-            cursor.execute('''
+            cursor.executemany('''
                 INSERT INTO attendance (user_name, date, time_in, timestamp)
                 VALUES (?, ?, ?, ?)
-            ''', (username, today, current_time, current_time))
+            ''', [(username, today, current_time, current_time) for username in marked])
             
             conn.commit()
-            print(f"[Attendance] Marked attendance for {username} at {current_time}")
-            
-            # Send serial command to Arduino
+        
+        conn.close()
+        
+        for username in marked:
             print(f"[Attendance] Marked attendance for {username} at {current_time}")
             
             # Send serial command to Arduino
             send_serial_command(f"ATTENDANCE:{username}")
-        
-        conn.close()
+        return marked
         
     except Exception as e:
         print(f"[Attendance Error] {e}")
+        return []
 
 def send_serial_command(command):
     """Send command to Arduino via serial"""
@@ -1335,6 +1856,87 @@ def admin_streaming_settings():
                          stream_fps=STREAM_FPS, 
                          frame_age_threshold=STREAM_FRAME_AGE_THRESHOLD)
 
+@app.route('/admin/cameras', methods=['GET', 'POST'])
+@login_required
+def admin_cameras():
+    """Admin page to register and manage ESP32-CAM cameras"""
+    if not current_user.is_admin():
+        flash('Access denied', 'error')
+        return redirect(url_for('index'))
+
+    if request.method == 'POST':
+        name = request.form.get('name', '').strip()
+        host = request.form.get('host', '').strip()
+        if not name or not host:
+            flash('Camera name and host are required', 'error')
+            return redirect(url_for('admin_cameras'))
+        if Camera.query.filter_by(name=name).first():
+            flash('A camera with that name already exists', 'error')
+            return redirect(url_for('admin_cameras'))
+        try:
+            interval = float(request.form.get('recognition_interval') or 0.1)
+        except ValueError:
+            flash('Invalid recognition interval', 'error')
+            return redirect(url_for('admin_cameras'))
+        camera = Camera(
+            name=name,
+            host=host,
+            stream_url=request.form.get('stream_url', '').strip() or None,
+            location=request.form.get('location', '').strip() or None,
+            enabled=bool(request.form.get('enabled')),
+            recognition_enabled=bool(request.form.get('recognition_enabled')),
+            recognition_interval=min(max(interval, 0.02), 10.0)
+        )
+        db.session.add(camera)
+        db.session.commit()
+        if camera.enabled:
+            get_camera_worker(camera.id)
+        flash(f'Camera {name} added', 'success')
+        return redirect(url_for('admin_cameras'))
+
+    cameras = Camera.query.order_by(Camera.id.asc()).all()
+    return render_template('admin_cameras.html', cameras=cameras)
+
+@app.route('/admin/cameras/<int:camera_id>/update', methods=['POST'])
+@login_required
+def update_camera(camera_id: int):
+    if not current_user.is_admin():
+        flash('Access denied', 'error')
+        return redirect(url_for('index'))
+    camera = Camera.query.get_or_404(camera_id)
+    try:
+        camera.host = request.form.get('host', camera.host).strip() or camera.host
+        camera.stream_url = request.form.get('stream_url', '').strip() or None
+        camera.location = request.form.get('location', '').strip() or None
+        camera.enabled = bool(request.form.get('enabled'))
+        camera.recognition_enabled = bool(request.form.get('recognition_enabled'))
+        interval = float(request.form.get('recognition_interval') or camera.recognition_interval or 0.1)
+        camera.recognition_interval = min(max(interval, 0.02), 10.0)
+        db.session.commit()
+    except ValueError:
+        db.session.rollback()
+        flash('Invalid recognition interval', 'error')
+        return redirect(url_for('admin_cameras'))
+    # Restart the worker so it picks up the new settings
+    stop_camera_worker(camera.id)
+    if camera.enabled:
+        get_camera_worker(camera.id)
+    flash(f'Camera {camera.name} updated', 'success')
+    return redirect(url_for('admin_cameras'))
+
+@app.route('/admin/cameras/<int:camera_id>/delete', methods=['POST'])
+@login_required
+def delete_camera(camera_id: int):
+    if not current_user.is_admin():
+        flash('Access denied', 'error')
+        return redirect(url_for('index'))
+    camera = Camera.query.get_or_404(camera_id)
+    stop_camera_worker(camera.id)
+    db.session.delete(camera)
+    db.session.commit()
+    flash(f'Camera {camera.name} deleted', 'success')
+    return redirect(url_for('admin_cameras'))
+
 @app.route('/admin/holidays', methods=['GET', 'POST'])
 @login_required
 def admin_holidays():
@@ -1859,57 +2461,438 @@ def facial_recognition_page():
         flash('Access denied', 'error')
         return redirect(url_for('index'))
     
-    return render_template('facial_recognition.html')
+    return render_template('facial_recognition.html', ws_stream_enabled=sock is not None)
 
 @app.route('/video_feed')
 @login_required
 def video_feed():
-    """Minimal, smooth MJPEG stream using shared OpenCV capture."""
+    """Minimal, smooth MJPEG stream of the default camera via the capture hub."""
     if not (current_user.is_admin() or current_user.is_teacher()):
         return jsonify({'error': 'Access denied'}), 403
-    _ensure_basic_capture_started()
+    _ensure_default_pipeline()
+    return Response(_camera_mjpeg_stream(ESP32_STREAM_URL, _new_viewer('video_feed')), mimetype='multipart/x-mixed-replace; boundary=frame')
 
-    def gen():
-        boundary = b'--frame\r\n'
-        headers = b'Content-Type: image/jpeg\r\n\r\n'
-        while True:
-            with basic_frame_lock:
-                data = basic_frame
-            if data:
-                yield boundary
-                yield headers
-                yield data
-                yield b'\r\n'
-            time.sleep(0.03)
+@app.route('/video_feed/<int:camera_id>')
+@login_required
+def camera_video_feed(camera_id: int):
+    """MJPEG stream of one registered camera."""
+    if not (current_user.is_admin() or current_user.is_teacher()):
+        return jsonify({'error': 'Access denied'}), 403
+    url = _registered_camera_url(camera_id)
+    if url is None:
+        return jsonify({'error': 'Camera not found or disabled'}), 404
+    return Response(_camera_mjpeg_stream(url, _new_viewer(f'video_feed/{camera_id}'), camera_id), mimetype='multipart/x-mixed-replace; boundary=frame')
+
+SNAPSHOT_MAX_WAIT_SEC = 20.0  # long-poll cap, below the Render proxy's 30 s upstream timeout
+SNAPSHOT_STALE_SEC = 2.0  # older cached frames wait briefly for the upstream to (re)open
+_snapshot_epoch = format(int(time.time()), 'x')  # keeps ETags from matching across restarts
+
+def _camera_url(camera: str) -> Optional[str]:
+    """Map a /snapshot or /ws/stream camera name to its capture hub stream URL."""
+    if camera == 'default':
+        _ensure_default_pipeline()
+        return ESP32_STREAM_URL
+    if camera == 'direct':
+        return _direct_stream_url()
+    if camera.isdigit():
+        return _registered_camera_url(int(camera))
+    return None
 
-    return Response(gen(), mimetype='multipart/x-mixed-replace; boundary=frame')
+@app.route('/snapshot/<camera>')
+@login_required
+def snapshot(camera):
+    """Latest cached JPEG of a camera ('default', 'direct' or a registered camera id).
+
+    The ETag is the frame sequence number, so ``If-None-Match`` answers 304
+    until a new frame arrives. ``?since=<seq>`` long-polls until a frame newer
+    than ``seq`` is published (at most ``?timeout=`` seconds, 304 otherwise).
+    """
+    if not (current_user.is_admin() or current_user.is_teacher()):
+        return jsonify({'error': 'Access denied'}), 403
+    url = _camera_url(camera)
+    if url is None:
+        return jsonify({'error': 'Camera not found or disabled'}), 404
+
+    since = request.args.get('since', type=int)
+    # Polling keeps the upstream open; it closes once polls stop for the hub's linger time
+    camera_key = 'default' if camera == 'direct' else camera
+    with _frame_source(url, camera_key, 'snapshot') as slot:
+        if since is not None:
+            timeout = min(max(request.args.get('timeout', SNAPSHOT_MAX_WAIT_SEC, type=float), 0.0), SNAPSHOT_MAX_WAIT_SEC)
+            frame = slot.wait_newer(since, timeout=timeout) or slot.latest()
+        else:
+            frame = slot.latest()
+            if frame is None or time.time() - frame.timestamp > SNAPSHOT_STALE_SEC:
+                frame = slot.wait_newer(slot.seq, timeout=SNAPSHOT_STALE_SEC) or frame
+    if frame is None:
+        return jsonify({'error': 'No frame available yet'}), 503
+
+    etag = f'{_snapshot_epoch}-{frame.seq}'
+    not_modified = request.if_none_match.contains(etag) or (since is not None and frame.seq <= since)
+    response = Response(status=304) if not_modified else Response(frame.jpeg, mimetype='image/jpeg')
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Frame-Seq'] = str(frame.seq)
+    response.headers['X-Frame-Timestamp'] = f'{frame.timestamp:.3f}'
+    return response
+
+@app.route('/recognition_overlay/<camera>')
+@login_required
+def recognition_overlay(camera):
+    """Latest recognition overlay of a camera as JSON, for drawing boxes client-side.
+
+    ``{'version', 'seq', 'timestamp', 'width', 'height', 'person', 'faces'}``
+    where each face is ``{'track', 'box': [x, y, w, h], 'name', 'confidence',
+    'recognized'}`` in pixels of the full-size frame ``seq``. ``?since=<version>``
+    long-polls until a different version is published (at most ``?timeout=``
+    seconds, then the current overlay is returned).
+    """
+    if not (current_user.is_admin() or current_user.is_teacher()):
+        return jsonify({'error': 'Access denied'}), 403
+    camera_key = 'default' if camera == 'direct' else camera
+    if camera_key != 'default' and not camera_key.isdigit():
+        return jsonify({'error': 'Camera not found'}), 404
+
+    since = request.args.get('since', type=int)
+    overlay, data = _current_overlay(camera_key)
+    if since is not None and (overlay is None or overlay['version'] == since):
+        timeout = min(max(request.args.get('timeout', SNAPSHOT_MAX_WAIT_SEC, type=float), 0.0), SNAPSHOT_MAX_WAIT_SEC)
+        state = _recognition_state_for(camera_key) if FRAME_BUS_MODE != 'attach' else None
+        if state is not None:
+            with state.overlay_cond:
+                state.overlay_cond.wait_for(lambda: state.overlay['version'] != since, timeout=timeout)
+        else:
+            # Attached worker (or camera not running here): poll the published status
+            deadline = time.time() + timeout
+            while time.time() < deadline and (overlay is None or overlay['version'] == since):
+                time.sleep(OVERLAY_BUS_CACHE_SEC)
+                overlay, data = _current_overlay(camera_key)
+        overlay, data = _current_overlay(camera_key)
+    response = Response(data, mimetype='application/json')
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+def _parse_time_arg(value: Optional[str]) -> Optional[float]:
+    """Unix seconds or an ISO 8601 local time ('2024-03-01T09:15:00')"""
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    try:
+        return datetime.fromisoformat(value).timestamp()
+    except ValueError:
+        return None
+
+@app.route('/recordings/<camera>')
+@login_required
+def recordings(camera):
+    """Recorded footage of a camera ('default' or a camera id).
+
+    Without ``from`` the recorded segments are listed as JSON. With
+    ``?from=&to=`` (unix seconds or ISO time) the range is served as MJPEG,
+    paced at ``?speed=`` times real time (0 = as fast as possible).
+    """
+    if not (current_user.is_admin() or current_user.is_teacher()):
+        return jsonify({'error': 'Access denied'}), 403
+    directory = _recording_dir(camera)
+    if not os.path.isdir(directory):
+        return jsonify({'error': 'No recordings for this camera'}), 404
+
+    start = _parse_time_arg(request.args.get('from'))
+    if start is None:
+        if request.args.get('from'):
+            return jsonify({'error': 'Invalid from time'}), 400
+        with recorders_lock:
+            recorder = recorders.get(str(camera))
+        return jsonify({'camera': camera,
+                        'segments': [seg.to_dict() for seg in list_segments(directory)],
+                        'recorder': recorder.stats() if recorder is not None else None})
+    end = _parse_time_arg(request.args.get('to'))
+    if end is None:
+        if request.args.get('to'):
+            return jsonify({'error': 'Invalid to time'}), 400
+        end = time.time()
+    if end < start:
+        return jsonify({'error': 'to must not be before from'}), 400
+    speed = max(request.args.get('speed', 1.0, type=float), 0.0)
+
+    def generate():
+        last_ts = None
+        last_sent = 0.0
+        for ts, jpeg in iter_range(directory, start, end):
+            if speed and last_ts is not None:
+                # Gaps in the recording are collapsed to at most one second
+                delay = min((ts - last_ts) / speed, 1.0) - (time.time() - last_sent)
+                if delay > 0:
+                    time.sleep(delay)
+            last_ts = ts
+            yield (b'--frame\r\nContent-Type: image/jpeg\r\n'
+                   b'X-Timestamp: ' + f'{ts:.3f}'.encode() + b'\r\n\r\n' + jpeg + b'\r\n')
+            last_sent = time.time()
+
+    return Response(generate(), mimetype='multipart/x-mixed-replace; boundary=frame')
+
+@app.route('/camera_status')
+@login_required
+def camera_status():
+    """Health of every registered camera worker"""
+    if not (current_user.is_admin() or current_user.is_teacher()):
+        return jsonify({'error': 'Access denied'}), 403
+    cameras = []
+    # Attached web workers report the health the capture owner published
+    bus_status = (_bus_status() or {}) if FRAME_BUS_MODE == 'attach' else {}
+    published = bus_status.get('cameras', {})
+    for camera in Camera.query.order_by(Camera.id.asc()).all():
+        with camera_workers_lock:
+            worker = camera_workers.get(camera.id)
+        if worker is not None:
+            info = worker.health()
+        elif str(camera.id) in published:
+            info = published[str(camera.id)]
+        else:
+            info = {'camera_id': camera.id, 'name': camera.name, 'stream_url': camera.get_stream_url(),
+                    'active': False, 'status': 'disabled' if not camera.enabled else 'stopped'}
+        info['location'] = camera.location
+        cameras.append(info)
+    return jsonify({'cameras': cameras, 'capture_hub': capture_hub.stats(), 'ingest': ingest_engine.stats(),
+                    'frame_bus': {'mode': FRAME_BUS_MODE, 'rings': frame_bus.stats() if frame_bus is not None else None,
+                                  'status': frame_bus.status_stats() if frame_bus is not None
+                                  else bus_status.get('status_board')}})
+
+VIEWER_KEEPALIVE_SEC = 5.0  # re-send the last frame this often when the camera stalls
+
+class ViewerStats:
+    """Send-side statistics for one connected MJPEG viewer."""
+    def __init__(self, stream: str, user: str, remote_addr: str, max_fps: float = 0.0,
+                 variant: str = DEFAULT_VARIANT):
+        self.id = next(_viewer_ids)
+        self.stream = stream
+        self.variant = variant
+        self.user = user
+        self.remote_addr = remote_addr
+        self.max_fps = max_fps
+        self.connected_at = time.time()
+        self.frames_sent = 0
+        self.frames_dropped = 0  # newer frames skipped because the client was still busy
+        self.bytes_sent = 0
+        self.bytes_per_sec = 0.0
+        self.send_fps = 0.0
+        self.lag_ms = 0.0  # publish-to-sent latency of the last frame
+        self._last_sent = 0.0
+
+    def record(self, frame, size: int, skipped: int):
+        now = time.time()
+        self.frames_sent += 1
+        self.frames_dropped += max(skipped, 0)
+        self.bytes_sent += size
+        self.lag_ms = (now - frame.timestamp) * 1000
+        if self._last_sent:
+            dt = max(now - self._last_sent, 1e-3)
+            self.bytes_per_sec = 0.8 * self.bytes_per_sec + 0.2 * size / dt
+            self.send_fps = 0.8 * self.send_fps + 0.2 / dt
+        self._last_sent = now
+
+    def to_dict(self) -> dict:
+        return {
+            'id': self.id,
+            'stream': self.stream,
+            'variant': self.variant,
+            'user': self.user,
+            'remote_addr': self.remote_addr,
+            'connected_seconds': round(time.time() - self.connected_at, 1),
+            'max_fps': self.max_fps or None,
+            'frames_sent': self.frames_sent,
+            'frames_dropped': self.frames_dropped,
+            'bytes_sent': self.bytes_sent,
+            'bytes_per_sec': int(self.bytes_per_sec),
+            'send_fps': round(self.send_fps, 1),
+            'lag_ms': round(self.lag_ms, 1)
+        }
+
+_viewer_ids = itertools.count(1)
+active_viewers = {}  # viewer id -> ViewerStats
+active_viewers_lock = threading.Lock()
+
+def _new_viewer(stream: str) -> ViewerStats:
+    """Register a viewer for the current request (call inside the route)."""
+    try:
+        max_fps = max(float(request.args.get('max_fps', 0) or 0), 0.0)
+    except ValueError:
+        max_fps = 0.0
+    variant = request.args.get('variant', DEFAULT_VARIANT)
+    if variant not in JPEG_VARIANTS:
+        variant = DEFAULT_VARIANT
+    viewer = ViewerStats(stream, current_user.username, request.headers.get('CF-Connecting-IP') or request.remote_addr,
+                         max_fps, variant)
+    with active_viewers_lock:
+        active_viewers[viewer.id] = viewer
+    return viewer
+
+def _camera_mjpeg_stream(url: str, viewer: Optional[ViewerStats] = None, camera_key='default'):
+    """Yield each new frame of a camera exactly once as a multipart MJPEG part.
+
+    The viewer holds a capture hub reference on ``url`` while connected, so
+    every endpoint watching the same camera shares one upstream (with
+    FRAME_BUS_MODE=attach it reads ring ``camera_key`` of the capture owner).
+    The generator blocks until the producer publishes a newer sequence number,
+    so viewers get frames as soon as they arrive and never receive duplicates.
+    A slow client always jumps to the newest frame when it is ready again;
+    older frames are never queued for it. Reduced-size variants are encoded
+    lazily and memoized on the frame, so each is encoded at most once per
+    source frame and only while someone is watching it.
+
+    Every part carries ``X-Frame-Seq``, ``X-Timestamp`` and ``X-Overlay`` (the
+    camera's latest recognition overlay as JSON, see /recognition_overlay)
+    headers, so the JPEG itself is passed through without drawing into it.
+    """
+    boundary = b'--frame\r\n'
+    min_interval = 1.0 / viewer.max_fps if viewer is not None and viewer.max_fps else 0.0
+    variant = viewer.variant if viewer is not None else DEFAULT_VARIANT
+    last_seq = 0
+    last = None
+    next_send = 0.0
+    consumer = viewer.stream if viewer is not None else 'viewer'
+    try:
+        with _frame_source(url, camera_key, consumer) as slot:
+            slot.subscribe(variant)
+            try:
+                while True:
+                    if min_interval:
+                        wait = next_send - time.time()
+                        if wait > 0:
+                            time.sleep(wait)
+                    frame = slot.wait_newer(last_seq, timeout=VIEWER_KEEPALIVE_SEC)
+                    if frame is None:
+                        # Stalled camera: repeat the last frame so dead clients get noticed
+                        frame = last
+                        if frame is None:
+                            continue
+                        skipped = 0
+                    else:
+                        skipped = frame.seq - last_seq - 1 if last_seq else 0
+                    last_seq = frame.seq
+                    last = frame
+                    next_send = time.time() + min_interval
+                    data = frame.variant(variant)
+                    if data:
+                        yield boundary
+                        yield (b'Content-Type: image/jpeg\r\nX-Frame-Seq: %d\r\nX-Timestamp: %.3f\r\nX-Overlay: %s\r\n\r\n'
+                               % (frame.seq, frame.timestamp, _current_overlay(camera_key)[1]))
+                        yield data
+                        yield b'\r\n'
+                        # The WSGI server has written the part once the yields return
+                        if viewer is not None:
+                            viewer.record(frame, len(data), skipped)
+            finally:
+                slot.unsubscribe(variant)
+    finally:
+        if viewer is not None:
+            with active_viewers_lock:
+                active_viewers.pop(viewer.id, None)
+
+# ---------- WEBSOCKET FRAME PUSH ----------
+# Binary message: header, overlay metadata JSON, then the JPEG
+WS_FRAME_HEADER = struct.Struct('<BBHId')  # version, flags, metadata length, frame seq, timestamp
+WS_PROTOCOL_VERSION = 1
+WS_MAX_CREDITS = 8        # frames a client may have in flight
+WS_IDLE_WAIT_SEC = 5.0    # receive timeout while the client holds no credit
+WS_FRAME_WAIT_SEC = 1.0   # frame wait per loop, so credit messages keep being read
+
+def _overlay_metadata(camera_key) -> dict:
+    """Recognition overlay for a camera, sent in the header of every pushed frame"""
+    overlay, _ = _current_overlay(camera_key)
+    return {'camera': str(camera_key), 'person': overlay['person'] if overlay else None, 'overlay': overlay}
+
+def _apply_ws_message(message, credits: int) -> int:
+    """Credit/ack flow control: {"credit": n} grants n frames, {"ack": seq} returns one"""
+    try:
+        msg = json.loads(message)
+        if isinstance(msg, dict):
+            credits += int(msg.get('credit', 0))
+            if 'ack' in msg:
+                credits += 1
+    except (TypeError, ValueError):
+        pass
+    return max(0, min(credits, WS_MAX_CREDITS))
+
+def _push_frames(ws, url: str, camera_key, viewer: ViewerStats):
+    """Send each new frame as one binary WebSocket message, only while the client has credit.
+
+    A client that stops acknowledging simply stops receiving; when it grants
+    credit again it gets the newest frame, never a backlog.
+    """
+    variant = viewer.variant
+    min_interval = 1.0 / viewer.max_fps if viewer.max_fps else 0.0
+    credits = 0
+    last_seq = 0
+    next_send = 0.0
+    try:
+        with _frame_source(url, camera_key, viewer.stream) as slot:
+            slot.subscribe(variant)
+            try:
+                while True:
+                    # Without credit block on the client, otherwise only drain what it sent
+                    message = ws.receive(timeout=0 if credits else WS_IDLE_WAIT_SEC)
+                    while message is not None:
+                        credits = _apply_ws_message(message, credits)
+                        message = ws.receive(timeout=0)
+                    if not credits:
+                        continue
+                    if min_interval:
+                        wait = next_send - time.time()
+                        if wait > 0:
+                            time.sleep(wait)
+                    frame = slot.wait_newer(last_seq, timeout=WS_FRAME_WAIT_SEC)
+                    if frame is None:
+                        continue
+                    skipped = frame.seq - last_seq - 1 if last_seq else 0
+                    last_seq = frame.seq
+                    next_send = time.time() + min_interval
+                    data = frame.variant(variant)
+                    if not data:
+                        continue
+                    meta = json.dumps(_overlay_metadata(camera_key)).encode()
+                    ws.send(WS_FRAME_HEADER.pack(WS_PROTOCOL_VERSION, 0, len(meta), frame.seq & 0xFFFFFFFF,
+                                                 frame.timestamp) + meta + data)
+                    credits -= 1
+                    viewer.record(frame, len(data), skipped)
+            finally:
+                slot.unsubscribe(variant)
+    finally:
+        with active_viewers_lock:
+            active_viewers.pop(viewer.id, None)
+
+if Sock is not None:
+    app.config.setdefault('SOCK_SERVER_OPTIONS', {'ping_interval': 25})  # detect dead clients
+    sock = Sock(app)
+
+    @sock.route('/ws/stream/<camera>')
+    def ws_stream(ws, camera):
+        """Push frames of 'default', 'direct' or a camera id over a WebSocket (see _push_frames)."""
+        if not current_user.is_authenticated or not (current_user.is_admin() or current_user.is_teacher()):
+            ws.close(1008, 'Access denied')
+            return
+        url = _camera_url(camera)
+        if url is None:
+            ws.close(1008, 'Camera not found or disabled')
+            return
+        _push_frames(ws, url, 'default' if camera == 'direct' else camera, _new_viewer(f'ws/{camera}'))
+else:
+    sock = None
 
 @app.route('/video_direct')
 @login_required
 def video_direct():
-    """Low-latency MJPEG using a single OpenCV capture for multiple clients."""
+    """Low-latency MJPEG of the best ESP32 stream URL, shared through the capture hub."""
     if not (current_user.is_admin() or current_user.is_teacher()):
         return jsonify({'error': 'Access denied'}), 403
 
     # Prefer ESP32 port 81 if desired; fallback to default STREAM_URL
-    start_fast_capture(None)
-
-    def gen():
-        boundary = b'--frame\r\n'
-        headers = b'Content-Type: image/jpeg\r\n\r\n'
-        # simple pacing using configured stream FPS
-        delay = 1.0 / max(STREAM_FPS, 1)
-        while True:
-            with fast_capture_lock:
-                data = fast_capture_frame
-            if data:
-                yield boundary
-                yield headers
-                yield data
-                yield b'\r\n'
-            time.sleep(delay)
+    url = _direct_stream_url()
 
-    return Response(gen(), mimetype='multipart/x-mixed-replace; boundary=frame')
+    return Response(_camera_mjpeg_stream(url, _new_viewer('video_direct')), mimetype='multipart/x-mixed-replace; boundary=frame')
 
 @app.route('/basic_stream')
 @login_required
@@ -1917,7 +2900,7 @@ def basic_stream():
     if not (current_user.is_admin() or current_user.is_teacher()):
         flash('Access denied', 'error')
         return redirect(url_for('index'))
-    _ensure_basic_capture_started()
+    _ensure_default_pipeline()
     html = """
     <!DOCTYPE html>
     <html><head><meta name=viewport content="width=device-width, initial-scale=1" />
@@ -1932,73 +2915,102 @@ def basic_stream():
 def smooth_status():
     if not (current_user.is_admin() or current_user.is_teacher()):
         return jsonify({'error': 'Access denied'}), 403
-    with fast_capture_lock:
-        has_frame = fast_capture_frame is not None
-        ts = fast_capture_timestamp
+    url = _direct_stream_url()
+    frame = capture_hub.slot(url).latest()
+    has_frame = frame is not None
+    ts = frame.timestamp if frame is not None else 0.0
     return jsonify({
-        'active': fast_capture_active,
-        'url': fast_capture_url,
+        'active': capture_hub.is_running(url),
+        'url': url,
         'has_frame': has_frame,
         'age_ms': int((time.time() - ts) * 1000) if ts else None
     })
 
+_placeholder_frames = {}
+
+def _placeholder_frame(text: str):
+    """Static 'waiting' frame, built once per message and reused by every viewer."""
+    frame = _placeholder_frames.get(text)
+    if frame is None:
+        frame = np.zeros((480, 640, 3), dtype=np.uint8)
+        cv2.putText(frame, text, (50, 240), cv2.FONT_HERSHEY_SIMPLEX, 1, (255, 255, 255), 2)
+        frame.flags.writeable = False
+        _placeholder_frames[text] = frame
+    return frame
+
+@app.route('/admin/viewer_status')
+@login_required
+def viewer_status():
+    """Per-connection stats of every connected MJPEG viewer"""
+    if not current_user.is_admin():
+        return jsonify({'error': 'Access denied'}), 403
+    with active_viewers_lock:
+        viewers = [v.to_dict() for v in active_viewers.values()]
+    with camera_workers_lock:
+        workers = list(camera_workers.values())
+    subscriptions = {'video_feed': dict(basic_slot.subscribers),
+                     'video_direct': dict(capture_hub.slot(_direct_stream_url()).subscribers)}
+    for w in workers:
+        subscriptions[f'video_feed/{w.camera_id}'] = dict(w.slot.subscribers)
+    return jsonify({
+        'viewer_count': len(viewers),
+        'variant_subscriptions': subscriptions,
+        'total_bytes_per_sec': sum(v['bytes_per_sec'] for v in viewers),
+        'total_frames_dropped': sum(v['frames_dropped'] for v in viewers),
+        'viewers': viewers
+    })
+
 def generate_frames():
     """Generate video frames from the buffered stream for multiple users"""
-    global current_frame
     print("[Streaming] generate_frames() started - serving frames to browser")
     frame_count = 0
-    last_good_frame = None
+    last_good_seq = 0
     last_frame_time = time.time()
     
     while True:
-        current_time = time.time()
-        
-        # Get the latest frame efficiently
-        with frame_lock:
-            if current_frame is not None and current_frame.size > 0 and frame_timestamp > 0:
-                frame_age = current_time - frame_timestamp
-                
-                # Use frame if it's fresh enough, otherwise use cached frame
-                if frame_age <= STREAM_FRAME_AGE_THRESHOLD:
-                    frame = current_frame
-                    last_good_frame = frame.copy() if frame is not None else None
-                    frame_count += 1
-                    
-                    # Minimal logging for performance
-                    if frame_count % 1000 == 0:
-                        print(f"[Streaming] Served {frame_count} frames (age: {frame_age:.3f}s)")
-                else:
-                    # Use cached frame to prevent flickering
-                    if last_good_frame is not None:
-                        frame = last_good_frame
-                        if frame_count % 500 == 0:
-                            print(f"[Streaming] Using cached frame (age: {frame_age:.3f}s)")
-                    else:
-                        # Create minimal placeholder
-                        frame = np.zeros((480, 640, 3), dtype=np.uint8)
-                        cv2.putText(frame, "Initializing stream...", (50, 240), 
-                                   cv2.FONT_HERSHEY_SIMPLEX, 1, (255, 255, 255), 2)
-            else:
-                # Use cached frame while waiting
-                if last_good_frame is not None:
-                    frame = last_good_frame
-                else:
-                    frame = np.zeros((480, 640, 3), dtype=np.uint8)
-                    cv2.putText(frame, "Waiting for ESP32-CAM...", (50, 240), 
-                               cv2.FONT_HERSHEY_SIMPLEX, 1, (255, 255, 255), 2)
-        
         # Strict frame rate limiting to prevent speed up/down
-        time_since_last_frame = current_time - last_frame_time
+        time_since_last_frame = time.time() - last_frame_time
         if time_since_last_frame < STREAM_DELAY:
             time.sleep(STREAM_DELAY - time_since_last_frame)
         
         # Update last frame time
         last_frame_time = time.time()
+        current_time = last_frame_time
+        
+        # Get a read-only view of the latest frame (no per-viewer copies)
+        latest = frame_ring.latest()
+        frame_seq = 0  # ring sequence of the view being encoded (0 = not from the ring)
+        if latest is not None:
+            seq, ts, view = latest
+            frame_age = current_time - ts
+            
+            # Use frame if it's fresh enough, otherwise reuse the last good one
+            if frame_age <= STREAM_FRAME_AGE_THRESHOLD:
+                frame = view
+                frame_seq = last_good_seq = seq
+                frame_count += 1
+                
+                # Minimal logging for performance
+                if frame_count % 1000 == 0:
+                    print(f"[Streaming] Served {frame_count} frames (age: {frame_age:.3f}s)")
+            else:
+                # Last good frame if still resident in the ring, else the newest one
+                frame = frame_ring.get(last_good_seq) if last_good_seq else None
+                frame_seq = last_good_seq
+                if frame is None:
+                    frame, frame_seq = view, seq
+                if frame_count % 500 == 0:
+                    print(f"[Streaming] Using cached frame (age: {frame_age:.3f}s)")
+        else:
+            frame = _placeholder_frame("Waiting for ESP32-CAM...")
         
         # Encode and yield frame
         try:
             if frame is not None and frame.size > 0:
                 ret, buffer = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, 85])
+                # The producer may have overwritten the slot mid-encode; skip a torn frame
+                if ret and frame_seq and not frame_ring.is_resident(frame_seq):
+                    ret = False
                 if ret:
                     frame_data = buffer.tobytes()
                     yield (b'--frame\r\n'
@@ -2218,7 +3230,7 @@ def stream_health():
     if not (current_user.is_admin() or current_user.is_teacher()):
         return jsonify({'error': 'Access denied'}), 403
     
-    global streaming_active, last_frame_time, current_frame, STREAM_FPS, STREAM_FRAME_AGE_THRESHOLD
+    global streaming_active, last_frame_time, STREAM_FPS, STREAM_FRAME_AGE_THRESHOLD
     
     current_time = time.time()
     time_since_last_frame = current_time - last_frame_time
@@ -2227,16 +3239,31 @@ def stream_health():
     health_status = {
         'streaming_active': streaming_active,
         'last_frame_age_seconds': round(frame_age, 2),
-        'current_frame_exists': current_frame is not None and current_frame.size > 0,
-        'buffer_size': frame_buffer.qsize(),
+        'current_frame_exists': frame_ring.seq > 0,
+        'buffer_size': len(frame_ring),
         'system_time': current_time,
         'stream_fps': STREAM_FPS,
         'frame_age_threshold': STREAM_FRAME_AGE_THRESHOLD,
+        'memory': _frame_memory_usage(),
+        'capture_hub': capture_hub.stats(),
+        'reconnect': capture_hub.reconnect_stats(),
         'status': 'healthy' if frame_age < 5.0 else 'degraded' if frame_age < 10.0 else 'unhealthy'
     }
     
     return jsonify(health_status)
 
+def _frame_memory_usage() -> dict:
+    """Bytes held by the frame buffers of every streaming path"""
+    usage = {
+        'frame_ring_bytes': frame_ring.nbytes,
+        'frame_ring_slots': frame_ring.capacity,
+        'frame_ring_reallocations': frame_ring.reallocations,
+        'basic_slot_bytes': basic_slot.nbytes,
+        'capture_slot_bytes': capture_hub.nbytes  # every camera slot, default included
+    }
+    usage['total_bytes'] = usage['frame_ring_bytes'] + usage['capture_slot_bytes']
+    return usage
+
 @app.route('/debug_frame')
 @login_required
 def debug_frame():
@@ -2244,7 +3271,9 @@ def debug_frame():
     if not (current_user.is_admin() or current_user.is_teacher()):
         return jsonify({'error': 'Access denied'}), 403
     
-    global current_frame, frame_buffer, frame_timestamp
+    latest = frame_ring.latest()
+    current_frame = latest[2] if latest is not None else None
+    frame_timestamp = latest[1] if latest is not None else 0
     
     current_time = time.time()
     frame_age = current_time - frame_timestamp if frame_timestamp > 0 else 0
@@ -2253,9 +3282,10 @@ def debug_frame():
         'current_frame_exists': current_frame is not None,
         'current_frame_size': current_frame.size if current_frame is not None else 0,
         'current_frame_shape': str(current_frame.shape) if current_frame is not None else 'None',
+        'frame_seq': frame_ring.seq,
         'frame_age_seconds': round(frame_age, 3),
         'frame_fresh': frame_age < 0.1,  # Updated threshold to match generate_frames
-        'buffer_size': frame_buffer.qsize(),
+        'buffer_size': len(frame_ring),
         'streaming_active': streaming_active,
         'current_time': current_time,
         'frame_timestamp': frame_timestamp,
@@ -2277,15 +3307,15 @@ def test_esp32_connection():
         
         # Test main page on port 80
         try:
-            main_response = requests.get(f"http://{ESP32_IP}/", timeout=5)
+            main_response = requests.get(f"{ESP32_BASE_URL}/", timeout=5)
             test_results['main_page_port80'] = {
-                'url': f"http://{ESP32_IP}/",
+                'url': f"{ESP32_BASE_URL}/",
                 'status': main_response.status_code,
                 'success': main_response.status_code == 200
             }
         except Exception as e:
             test_results['main_page_port80'] = {
-                'url': f"http://{ESP32_IP}/",
+                'url': f"{ESP32_BASE_URL}/",
                 'status': 'error',
                 'success': False,
                 'error': str(e)
@@ -2293,15 +3323,15 @@ def test_esp32_connection():
         
         # Test stream on port 80
         try:
-            stream_response = requests.get(f"http://{ESP32_IP}/stream", timeout=5)
+            stream_response = requests.get(f"{ESP32_BASE_URL}/stream", timeout=5)
             test_results['stream_port80'] = {
-                'url': f"http://{ESP32_IP}/stream",
+                'url': f"{ESP32_BASE_URL}/stream",
                 'status': stream_response.status_code,
                 'success': stream_response.status_code == 200
             }
         except Exception as e:
             test_results['stream_port80'] = {
-                'url': f"http://{ESP32_IP}/stream",
+                'url': f"{ESP32_BASE_URL}/stream",
                 'status': 'error',
                 'success': False,
                 'error': str(e)
@@ -2309,15 +3339,15 @@ def test_esp32_connection():
         
         # Test stream on port 81
         try:
-            stream_response_81 = requests.get(f"http://{ESP32_IP}:81/stream", timeout=5)
+            stream_response_81 = requests.get(f"{ESP32_STREAM_BASE_URL}/stream", timeout=5)
             test_results['stream_port81'] = {
-                'url': f"http://{ESP32_IP}:81/stream",
+                'url': f"{ESP32_STREAM_BASE_URL}/stream",
                 'status': stream_response_81.status_code,
                 'success': stream_response_81.status_code == 200
             }
         except Exception as e:
             test_results['stream_port81'] = {
-                'url': f"http://{ESP32_IP}:81/stream",
+                'url': f"{ESP32_STREAM_BASE_URL}/stream",
                 'status': 'error',
                 'success': False,
                 'error': str(e)
@@ -2325,10 +3355,10 @@ def test_esp32_connection():
         
         # Test alternative endpoints
         alt_endpoints = [
-            f"http://{ESP32_IP}/cam-hi.jpg",
-            f"http://{ESP32_IP}/cam-lo.jpg",
-            f"http://{ESP32_IP}:81/cam-hi.jpg",
-            f"http://{ESP32_IP}:81/cam-lo.jpg"
+            f"{ESP32_BASE_URL}/cam-hi.jpg",
+            f"{ESP32_BASE_URL}/cam-lo.jpg",
+            f"{ESP32_STREAM_BASE_URL}/cam-hi.jpg",
+            f"{ESP32_STREAM_BASE_URL}/cam-lo.jpg"
         ]
         
         for i, url in enumerate(alt_endpoints):
@@ -2391,13 +3421,24 @@ def get_recognition_status():
         return jsonify({'error': 'Access denied'}), 403
     
     try:
-        # Get current recognition info using ESP32-CAM variables
-        current_person = display_name
-        total_faces = len(label_map) if label_map else 0
+        # Attached web workers report what the capture owner published, so every worker agrees
+        status = _bus_status() if FRAME_BUS_MODE == 'attach' else None
+        source = 'frame_bus' if status is not None else 'local'
+        if status is None:
+            status = _recognition_snapshot()
         
         return jsonify({
-            'current_person': current_person,
-            'total_faces_trained': total_faces,
+            'current_person': status['current_person'],
+            'total_faces_trained': status['total_faces_trained'],
+            'motion_gate_enabled': MOTION_GATE_ENABLED,
+            'motion_gate': status['motion_gate'],
+            'tracker': status.get('tracker'),
+            'scheduler': status.get('scheduler'),
+            'opencv_threads': status.get('opencv_threads'),
+            'face_quality_enabled': FACE_QUALITY_ENABLED,
+            'face_quality': status.get('face_quality'),
+            'recognition_pool': status.get('recognition_pool'),
+            'source': source,
             'status': 'active'
         })
     except Exception as e:
@@ -2425,6 +3466,38 @@ def get_attendance_data_by_username(username):
 # db.session.add(admin)
 # db.session.commit()
 
+# ---------- CAPTURE OWNER (multi-process deployments) ----------
+def run_capture_owner():
+    """Capture, record and recognize every camera for web workers running with FRAME_BUS_MODE=attach."""
+    global FRAME_BUS_MODE
+    FRAME_BUS_MODE = 'owner'
+    with app.app_context():
+        try:
+            init_serial()
+        except Exception as e:
+            print(f"[CaptureOwner] Serial initialization failed: {e}")
+        try:
+            if prepare_training_data(DATASET_DIR):
+                print(f"[CaptureOwner] Facial recognition ready! Trained {len(label_map)} people")
+        except Exception as e:
+            print(f"[CaptureOwner] Facial recognition initialization failed: {e}")
+        start_frame_bus()
+    print("[CaptureOwner] Running, press Ctrl+C to stop")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        print("\n[CaptureOwner] Shutting down...")
+    finally:
+        stop_camera_workers()
+        stop_recorder('default', basic_slot)
+        stop_frame_bus()
+        capture_hub.stop_all()
+        stop_recognition_pool()
+        ingest_engine.stop()
+        if ser is not None and ser.is_open:
+            ser.close()
+
 # ---------- RUN ----------
 if __name__ == '__main__':
     try:
@@ -2506,6 +3579,18 @@ if __name__ == '__main__':
                 print(f"[System] Facial recognition initialization failed: {e}")
             
             # Do not start legacy background streaming; minimal capture will start on-demand
+            try:
+                start_camera_workers()
+                print(f"[System] Camera workers started: {len(camera_workers)}")
+            except Exception as e:
+                print(f"[System] Failed to start camera workers: {e}")
+
+            if FRAME_BUS_MODE == 'owner':
+                try:
+                    start_frame_bus()
+                except Exception as e:
+                    print(f"[System] Failed to start frame bus: {e}")
+
             try:
                 # Initialize lab computers if missing
                 existing = Computer.query.count()
@@ -2530,6 +3615,12 @@ if __name__ == '__main__':
     except KeyboardInterrupt:
         print("\n[System] Shutting down...")
         stop_streaming_thread()
+        stop_camera_workers()
+        stop_recorder('default', basic_slot)
+        stop_frame_bus()
+        capture_hub.stop_all()
+        stop_recognition_pool()
+        ingest_engine.stop()
         if ser is not None and ser.is_open:
             ser.close()
             print("[Serial] Arduino serial connection closed.")
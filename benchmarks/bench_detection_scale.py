@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Face detection scale benchmark for UniSync
+Measures decode + Haar cascade latency for each DETECTION_SCALE and how many
+of the full-resolution detections are still found at the reduced scale.
+
+Input is either a directory of JPEG snapshots or a recorded MJPEG stream
+(see bench_mjpeg_parser.py --record):
+    python benchmarks/bench_detection_scale.py captures/
+    python benchmarks/bench_detection_scale.py esp32.mjpeg --scales 1 2 4
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mjpeg_parser import MJPEGStreamParser  # noqa: E402
+from frame_store import GRAY_DECODE_FLAGS  # noqa: E402
+
+FACE_MIN_SIZE = 60
+FACE_MAX_SIZE = 300
+
+
+def load_jpegs(path: str, limit: int):
+    if os.path.isdir(path):
+        names = sorted(n for n in os.listdir(path) if n.lower().endswith(('.jpg', '.jpeg')))
+        jpegs = []
+        for name in names[:limit]:
+            with open(os.path.join(path, name), 'rb') as f:
+                jpegs.append(f.read())
+        return jpegs
+    parser = MJPEGStreamParser()
+    jpegs = []
+    with open(path, 'rb') as f:
+        for jpg in parser.iter_frames(f):
+            if len(jpg) >= 100:
+                jpegs.append(bytes(jpg))
+                if len(jpegs) >= limit:
+                    break
+    return jpegs
+
+
+def detect(face_cascade, jpeg: bytes, scale: int):
+    """Same decode/detect path as app.process_frame_for_recognition()"""
+    gray = cv2.imdecode(np.frombuffer(jpeg, np.uint8), GRAY_DECODE_FLAGS[scale])
+    if gray is None:
+        return []
+    min_side = max(FACE_MIN_SIZE // scale, 12)
+    max_side = max(FACE_MAX_SIZE // scale, min_side + 1)
+    rects = face_cascade.detectMultiScale(gray, scaleFactor=1.05, minNeighbors=3,
+                                          minSize=(min_side, min_side), maxSize=(max_side, max_side))
+    return [(x * scale, y * scale, w * scale, h * scale) for (x, y, w, h) in rects]
+
+
+def iou(a, b) -> float:
+    ax, ay, aw, ah = a
+    bx, by, bw, bh = b
+    ix = max(0, min(ax + aw, bx + bw) - max(ax, bx))
+    iy = max(0, min(ay + ah, by + bh) - max(ay, by))
+    inter = ix * iy
+    union = aw * ah + bw * bh - inter
+    return inter / union if union else 0.0
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument('input', help='directory of JPEGs or a recorded MJPEG stream')
+    ap.add_argument('--scales', type=int, nargs='+', default=[1, 2, 4, 8], choices=sorted(GRAY_DECODE_FLAGS))
+    ap.add_argument('--limit', type=int, default=300, help='maximum frames to load')
+    ap.add_argument('--iou', type=float, default=0.5, help='IoU needed to count a detection as recalled')
+    args = ap.parse_args()
+
+    jpegs = load_jpegs(args.input, args.limit)
+    if not jpegs:
+        sys.exit(f"No JPEG frames found in {args.input}")
+    face_cascade = cv2.CascadeClassifier(cv2.data.haarcascades + 'haarcascade_frontalface_default.xml')
+    print(f"Loaded {len(jpegs)} frames from {args.input}")
+
+    # Full-resolution detections are the reference for recall
+    reference = [detect(face_cascade, jpg, 1) for jpg in jpegs]
+    total_ref = sum(len(r) for r in reference)
+
+    for scale in args.scales:
+        latencies = []
+        found = 0
+        for jpg, ref in zip(jpegs, reference):
+            t0 = time.perf_counter()
+            rects = detect(face_cascade, jpg, scale)
+            latencies.append(time.perf_counter() - t0)
+            found += sum(1 for r in ref if any(iou(r, d) >= args.iou for d in rects))
+        latencies.sort()
+        mean_ms = sum(latencies) / len(latencies) * 1000
+        p95_ms = latencies[int(len(latencies) * 0.95) - 1 if len(latencies) > 1 else 0] * 1000
+        recall = f"{found / total_ref * 100:5.1f}%" if total_ref else "  n/a"
+        print(f"scale=1/{scale}  mean={mean_ms:7.2f} ms  p95={p95_ms:7.2f} ms  "
+              f"{1000 / mean_ms:7.1f} frames/s  recall={recall} ({found}/{total_ref})")
+
+
+if __name__ == '__main__':
+    main()
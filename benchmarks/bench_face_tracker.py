@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Face tracker benchmark for UniSync
+Measures per-frame recognition cost (decode + detection + LBPH prediction)
+with a full detection and prediction on every frame against the IoU face
+tracker, which only searches the whole frame every --detect-every frames and
+predicts a tracked face again once its identity has decayed.
+
+Input is a directory of JPEG snapshots or a recorded MJPEG stream; a
+stationary subject shows the largest difference:
+    python benchmarks/bench_face_tracker.py captures/
+    python benchmarks/bench_face_tracker.py esp32.mjpeg --model lbph.yml --fps 10
+Without --model an LBPH recognizer is trained on the faces found in the input.
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_detection_scale import load_jpegs, detect  # noqa: E402
+from face_tracker import FaceTracker  # noqa: E402
+from frame_store import GRAY_DECODE_FLAGS  # noqa: E402
+from recognition_pool import CASCADE_FILE, FULL_DETECTION, recognize_plan  # noqa: E402
+
+FACE_SIZE = (160, 160)
+
+
+def train_recognizer(face_cascade, jpegs):
+    faces = []
+    for jpeg in jpegs:
+        gray = cv2.imdecode(np.frombuffer(jpeg, np.uint8), cv2.IMREAD_GRAYSCALE)
+        for (x, y, w, h) in detect(face_cascade, jpeg, 1):
+            faces.append(cv2.resize(gray[y:y + h, x:x + w], FACE_SIZE))
+    if not faces:
+        return None
+    recognizer = cv2.face.LBPHFaceRecognizer_create()
+    recognizer.train(faces, np.zeros(len(faces), np.int32))
+    return recognizer
+
+
+def run(jpegs, face_cascade, recognizer, frames: int, scale: int, fps: float, tracker):
+    """Mean milliseconds per frame and the number of LBPH predictions made"""
+    predictions = 0
+    elapsed = 0.0
+    now = time.time()
+    for i in range(frames):
+        data = np.frombuffer(jpegs[i % len(jpegs)], np.uint8)
+        t0 = time.perf_counter()
+        small = cv2.imdecode(data, GRAY_DECODE_FLAGS[scale])
+        plan = tracker.plan(now) if tracker is not None else FULL_DETECTION
+        faces = recognize_plan(small, lambda: cv2.imdecode(data, cv2.IMREAD_GRAYSCALE), face_cascade, recognizer,
+                               plan, scale, FACE_SIZE)
+        if tracker is not None:
+            tracker.apply(plan, faces, now)
+        elapsed += time.perf_counter() - t0
+        predictions += sum(1 for face in faces if face[2] is not None)
+        now += 1.0 / fps  # simulated stream time, so identity decay behaves as live
+    return elapsed / frames * 1000, predictions
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument('input', help='directory of JPEGs or a recorded MJPEG stream')
+    ap.add_argument('--model', help='trained LBPH model (.yml)')
+    ap.add_argument('--frames', type=int, default=300, help='frames to recognize per run')
+    ap.add_argument('--scale', type=int, default=2, choices=[1, 2, 4, 8], help='DETECTION_SCALE')
+    ap.add_argument('--detect-every', type=int, nargs='+', default=[5, 10, 20], help='TRACKER_DETECT_EVERY')
+    ap.add_argument('--half-life', type=float, default=5.0, help='TRACKER_IDENTITY_HALF_LIFE_SEC')
+    ap.add_argument('--fps', type=float, default=10.0, help='recognition passes per second of stream time')
+    ap.add_argument('--limit', type=int, default=100, help='maximum frames to load')
+    args = ap.parse_args()
+
+    jpegs = load_jpegs(args.input, args.limit)
+    if not jpegs:
+        sys.exit(f"No JPEG frames found in {args.input}")
+    face_cascade = cv2.CascadeClassifier(cv2.data.haarcascades + CASCADE_FILE)
+    if args.model:
+        recognizer = cv2.face.LBPHFaceRecognizer_create()
+        recognizer.read(args.model)
+    else:
+        recognizer = train_recognizer(face_cascade, jpegs)
+    print(f"Loaded {len(jpegs)} frames from {args.input}, recognizer: {'yes' if recognizer is not None else 'none'}")
+
+    baseline, baseline_predictions = run(jpegs, face_cascade, recognizer, args.frames, args.scale, args.fps, None)
+    print(f"every frame        {baseline:7.2f} ms/frame  {baseline_predictions:5d} predictions")
+    for detect_every in args.detect_every:
+        tracker = FaceTracker(detect_every, identity_half_life=args.half_life)
+        ms, predictions = run(jpegs, face_cascade, recognizer, args.frames, args.scale, args.fps, tracker)
+        stats = tracker.stats()
+        print(f"tracker every={detect_every:<3} {ms:7.2f} ms/frame  {predictions:5d} predictions  "
+              f"x{baseline / ms:4.1f}  tracks={stats['tracks_created']} lost={stats['tracks_lost']}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+Ingest model benchmark for UniSync
+Serves N fake ESP32-CAM MJPEG streams from a local server and compares the
+thread-per-camera model with the single-event-loop AsyncIngestEngine:
+frames received, thread count and resident memory. Streams are chunked
+HTTP/1.1 like the camera firmware; --http10 serves unframed HTTP/1.0 bodies.
+
+Before measuring, a first-frame check serves a single frame smaller than
+the read chunk and keeps the connection open; both CaptureHub modes must
+publish it without waiting for more data.
+
+    python benchmarks/bench_ingest.py --cameras 1 4 16 --fps 20 --seconds 5
+    python benchmarks/bench_ingest.py --cameras 4 --http10
+"""
+
+import argparse
+import http.client
+import multiprocessing
+import os
+import random
+import socket
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from capture_hub import CaptureHub  # noqa: E402
+from ingest_engine import AsyncIngestEngine  # noqa: E402
+from mjpeg_parser import MJPEGStreamParser  # noqa: E402
+from fake_esp32cam import FakeCamera, FakeCameraServer, noise_jpeg  # noqa: E402
+
+BOUNDARY = b'123456789000000000000987654321'
+
+def serve_fake_cameras(fps: float, frame_size: int, http10: bool, ready):
+    rng = random.Random(0)
+    camera = FakeCamera([noise_jpeg(frame_size, rng) for _ in range(10)], fps)
+    server = FakeCameraServer(camera, http10=http10).start()
+    ready.put(server.stream_port)
+    while True:
+        time.sleep(1)
+
+
+def serve_one_frame(listener: socket.socket, jpeg: bytes, http10: bool, hold: threading.Event):
+    """Answer one stream request with a single frame, then keep the connection open until ``hold`` is set"""
+    conn, _ = listener.accept()
+    with conn:
+        conn.recv(4096)
+        part = (b'\r\n--' + BOUNDARY + b'\r\nContent-Type: image/jpeg\r\n'
+                b'Content-Length: ' + str(len(jpeg)).encode() + b'\r\n\r\n' + jpeg)
+        head = b'Content-Type: multipart/x-mixed-replace;boundary=' + BOUNDARY + b'\r\n'
+        if http10:
+            conn.sendall(b'HTTP/1.0 200 OK\r\n' + head + b'\r\n' + part)
+        else:
+            conn.sendall(b'HTTP/1.1 200 OK\r\nTransfer-Encoding: chunked\r\n' + head + b'\r\n'
+                         + b'%x\r\n' % len(part) + part + b'\r\n')
+        hold.wait(10)
+
+
+def check_first_frame(http10: bool, timeout: float = 3.0) -> dict:
+    """Seconds until CaptureHub publishes a lone sub-chunk frame, per mode (None = not published)"""
+    jpeg = noise_jpeg(3000, random.Random(1))
+    results = {}
+    for mode in ('threads', 'asyncio'):
+        listener = socket.create_server(('127.0.0.1', 0))
+        hold = threading.Event()
+        threading.Thread(target=serve_one_frame, args=(listener, jpeg, http10, hold), daemon=True).start()
+        engine = AsyncIngestEngine() if mode == 'asyncio' else None
+        hub = CaptureHub(engine=engine, mode=mode)
+        url = f'http://127.0.0.1:{listener.getsockname()[1]}/stream'
+        t0 = time.time()
+        frame = hub.acquire(url).wait_newer(0, timeout)
+        results[mode] = time.time() - t0 if frame is not None and frame.jpeg == jpeg else None
+        hold.set()
+        hub.stop_all()
+        if engine is not None:
+            engine.stop()
+        listener.close()
+    return results
+
+
+def rss_kb() -> int:
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return 0
+
+
+def run_threads(port: int, cameras: int, seconds: float, warmup: float) -> int:
+    counts = [0] * cameras
+    stop = threading.Event()
+
+    def reader(idx):
+        conn = http.client.HTTPConnection('127.0.0.1', port, timeout=10)
+        conn.request('GET', f'/stream?cam={idx}')
+        resp = conn.getresponse()
+        parser = MJPEGStreamParser()
+        for _ in parser.iter_frames(resp):
+            counts[idx] += 1
+            if stop.is_set():
+                break
+        conn.close()
+
+    threads = [threading.Thread(target=reader, args=(i,), daemon=True) for i in range(cameras)]
+    for t in threads:
+        t.start()
+    time.sleep(warmup)
+    start = sum(counts)
+    time.sleep(seconds)
+    frames = sum(counts) - start
+    peak_threads = threading.active_count()
+    stop.set()
+    for t in threads:
+        t.join(timeout=2)
+    return frames, peak_threads
+
+
+def run_engine(port: int, cameras: int, seconds: float, warmup: float) -> int:
+    counts = [0] * cameras
+    engine = AsyncIngestEngine()
+    for i in range(cameras):
+        def on_frame(jpeg, idx=i):
+            counts[idx] += 1
+        engine.add_camera(i, f'http://127.0.0.1:{port}/stream?cam={i}', on_frame)
+    time.sleep(warmup)
+    start = sum(counts)
+    time.sleep(seconds)
+    frames = sum(counts) - start
+    peak_threads = threading.active_count()
+    errors = {conn['last_error'] for conn in engine.stats()['cameras'].values() if conn['last_error']}
+    engine.stop()
+    if errors:
+        print(f"  engine errors: {', '.join(sorted(errors))}")
+    return frames, peak_threads
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument('--cameras', type=int, nargs='+', default=[1, 4, 16])
+    ap.add_argument('--fps', type=float, default=20.0)
+    ap.add_argument('--frame-size', type=int, default=30 * 1024)
+    ap.add_argument('--seconds', type=float, default=5.0)
+    ap.add_argument('--warmup', type=float, default=2.0, help='seconds to let all streams connect')
+    ap.add_argument('--http10', action='store_true', help='unframed HTTP/1.0 streams instead of chunked HTTP/1.1')
+    args = ap.parse_args()
+
+    # The fake cameras run in a separate process so thread and memory
+    # figures below only reflect the client side
+    ready = multiprocessing.Queue()
+    server_proc = multiprocessing.Process(target=serve_fake_cameras,
+                                          args=(args.fps, args.frame_size, args.http10, ready), daemon=True)
+    server_proc.start()
+    port = ready.get(timeout=30)
+    print(f"Fake camera server on port {port}: {args.fps:.0f} FPS, {args.frame_size // 1024} KB frames, "
+          f"{'HTTP/1.0' if args.http10 else 'chunked HTTP/1.1'}")
+
+    first = check_first_frame(args.http10)
+    if None in first.values():
+        server_proc.terminate()
+        sys.exit(f"First-frame check failed: a lone sub-chunk frame was not published "
+                 f"({', '.join(mode for mode, t in first.items() if t is None)})")
+    print("First-frame check: " + ", ".join(f"{mode} {t * 1000:.1f} ms" for mode, t in first.items()))
+
+    for n in args.cameras:
+        for name, fn in (('thread-per-camera', run_threads), ('asyncio engine', run_engine)):
+            base_threads = threading.active_count()
+            rss_before = rss_kb()
+            t0 = time.process_time()
+            frames, peak = fn(port, n, args.seconds, args.warmup)
+            cpu = time.process_time() - t0
+            print(f"{name:<18} cameras={n:>3}  frames/s={frames / args.seconds:8.1f}  "
+                  f"client threads={peak - base_threads:>3}  rss +{(rss_kb() - rss_before) / 1024:6.1f} MB  "
+                  f"cpu={cpu:5.2f}s")
+            time.sleep(0.5)
+    server_proc.terminate()
+
+
+if __name__ == '__main__':
+    main()
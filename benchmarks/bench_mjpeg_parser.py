@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+MJPEG parser microbenchmark for UniSync
+Compares the legacy ``bytes_buffer += chunk`` / ``find()`` loop from
+``stream_esp32_frames`` with ``MJPEGStreamParser`` on recorded stream bytes.
+
+Record a few seconds from the camera first:
+    python benchmarks/bench_mjpeg_parser.py --record http://192.168.1.100:81/stream --seconds 10 -o esp32.mjpeg
+Then benchmark it:
+    python benchmarks/bench_mjpeg_parser.py esp32.mjpeg
+Without an input file a synthetic 640x480-sized stream is generated.
+
+Before benchmarking, a live-read check sends one frame smaller than the
+read chunk over a blocking socket that stays open (as a chunked HTTP/1.1
+response, like the camera), and fails unless ``iter_frames()`` returns it
+without waiting for more data.
+"""
+
+import argparse
+import http.client
+import io
+import os
+import random
+import socket
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mjpeg_parser import MJPEGStreamParser  # noqa: E402
+
+ESP32_BOUNDARY = b'123456789000000000000987654321'
+
+
+def synthetic_stream(frames: int = 300, frame_size: int = 40 * 1024, seed: int = 0) -> bytes:
+    """Build an ESP32-style multipart stream of fake JPEG payloads"""
+    rng = random.Random(seed)
+    parts = []
+    for _ in range(frames):
+        size = max(frame_size + rng.randint(-frame_size // 4, frame_size // 4), 16)
+        body = bytearray(rng.getrandbits(8) for _ in range(size))
+        # Byte stuffing: real entropy-coded data never contains a bare 0xFF 0xD9
+        body = body.replace(b'\xff', b'\xfe')
+        jpg = b'\xff\xd8' + bytes(body) + b'\xff\xd9'
+        parts.append(b'\r\n--' + ESP32_BOUNDARY + b'\r\n'
+                     b'Content-Type: image/jpeg\r\n'
+                     b'Content-Length: ' + str(len(jpg)).encode() + b'\r\n'
+                     b'X-Timestamp: 0.000000\r\n\r\n' + jpg)
+    return b''.join(parts)
+
+
+def record_stream(url: str, seconds: float, output: str):
+    import requests
+    print(f"Recording {url} for {seconds:.0f}s -> {output}")
+    deadline = time.time() + seconds
+    total = 0
+    with requests.get(url, stream=True, timeout=10) as resp, open(output, 'wb') as f:
+        for chunk in resp.iter_content(chunk_size=16 * 1024):
+            f.write(chunk)
+            total += len(chunk)
+            if time.time() >= deadline:
+                break
+    print(f"Recorded {total} bytes")
+
+
+def legacy_loop(data: bytes, chunk_size: int) -> int:
+    """The original stream_esp32_frames() splitting loop"""
+    frames = 0
+    bytes_buffer = b''
+    for i in range(0, len(data), chunk_size):
+        bytes_buffer += data[i:i + chunk_size]
+        a = bytes_buffer.find(b'\xff\xd8')
+        b = bytes_buffer.find(b'\xff\xd9')
+        if a != -1 and b != -1:
+            jpg = bytes_buffer[a:b + 2]
+            bytes_buffer = bytes_buffer[b + 2:]
+            if len(jpg) >= 100:
+                frames += 1
+    return frames
+
+
+def parser_feed(data: bytes, chunk_size: int) -> int:
+    parser = MJPEGStreamParser()
+    view = memoryview(data)
+    frames = 0
+    for i in range(0, len(data), chunk_size):
+        for jpg in parser.feed(view[i:i + chunk_size]):
+            if len(jpg) >= 100:
+                frames += 1
+    return frames
+
+
+def parser_readinto(data: bytes, chunk_size: int) -> int:
+    parser = MJPEGStreamParser()
+    frames = 0
+    for jpg in parser.iter_frames(io.BytesIO(data), chunk_size):
+        if len(jpg) >= 100:
+            frames += 1
+    return frames
+
+
+def check_live_read(timeout: float = 2.0) -> bool:
+    """One sub-chunk frame must come out of iter_frames() while the camera connection stays open.
+
+    The frame is sent like the firmware sends it: one chunk of an HTTP/1.1
+    chunked response, read through http.client over a blocking socket pair.
+    """
+    server, client = socket.socketpair()
+    jpg = b'\xff\xd8' + bytes(3000) + b'\xff\xd9'
+    part = (b'\r\n--' + ESP32_BOUNDARY + b'\r\nContent-Type: image/jpeg\r\n'
+            b'Content-Length: ' + str(len(jpg)).encode() + b'\r\n\r\n' + jpg)
+    server.sendall(b'HTTP/1.1 200 OK\r\nTransfer-Encoding: chunked\r\n'
+                   b'Content-Type: multipart/x-mixed-replace;boundary=' + ESP32_BOUNDARY + b'\r\n\r\n'
+                   + b'%x\r\n' % len(part) + part + b'\r\n')
+    response = http.client.HTTPResponse(client)
+    response.begin()
+    received = []
+    parser = MJPEGStreamParser(ESP32_BOUNDARY)
+    reader = threading.Thread(target=lambda: received.append(bytes(next(parser.iter_frames(response)))),
+                              daemon=True)
+    reader.start()
+    reader.join(timeout)
+    server.close()  # end of stream unblocks a reader still waiting for a full chunk
+    reader.join(timeout)
+    client.close()
+    return received == [jpg] and not reader.is_alive()
+
+
+def bench(name: str, fn, data: bytes, chunk_size: int, repeat: int):
+    best = None
+    frames = 0
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        frames = fn(data, chunk_size)
+        elapsed = time.perf_counter() - t0
+        best = elapsed if best is None else min(best, elapsed)
+    mb_s = len(data) / best / 1e6
+    print(f"{name:<22} chunk={chunk_size:>6}  frames={frames:>5}  "
+          f"{best * 1000:9.2f} ms  {mb_s:8.1f} MB/s  {frames / best:9.0f} frames/s")
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument('input', nargs='?', help='recorded MJPEG stream bytes')
+    ap.add_argument('--record', metavar='URL', help='record a camera stream instead of benchmarking')
+    ap.add_argument('--seconds', type=float, default=10.0)
+    ap.add_argument('-o', '--output', default='esp32_stream.mjpeg')
+    ap.add_argument('--repeat', type=int, default=3)
+    ap.add_argument('--chunk', type=int, action='append', help='chunk size(s) to test')
+    args = ap.parse_args()
+
+    if args.record:
+        record_stream(args.record, args.seconds, args.output)
+        return
+
+    if not check_live_read():
+        sys.exit("Live read check failed: a frame smaller than the read chunk waited for more data")
+    print("Live read check: a single sub-chunk frame is returned while the stream stays open")
+
+    if args.input:
+        with open(args.input, 'rb') as f:
+            data = f.read()
+        print(f"Loaded {len(data)} bytes from {args.input}")
+    else:
+        data = synthetic_stream()
+        print(f"Generated {len(data)} bytes of synthetic ESP32 stream")
+
+    for chunk_size in args.chunk or [1024, 16 * 1024]:
+        bench('legacy += / find()', legacy_loop, data, chunk_size, args.repeat)
+        bench('parser.feed()', parser_feed, data, chunk_size, args.repeat)
+        bench('parser.iter_frames()', parser_readinto, data, chunk_size, args.repeat)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Recognition process pool benchmark for UniSync
+Measures detection throughput of RecognitionPool for several process counts
+against the same work done in-process, with one simulated camera per frame
+stream (each camera keeps at most one frame in flight, as in the app).
+
+Input is a directory of JPEG snapshots or a recorded MJPEG stream:
+    python benchmarks/bench_recognition_pool.py captures/ --cameras 4
+    python benchmarks/bench_recognition_pool.py esp32.mjpeg --processes 1 2 4 8
+"""
+
+import argparse
+import os
+import sys
+import threading
+import time
+from types import SimpleNamespace
+
+import cv2
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_detection_scale import load_jpegs, detect  # noqa: E402
+from recognition_pool import RecognitionPool, CASCADE_FILE  # noqa: E402
+
+
+def run_in_process(jpegs, frames: int, scale: int) -> float:
+    face_cascade = cv2.CascadeClassifier(cv2.data.haarcascades + CASCADE_FILE)
+    t0 = time.perf_counter()
+    for i in range(frames):
+        detect(face_cascade, jpegs[i % len(jpegs)], scale)
+    return frames / (time.perf_counter() - t0)
+
+
+def run_pool(jpegs, frames: int, processes: int, cameras: int, scale: int) -> float:
+    done = threading.Semaphore(0)
+    pool = RecognitionPool(lambda camera, result: done.release(), processes, scale)
+    pool.start()
+    try:
+        # Warm-up: one task per process so worker start-up is not measured
+        for i in range(processes):
+            pool.submit(SimpleNamespace(seq=i, jpeg=jpegs[0], timestamp=time.time()), f'warmup-{i}')
+        for _ in range(processes):
+            done.acquire(timeout=30)
+        submitted = 0
+        completed = 0
+        t0 = time.perf_counter()
+        while completed < frames:
+            # Every idle camera offers its next frame; busy ones are skipped by the pool
+            for camera in range(cameras):
+                if submitted < frames and pool.submit(
+                        SimpleNamespace(seq=submitted, jpeg=jpegs[submitted % len(jpegs)], timestamp=time.time()),
+                        camera):
+                    submitted += 1
+            if done.acquire(timeout=30):
+                completed += 1
+        return frames / (time.perf_counter() - t0)
+    finally:
+        pool.stop()
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument('input', help='directory of JPEGs or a recorded MJPEG stream')
+    ap.add_argument('--processes', type=int, nargs='+', default=[1, 2, 4])
+    ap.add_argument('--cameras', type=int, default=4, help='simulated cameras submitting frames')
+    ap.add_argument('--frames', type=int, default=400, help='frames to recognize per run')
+    ap.add_argument('--scale', type=int, default=2, choices=[1, 2, 4, 8], help='DETECTION_SCALE')
+    ap.add_argument('--limit', type=int, default=100, help='maximum frames to load')
+    args = ap.parse_args()
+
+    jpegs = load_jpegs(args.input, args.limit)
+    if not jpegs:
+        sys.exit(f"No JPEG frames found in {args.input}")
+    print(f"Loaded {len(jpegs)} frames from {args.input}, {os.cpu_count()} CPUs, {args.cameras} cameras")
+
+    baseline = run_in_process(jpegs, args.frames, args.scale)
+    print(f"in-process        {baseline:7.1f} frames/s")
+    for processes in args.processes:
+        fps = run_pool(jpegs, args.frames, processes, args.cameras, args.scale)
+        print(f"pool processes={processes:<2} {fps:7.1f} frames/s  x{fps / baseline:4.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Recognizer latency vs enrollment size for UniSync
+Compares cv2.face.LBPHFaceRecognizer with the vectorized lbp_recognizer
+backend (RECOGNIZER_BACKEND=vectorized) for growing numbers of enrolled
+face images, both one face at a time and as a batch of face crops.
+
+Enrollment images come from a dataset directory (one sub-directory per
+person, as in DATASET_DIR), repeated to reach each size; without one,
+synthetic people are generated (a texture per person, noisy images of it).
+Queries are fresh noisy images of enrolled people, and the share of queries
+where both backends agree on the label is reported:
+    python benchmarks/bench_recognizer.py
+    python benchmarks/bench_recognizer.py --dataset dataset --sizes 500 2000 8000 --batch 4
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from lbp_recognizer import LBPHistogramRecognizer  # noqa: E402
+
+FACE_SIZE = (160, 160)
+
+
+def load_dataset(path: str):
+    """Face images and their person index, resized to FACE_SIZE"""
+    faces, people = [], []
+    for person in sorted(os.listdir(path)):
+        person_dir = os.path.join(path, person)
+        if not os.path.isdir(person_dir):
+            continue
+        for name in sorted(os.listdir(person_dir)):
+            if name.lower().endswith(('.png', '.jpg', '.jpeg')):
+                gray = cv2.imread(os.path.join(person_dir, name), cv2.IMREAD_GRAYSCALE)
+                if gray is not None:
+                    faces.append(cv2.resize(gray, FACE_SIZE))
+                    people.append(len(set(people)) if not people or people[-1] != person else people[-1])
+    return faces, people
+
+
+def noisy(face, rng, amount: int = 10):
+    return np.clip(face.astype(np.int16) + rng.integers(-amount, amount, face.shape), 0, 255).astype(np.uint8)
+
+
+def synthetic_person(rng):
+    return cv2.GaussianBlur(rng.integers(0, 256, FACE_SIZE[::-1], dtype=np.uint8), (7, 7), 0)
+
+
+def enrollment(size: int, per_person: int, dataset, rng):
+    """``size`` face images with labels, and one base image per label for making queries"""
+    if dataset is not None:
+        faces, people = dataset
+        return ([noisy(faces[i % len(faces)], rng, 8) for i in range(size)],
+                np.array([people[i % len(faces)] + (i // len(faces)) * (max(people) + 1) for i in range(size)],
+                         np.int32),
+                None)
+    bases = [synthetic_person(rng) for _ in range((size + per_person - 1) // per_person)]
+    labels = np.arange(size, dtype=np.int32) // per_person
+    return [noisy(bases[label], rng) for label in labels], labels, bases
+
+
+def timed(fn, repeat: int) -> float:
+    """Best-of-repeat milliseconds for one call of fn"""
+    best = float('inf')
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best * 1000
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument('--dataset', help='dataset directory with one sub-directory per person')
+    ap.add_argument('--sizes', type=int, nargs='+', default=[250, 1000, 4000], help='enrolled face images')
+    ap.add_argument('--per-person', type=int, default=10, help='images per label when enrolling')
+    ap.add_argument('--batch', type=int, default=4, help='face crops scored together')
+    ap.add_argument('--repeat', type=int, default=3)
+    args = ap.parse_args()
+
+    rng = np.random.default_rng(0)
+    dataset = load_dataset(args.dataset) if args.dataset else None
+    if dataset is not None and not dataset[0]:
+        sys.exit(f"No face images found in {args.dataset}")
+    print(f"{'dataset ' + args.dataset if dataset else 'synthetic people'}, batch of {args.batch}, "
+          f"{os.cpu_count()} CPUs")
+
+    for size in args.sizes:
+        faces, labels, bases = enrollment(size, args.per_person, dataset, rng)
+        picks = rng.integers(0, size, args.batch * 8)
+        if bases is not None:
+            queries = [noisy(bases[labels[i]], rng) for i in picks]
+        else:
+            queries = [noisy(faces[i], rng) for i in picks]
+        batches = [queries[i:i + args.batch] for i in range(0, len(queries), args.batch)]
+        opencv = cv2.face.LBPHFaceRecognizer_create()
+        t0 = time.perf_counter()
+        opencv.train(faces, labels)
+        opencv_train = time.perf_counter() - t0
+        vectorized = LBPHistogramRecognizer()
+        t0 = time.perf_counter()
+        vectorized.train(faces, labels)
+        vectorized_train = time.perf_counter() - t0
+
+        agree = sum(opencv.predict(q)[0] == vectorized.predict(q)[0] for q in queries)
+        opencv_one = timed(lambda: [opencv.predict(q) for q in queries], args.repeat) / len(queries)
+        vectorized_one = timed(lambda: [vectorized.predict(q) for q in queries], args.repeat) / len(queries)
+        opencv_batch = timed(lambda: [[opencv.predict(q) for q in batch] for batch in batches],
+                             args.repeat) / len(batches)
+        vectorized_batch = timed(lambda: [vectorized.predict_batch(batch) for batch in batches],
+                                 args.repeat) / len(batches)
+        print(f"enrolled={size:<6} train opencv={opencv_train:6.2f}s vectorized={vectorized_train:6.2f}s  "
+              f"{vectorized.roots.nbytes / 1e6:6.1f} MB  agreement={agree}/{len(queries)}")
+        print(f"  one face   opencv={opencv_one:8.2f} ms  vectorized={vectorized_one:8.2f} ms  "
+              f"x{opencv_one / vectorized_one:4.1f}")
+        print(f"  batch of {args.batch} opencv={opencv_batch:8.2f} ms  vectorized={vectorized_batch:8.2f} ms  "
+              f"x{opencv_batch / vectorized_batch:4.1f}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,417 @@
+#!/usr/bin/env python3
+"""
+Fake ESP32-CAM server for UniSync
+Emulates the CameraWebServer firmware endpoints so streaming benchmarks and
+reconnect tests run without hardware:
+
+    /            index page              /stream          MJPEG stream
+    /capture     single JPEG             /cam-hi.jpg      full-resolution JPEG
+    /cam-lo.jpg  half-resolution JPEG    /control         ?var=&val= settings
+    /status      current settings (JSON)
+
+The same handlers listen on two ports, standing in for the camera's port 80
+and port 81. Like the firmware's esp_http_server, /stream is served over
+HTTP/1.1 with Transfer-Encoding: chunked, one chunk per multipart part
+(--http10 serves a plain HTTP/1.0 body instead). Frames come from a
+directory of JPEGs, a recorded MJPEG stream (see bench_mjpeg_parser.py
+--record) or are generated.
+
+    python benchmarks/fake_esp32cam.py --frames captures/ --fps 20 --port 8080 --stream-port 8081
+    ESP32_IP=127.0.0.1 ESP32_HTTP_PORT=8080 ESP32_STREAM_PORT=8081 python app.py
+
+Network impairments can be set on the command line or changed at runtime:
+
+    curl 'http://127.0.0.1:8080/control?var=jitter&val=50'       # +0..50 ms per frame
+    curl 'http://127.0.0.1:8080/control?var=stall&val=3'         # freeze streams for 3 s
+    curl 'http://127.0.0.1:8080/control?var=disconnect&val=1'    # drop every open stream
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List, Optional
+from urllib.parse import parse_qs, urlsplit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mjpeg_parser import MJPEGStreamParser  # noqa: E402
+
+try:
+    import cv2
+    import numpy as np
+except ImportError:  # synthetic noise frames still work without OpenCV
+    cv2 = None
+    np = None
+
+# Boundary used by the CameraWebServer firmware (app_httpd.cpp)
+BOUNDARY = '123456789000000000000987654321'
+
+
+def noise_jpeg(size: int, rng: random.Random) -> bytes:
+    """JPEG-shaped payload (SOI ... EOI) of about ``size`` bytes; not decodable"""
+    body = bytes(rng.getrandbits(8) for _ in range(size)).replace(b'\xff', b'\xfe')
+    return b'\xff\xd8' + body + b'\xff\xd9'
+
+
+def synthetic_frames(count: int, width: int, height: int, quality: int = 80) -> List[bytes]:
+    """Decodable frames with a moving bar and frame counter (requires OpenCV)"""
+    frames = []
+    for i in range(count):
+        img = np.full((height, width, 3), 40, np.uint8)
+        x = int((i / count) * width)
+        cv2.rectangle(img, (x, 0), (min(x + width // 10, width - 1), height - 1), (90, 160, 90), -1)
+        cv2.putText(img, f"FAKE ESP32-CAM {i:04d}", (10, height // 2), cv2.FONT_HERSHEY_SIMPLEX,
+                    max(width / 640, 0.4), (255, 255, 255), 2)
+        ok, buf = cv2.imencode('.jpg', img, [int(cv2.IMWRITE_JPEG_QUALITY), quality])
+        if ok:
+            frames.append(buf.tobytes())
+    return frames
+
+
+def load_frames(path: str, limit: int = 0) -> List[bytes]:
+    """JPEG files of a directory (sorted by name) or the frames of an MJPEG recording"""
+    frames = []
+    if os.path.isdir(path):
+        for name in sorted(os.listdir(path)):
+            if name.lower().endswith(('.jpg', '.jpeg')):
+                with open(os.path.join(path, name), 'rb') as f:
+                    frames.append(f.read())
+                if limit and len(frames) >= limit:
+                    break
+        return frames
+    parser = MJPEGStreamParser()
+    with open(path, 'rb') as f:
+        for jpg in parser.iter_frames(f):
+            if len(jpg) >= 100:
+                frames.append(bytes(jpg))
+                if limit and len(frames) >= limit:
+                    break
+    return frames
+
+
+def rescale(frames: List[bytes], width: int, height: int, quality: int = 80) -> List[bytes]:
+    """Re-encode frames at another resolution (unchanged without OpenCV)"""
+    if cv2 is None or not frames:
+        return frames
+    out = []
+    for jpg in frames:
+        img = cv2.imdecode(np.frombuffer(jpg, np.uint8), cv2.IMREAD_COLOR)
+        if img is None:
+            out.append(jpg)
+            continue
+        if (img.shape[1], img.shape[0]) != (width, height):
+            img = cv2.resize(img, (width, height), interpolation=cv2.INTER_AREA)
+        ok, buf = cv2.imencode('.jpg', img, [int(cv2.IMWRITE_JPEG_QUALITY), quality])
+        out.append(buf.tobytes() if ok else jpg)
+    return out
+
+
+class FakeCamera:
+    """Frame source and impairment settings shared by every connection.
+
+    Settings may be changed from any thread (``/control`` or directly); open
+    streams pick them up on their next frame.
+    """
+
+    def __init__(self, frames: List[bytes], fps: float = 20.0, lo_frames: Optional[List[bytes]] = None,
+                 jitter_ms: float = 0.0, stall_every: float = 0.0, stall_seconds: float = 0.0,
+                 disconnect_every: int = 0, seed: int = 0):
+        if not frames:
+            raise ValueError('no frames to serve')
+        self.frames = frames
+        self.lo_frames = lo_frames or frames
+        self.fps = fps
+        self.jitter_ms = jitter_ms
+        self.stall_every = stall_every          # seconds between automatic stalls (0 = never)
+        self.stall_seconds = stall_seconds
+        self.disconnect_every = disconnect_every  # frames per connection before dropping it (0 = never)
+        self.rng = random.Random(seed)
+        self.started = time.time()
+        self._stall_until = 0.0
+        self._disconnect_gen = 0
+        self._lock = threading.Lock()
+        # Statistics
+        self.connections = 0
+        self.active_streams = 0
+        self.frames_sent = 0
+        self.disconnects = 0
+
+    def frame(self, index: int, low: bool = False) -> bytes:
+        frames = self.lo_frames if low else self.frames
+        return frames[index % len(frames)]
+
+    def current_index(self) -> int:
+        """Frame a snapshot request sees, advancing with wall time like a live camera"""
+        return int((time.time() - self.started) * max(self.fps, 0.1))
+
+    def stall(self, seconds: float):
+        with self._lock:
+            self._stall_until = max(self._stall_until, time.time() + seconds)
+
+    def disconnect_all(self):
+        with self._lock:
+            self._disconnect_gen += 1
+
+    def control(self, var: str, val: str) -> bool:
+        """Apply a /control setting; False for unknown variables"""
+        try:
+            if var == 'fps':
+                self.fps = max(float(val), 0.1)
+            elif var == 'jitter':
+                self.jitter_ms = max(float(val), 0.0)
+            elif var == 'stall':
+                self.stall(float(val))
+            elif var == 'stall_every':
+                self.stall_every = max(float(val), 0.0)
+            elif var == 'stall_seconds':
+                self.stall_seconds = max(float(val), 0.0)
+            elif var == 'disconnect':
+                if int(val):
+                    self.disconnect_all()
+            elif var == 'disconnect_every':
+                self.disconnect_every = max(int(val), 0)
+            else:
+                # Real firmware settings (framesize, quality, ...) are accepted and ignored
+                return var in ('framesize', 'quality', 'brightness', 'contrast', 'saturation',
+                               'hmirror', 'vflip', 'led_intensity')
+        except ValueError:
+            return False
+        return True
+
+    def status(self) -> dict:
+        return {
+            'fps': self.fps,
+            'jitter_ms': self.jitter_ms,
+            'stall_every': self.stall_every,
+            'stall_seconds': self.stall_seconds,
+            'disconnect_every': self.disconnect_every,
+            'stalled': time.time() < self._stall_until,
+            'frames': len(self.frames),
+            'connections': self.connections,
+            'active_streams': self.active_streams,
+            'frames_sent': self.frames_sent,
+            'disconnects': self.disconnects
+        }
+
+    def _frame_delay(self) -> float:
+        delay = 1.0 / max(self.fps, 0.1)
+        if self.jitter_ms:
+            delay += self.rng.uniform(0, self.jitter_ms) / 1000.0
+        return delay
+
+    def _wait_stall(self) -> bool:
+        """Block while a stall is in effect; True if the stream was stalled"""
+        stalled = False
+        if self.stall_every and self.stall_seconds:
+            # Periodic stalls are aligned to wall time so all streams freeze together
+            elapsed = time.time() - self.started
+            if elapsed % self.stall_every < self.stall_seconds:
+                time.sleep(self.stall_seconds - elapsed % self.stall_every)
+                stalled = True
+        while True:
+            remaining = self._stall_until - time.time()
+            if remaining <= 0:
+                return stalled
+            time.sleep(min(remaining, 0.1))
+            stalled = True
+
+    def stream(self, write):
+        """Write multipart parts with ``write`` until disconnected"""
+        gen = self._disconnect_gen
+        sent = 0
+        index = self.current_index()
+        next_time = time.time()
+        with self._lock:
+            self.connections += 1
+            self.active_streams += 1
+        try:
+            while True:
+                if self._wait_stall():
+                    # A stalled camera skips the missed frames instead of bursting them
+                    next_time = time.time()
+                    index = self.current_index()
+                if gen != self._disconnect_gen or (self.disconnect_every and sent >= self.disconnect_every):
+                    with self._lock:
+                        self.disconnects += 1
+                    return
+                jpg = self.frame(index)
+                write(f'\r\n--{BOUNDARY}\r\nContent-Type: image/jpeg\r\n'
+                      f'Content-Length: {len(jpg)}\r\nX-Timestamp: {time.time():.6f}\r\n\r\n'.encode() + jpg)
+                index += 1
+                sent += 1
+                self.frames_sent += 1
+                next_time = max(next_time + self._frame_delay(), time.time() - 1.0)
+                wait = next_time - time.time()
+                if wait > 0:
+                    time.sleep(wait)
+        finally:
+            with self._lock:
+                self.active_streams -= 1
+
+
+class FakeCameraHandler(BaseHTTPRequestHandler):
+    camera: FakeCamera = None
+    protocol_version = 'HTTP/1.1'
+    chunked = True  # /stream body framing; False only with HTTP/1.0
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, body: bytes, content_type: str, status: int = 200):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('Access-Control-Allow-Origin', '*')
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        camera = self.camera
+        try:
+            if url.path == '/stream':
+                self.send_response(200)
+                self.send_header('Content-Type', f'multipart/x-mixed-replace;boundary={BOUNDARY}')
+                if self.chunked:
+                    self.send_header('Transfer-Encoding', 'chunked')
+                self.send_header('Access-Control-Allow-Origin', '*')
+                self.end_headers()
+                self.close_connection = True  # a stream ends by dropping the connection
+                if self.chunked:
+                    # app_httpd.cpp sends every part with httpd_resp_send_chunk()
+                    camera.stream(lambda data: self.wfile.write(b'%x\r\n%s\r\n' % (len(data), data)))
+                else:
+                    camera.stream(self.wfile.write)
+            elif url.path in ('/capture', '/cam-hi.jpg'):
+                self._send(camera.frame(camera.current_index()), 'image/jpeg')
+            elif url.path == '/cam-lo.jpg':
+                self._send(camera.frame(camera.current_index(), low=True), 'image/jpeg')
+            elif url.path == '/control':
+                query = parse_qs(url.query)
+                ok = camera.control(query.get('var', [''])[0], query.get('val', [''])[0])
+                self._send(b'' if ok else b'unknown variable', 'text/plain', 200 if ok else 500)
+            elif url.path == '/status':
+                self._send(json.dumps(camera.status()).encode(), 'application/json')
+            elif url.path == '/':
+                self._send(b'<html><body><h1>Fake ESP32-CAM</h1><img src="/stream"></body></html>', 'text/html')
+            else:
+                self._send(b'not found', 'text/plain', 404)
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+
+class FakeCameraServer:
+    """Runs the fake camera on an HTTP port and a stream port (80/81 stand-ins)."""
+
+    def __init__(self, camera: FakeCamera, host: str = '127.0.0.1', port: int = 0, stream_port: int = 0,
+                 http10: bool = False):
+        handler = type('BoundFakeCameraHandler', (FakeCameraHandler,), {
+            'camera': camera,
+            'protocol_version': 'HTTP/1.0' if http10 else 'HTTP/1.1',
+            'chunked': not http10
+        })
+        self.camera = camera
+        self.host = host
+        self._servers = [ThreadingHTTPServer((host, port), handler),
+                         ThreadingHTTPServer((host, stream_port), handler)]
+        for server in self._servers:
+            server.daemon_threads = True
+        self._threads = []
+
+    @property
+    def port(self) -> int:
+        return self._servers[0].server_address[1]
+
+    @property
+    def stream_port(self) -> int:
+        return self._servers[1].server_address[1]
+
+    @property
+    def base_url(self) -> str:
+        return f'http://{self.host}:{self.port}'
+
+    @property
+    def stream_url(self) -> str:
+        return f'http://{self.host}:{self.stream_port}/stream'
+
+    def start(self):
+        for server in self._servers:
+            thread = threading.Thread(target=server.serve_forever, daemon=True, name='fake-esp32cam')
+            thread.start()
+            self._threads.append(thread)
+        return self
+
+    def serve_forever(self):
+        self.start()
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.stop()
+
+    def stop(self):
+        self.camera.disconnect_all()
+        for server in self._servers:
+            server.shutdown()
+            server.server_close()
+        for thread in self._threads:
+            thread.join(timeout=2)
+        self._threads = []
+
+
+def build_camera(args) -> FakeCamera:
+    if args.frames:
+        frames = load_frames(args.frames, args.limit)
+        if not frames:
+            sys.exit(f"No JPEG frames found in {args.frames}")
+        if args.width and args.height:
+            frames = rescale(frames, args.width, args.height)
+    elif cv2 is not None:
+        frames = synthetic_frames(60, args.width or 640, args.height or 480)
+    else:
+        rng = random.Random(0)
+        frames = [noise_jpeg(args.frame_size, rng) for _ in range(10)]
+    lo_frames = None
+    if cv2 is not None:
+        img = cv2.imdecode(np.frombuffer(frames[0], np.uint8), cv2.IMREAD_COLOR)
+        if img is not None:
+            lo_frames = rescale(frames, img.shape[1] // 2, img.shape[0] // 2, quality=60)
+    return FakeCamera(frames, args.fps, lo_frames, args.jitter, args.stall_every, args.stall_seconds,
+                      args.disconnect_every)
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument('--frames', metavar='PATH', help='directory of JPEGs or a recorded MJPEG stream')
+    ap.add_argument('--limit', type=int, default=0, help='maximum frames to load (0 = all)')
+    ap.add_argument('--fps', type=float, default=20.0)
+    ap.add_argument('--width', type=int, default=0, help='output width (re-encodes loaded frames)')
+    ap.add_argument('--height', type=int, default=0, help='output height (re-encodes loaded frames)')
+    ap.add_argument('--frame-size', type=int, default=30 * 1024, help='synthetic frame size without OpenCV')
+    ap.add_argument('--jitter', type=float, default=0.0, help='random extra delay per frame, ms')
+    ap.add_argument('--stall-every', type=float, default=0.0, help='seconds between stalls')
+    ap.add_argument('--stall-seconds', type=float, default=0.0, help='length of each stall')
+    ap.add_argument('--disconnect-every', type=int, default=0, help='drop each stream after N frames')
+    ap.add_argument('--host', default='127.0.0.1')
+    ap.add_argument('--port', type=int, default=8080, help='stands in for the camera port 80')
+    ap.add_argument('--stream-port', type=int, default=8081, help='stands in for the camera port 81')
+    ap.add_argument('--http10', action='store_true', help='serve /stream over HTTP/1.0 without chunked encoding')
+    args = ap.parse_args()
+
+    camera = build_camera(args)
+    server = FakeCameraServer(camera, args.host, args.port, args.stream_port, args.http10)
+    print(f"Fake ESP32-CAM serving {len(camera.frames)} frames at {camera.fps:.0f} FPS")
+    print(f"  {server.base_url}/stream  {server.stream_url}  {server.base_url}/cam-hi.jpg")
+    print(f"  ESP32_IP={args.host} ESP32_HTTP_PORT={server.port} ESP32_STREAM_PORT={server.stream_port}")
+    server.serve_forever()
+
+
+if __name__ == '__main__':
+    main()
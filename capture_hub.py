@@ -0,0 +1,255 @@
+"""
+Capture hub for UniSync
+Owns exactly one upstream connection per camera stream URL and fans its
+frames out through a FrameSlot to every consumer (/video_feed, /video_direct,
+the legacy recognition stream, camera workers, snapshots). Consumers are
+reference-counted: the upstream opens with the first one and closes a short
+while after the last one leaves.
+"""
+
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from typing import Callable, Dict, Optional
+
+import requests
+
+from frame_store import FrameSlot
+from mjpeg_parser import MJPEGStreamParser, boundary_from_content_type
+from reconnect_policy import ReconnectPolicy
+
+
+class Upstream:
+    """One camera connection and the slot it publishes into."""
+
+    def __init__(self, url: str, policy: ReconnectPolicy):
+        self.url = url
+        self.slot = FrameSlot()
+        self.policy = policy        # kept across restarts, so an open circuit stays open
+        self.consumers = Counter()  # consumer name -> references
+        self.running = False
+        self.opened = 0             # times the upstream was (re)started by the hub
+        self.started_at = None
+        self.close_timer: Optional[threading.Timer] = None
+        # threads mode
+        self.thread: Optional[threading.Thread] = None
+        self.stop_event = threading.Event()
+        self.response = None
+        self.connected = False
+        self.frames = 0
+        self.reconnects = 0
+        self.last_error = None
+        # asyncio mode
+        self.connection = None
+
+    @property
+    def refs(self) -> int:
+        return sum(self.consumers.values())
+
+    def stats(self) -> dict:
+        conn = self.connection
+        if conn is not None:
+            connected, frames, reconnects, last_error = conn.connected, conn.frames, conn.reconnects, conn.last_error
+        else:
+            connected, frames, reconnects, last_error = self.connected, self.frames, self.reconnects, self.last_error
+        frame = self.slot.latest()
+        return {
+            'url': self.url,
+            'running': self.running,
+            'refs': self.refs,
+            'consumers': dict(self.consumers),
+            'opened': self.opened,
+            'connected': connected,
+            'frames': frames,
+            'reconnects': reconnects,
+            'last_error': last_error,
+            'last_frame_age_seconds': round(time.time() - frame.timestamp, 2) if frame is not None else None,
+            'reconnect': self.policy.stats()
+        }
+
+
+class CaptureHub:
+    """Reference-counted registry of camera upstreams.
+
+    With an ``AsyncIngestEngine`` the connection runs on its event loop
+    (``mode='asyncio'``); otherwise each upstream gets one reader thread.
+    """
+
+    def __init__(self, engine=None, mode: str = 'asyncio', linger_sec: float = 10.0,
+                 policy_factory: Callable[[], ReconnectPolicy] = ReconnectPolicy):
+        self.engine = engine
+        self.mode = mode if engine is not None else 'threads'
+        self.linger_sec = linger_sec
+        self.policy_factory = policy_factory
+        self._lock = threading.Lock()
+        self._upstreams: Dict[str, Upstream] = {}
+
+    def slot(self, url: str) -> FrameSlot:
+        """The FrameSlot for ``url``; stable across upstream restarts, does not connect"""
+        return self._get(url).slot
+
+    def acquire(self, url: str, consumer: str = 'viewer') -> FrameSlot:
+        """Add a reference for ``consumer`` and make sure the upstream is running"""
+        with self._lock:
+            up = self._get_locked(url)
+            up.consumers[consumer] += 1
+            if up.close_timer is not None:
+                up.close_timer.cancel()
+                up.close_timer = None
+            if not up.running:
+                self._start(up)
+        return up.slot
+
+    def release(self, url: str, consumer: str = 'viewer'):
+        """Drop a reference; the upstream closes ``linger_sec`` after the last one"""
+        with self._lock:
+            up = self._upstreams.get(url)
+            if up is None or up.consumers[consumer] <= 0:
+                return
+            up.consumers[consumer] -= 1
+            if up.consumers[consumer] <= 0:
+                del up.consumers[consumer]
+            if up.refs == 0 and up.running and up.close_timer is None:
+                # Linger so a page reload does not reconnect to the camera
+                up.close_timer = threading.Timer(self.linger_sec, self._close_if_idle, args=(url,))
+                up.close_timer.daemon = True
+                up.close_timer.start()
+
+    @contextmanager
+    def subscription(self, url: str, consumer: str = 'viewer'):
+        slot = self.acquire(url, consumer)
+        try:
+            yield slot
+        finally:
+            self.release(url, consumer)
+
+    def is_running(self, url: str) -> bool:
+        up = self._upstreams.get(url)
+        return up is not None and up.running
+
+    def upstream_stats(self, url: str) -> Optional[dict]:
+        up = self._upstreams.get(url)
+        return up.stats() if up is not None else None
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes held by the latest frame of every upstream slot"""
+        with self._lock:
+            upstreams = list(self._upstreams.values())
+        return sum(up.slot.nbytes for up in upstreams)
+
+    def stats(self) -> dict:
+        with self._lock:
+            upstreams = list(self._upstreams.values())
+        return {
+            'mode': self.mode,
+            'linger_sec': self.linger_sec,
+            'open_upstreams': sum(1 for up in upstreams if up.running),
+            'upstreams': [up.stats() for up in upstreams]
+        }
+
+    def reconnect_stats(self) -> dict:
+        """Reconnect policy state of every upstream, by URL"""
+        with self._lock:
+            upstreams = list(self._upstreams.values())
+        return {up.url: up.policy.stats() for up in upstreams}
+
+    def stop_all(self):
+        with self._lock:
+            for up in self._upstreams.values():
+                if up.close_timer is not None:
+                    up.close_timer.cancel()
+                    up.close_timer = None
+                if up.running:
+                    self._stop(up)
+
+    # ---------- internals ----------
+    def _get(self, url: str) -> Upstream:
+        with self._lock:
+            return self._get_locked(url)
+
+    def _get_locked(self, url: str) -> Upstream:
+        up = self._upstreams.get(url)
+        if up is None:
+            up = self._upstreams[url] = Upstream(url, self.policy_factory())
+        return up
+
+    def _close_if_idle(self, url: str):
+        with self._lock:
+            up = self._upstreams.get(url)
+            if up is None:
+                return
+            up.close_timer = None
+            if up.refs == 0 and up.running:
+                self._stop(up)
+
+    def _start(self, up: Upstream):
+        up.running = True
+        up.opened += 1
+        up.started_at = time.time()
+        if self.mode == 'asyncio':
+            up.connection = self.engine.add_camera(up.url, up.url, up.slot.publish, policy=up.policy)
+        else:
+            # Fresh event per start so a reader that is still shutting down stays stopped
+            up.stop_event = threading.Event()
+            up.thread = threading.Thread(target=self._read_loop, args=(up, up.stop_event),
+                                         daemon=True, name='capture-hub')
+            up.thread.start()
+        print(f"[CaptureHub] Opened {up.url} ({self.mode})")
+
+    def _stop(self, up: Upstream):
+        up.running = False
+        if up.connection is not None:
+            self.engine.remove_camera(up.url)
+            up.connection = None
+        if up.thread is not None:
+            up.stop_event.set()
+            resp = up.response
+            if resp is not None:
+                try:
+                    resp.close()  # unblocks a pending read
+                except Exception:
+                    pass
+            up.thread = None
+        print(f"[CaptureHub] Closed {up.url} (no consumers)")
+
+    def _read_loop(self, up: Upstream, stop: threading.Event):
+        policy = up.policy
+        # A circuit opened before the upstream was restarted stays open
+        stop.wait(policy.remaining())
+        while not stop.is_set():
+            error = 'stream closed by camera'
+            try:
+                policy.on_attempt()
+                with requests.get(up.url, stream=True, timeout=(5, 10)) as resp:
+                    up.response = resp
+                    if resp.status_code != 200:
+                        raise RuntimeError(f"stream returned status {resp.status_code}")
+                    up.connected = True
+                    parser = MJPEGStreamParser(boundary_from_content_type(resp.headers.get('Content-Type')))
+                    received = False
+                    # The http.client response under urllib3 returns short reads (and
+                    # decodes chunked bodies); urllib3's own read waits for a full chunk
+                    source = getattr(resp.raw, '_fp', None) or resp.raw
+                    for jpg in parser.iter_frames(source):
+                        if stop.is_set():
+                            break
+                        if len(jpg) < 100:
+                            continue
+                        up.frames += 1
+                        if not received:
+                            received = True
+                            policy.on_success()
+                        # single copy out of the parser buffer, shared by all consumers
+                        up.slot.publish(bytes(jpg))
+            except Exception as e:
+                error = str(e)
+                if not stop.is_set():
+                    up.last_error = error
+                    print(f"[CaptureHub] Stream error on {up.url}: {e}")
+            up.response = None
+            up.connected = False
+            if not stop.is_set():
+                up.reconnects += 1
+                stop.wait(policy.on_failure(error))
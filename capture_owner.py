@@ -0,0 +1,18 @@
+"""
+Capture owner for multi-process UniSync deployments
+Runs the camera connections, recording and face recognition in one process
+and publishes frames and recognition results to shared memory. Start the web
+workers with FRAME_BUS_MODE=attach so they serve those instead of capturing:
+
+    python capture_owner.py
+    FRAME_BUS_MODE=attach gunicorn -w 4 --threads 8 app:app
+"""
+
+import os
+
+os.environ['FRAME_BUS_MODE'] = 'owner'
+
+from app import run_capture_owner
+
+if __name__ == '__main__':
+    run_capture_owner()
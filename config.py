@@ -16,8 +16,35 @@ class Config:
     
     # ESP32-CAM Configuration
     ESP32_IP = os.environ.get('ESP32_IP') or '192.168.1.100'  # Default IP
-    STREAM_URL = f"http://{ESP32_IP}/stream"
-    ESP32_STREAM_URL = f"http://{ESP32_IP}:81/stream"
+    # Ports are configurable so capture paths can target benchmarks/fake_esp32cam.py
+    ESP32_HTTP_PORT = int(os.environ.get('ESP32_HTTP_PORT') or '80')
+    ESP32_STREAM_PORT = int(os.environ.get('ESP32_STREAM_PORT') or '81')
+    ESP32_BASE_URL = f"http://{ESP32_IP}" if ESP32_HTTP_PORT == 80 else f"http://{ESP32_IP}:{ESP32_HTTP_PORT}"
+    ESP32_STREAM_BASE_URL = f"http://{ESP32_IP}:{ESP32_STREAM_PORT}"
+    STREAM_URL = f"{ESP32_BASE_URL}/stream"
+    ESP32_STREAM_URL = f"{ESP32_STREAM_BASE_URL}/stream"
+    # Seconds a camera upstream stays open after its last viewer leaves
+    CAPTURE_LINGER_SEC = float(os.environ.get('CAPTURE_LINGER_SEC') or '10')
+    # Camera reconnects: jittered exponential backoff, circuit opens after N straight failures
+    RECONNECT_BASE_DELAY = float(os.environ.get('RECONNECT_BASE_DELAY') or '0.5')
+    RECONNECT_MAX_DELAY = float(os.environ.get('RECONNECT_MAX_DELAY') or '30')
+    RECONNECT_FAILURE_THRESHOLD = int(os.environ.get('RECONNECT_FAILURE_THRESHOLD') or '6')
+    RECONNECT_OPEN_SEC = float(os.environ.get('RECONNECT_OPEN_SEC') or '60')  # probe interval while open
+    # 'asyncio': one event loop for all camera streams, 'threads': one thread per stream
+    INGEST_MODE = os.environ.get('INGEST_MODE') or 'asyncio'
+    INGEST_WORKERS = int(os.environ.get('INGEST_WORKERS') or '4')  # bounded decode/recognition pool
+    # Segmented on-disk recording of camera frames (no re-encoding)
+    RECORDING_ENABLED = (os.environ.get('RECORDING_ENABLED') or 'false').lower() in ('1', 'true', 'yes')
+    RECORDINGS_DIR = os.environ.get('RECORDINGS_DIR') or 'recordings'
+    RECORDING_SEGMENT_SECONDS = int(os.environ.get('RECORDING_SEGMENT_SECONDS') or '60')
+    RECORDING_RETENTION_HOURS = float(os.environ.get('RECORDING_RETENTION_HOURS') or '72')
+    RECORDING_MAX_MB = int(os.environ.get('RECORDING_MAX_MB') or '2048')  # per camera, counting the segment being written
+    # Shared-memory frame bus: 'owner' publishes frames and recognition results
+    # (capture_owner.py), 'attach' makes web workers read them instead of capturing
+    FRAME_BUS_MODE = (os.environ.get('FRAME_BUS_MODE') or 'off').lower()
+    FRAME_BUS_PREFIX = os.environ.get('FRAME_BUS_PREFIX') or 'unisync'
+    FRAME_BUS_SLOTS = int(os.environ.get('FRAME_BUS_SLOTS') or '8')  # frames kept per camera
+    FRAME_BUS_SLOT_KB = int(os.environ.get('FRAME_BUS_SLOT_KB') or '512')  # largest JPEG accepted
     
     # Arduino Configuration
     SERIAL_PORT = os.environ.get('SERIAL_PORT') or 'COM3'  # Default port
@@ -28,6 +55,30 @@ class Config:
     FACE_SIZE = (160, 160)
     BUFFER_DURATION_SEC = 1.0
     CONFIDENCE_THRESHOLD = 150
+    DETECTION_SCALE = int(os.environ.get('DETECTION_SCALE') or '2')  # detect on 1/N size gray decode (1, 2, 4, 8)
+    # Recognizer backend: 'lbph' (OpenCV) or 'vectorized' (lbp_recognizer, for large enrollments)
+    RECOGNIZER_BACKEND = (os.environ.get('RECOGNIZER_BACKEND') or 'lbph').lower()
+    # Worker processes for stream recognition (0 = recognize in the web process)
+    RECOGNITION_PROCESSES = int(os.environ.get('RECOGNITION_PROCESSES') or '0')
+    # Face tracker: full-frame detection every N ticks, tracked faces re-predicted once their identity decays
+    TRACKER_DETECT_EVERY = int(os.environ.get('TRACKER_DETECT_EVERY') or '10')
+    TRACKER_IDENTITY_HALF_LIFE_SEC = float(os.environ.get('TRACKER_IDENTITY_HALF_LIFE_SEC') or '5.0')
+    # Recognition scheduler: per-camera CPU budget (fraction of a core) and interval range between passes
+    RECOGNITION_CPU_BUDGET = float(os.environ.get('RECOGNITION_CPU_BUDGET') or '0.25')
+    RECOGNITION_MIN_INTERVAL_SEC = float(os.environ.get('RECOGNITION_MIN_INTERVAL_SEC') or '0.05')
+    RECOGNITION_MAX_INTERVAL_SEC = float(os.environ.get('RECOGNITION_MAX_INTERVAL_SEC') or '1.0')
+    OPENCV_THREADS = int(os.environ.get('OPENCV_THREADS') or '0')  # cv2.setNumThreads in the web process (0 = OpenCV default)
+    # Face-quality gate: crops that are too small, clipped, badly lit or blurred are not predicted
+    FACE_QUALITY_ENABLED = (os.environ.get('FACE_QUALITY_ENABLED') or 'true').lower() in ('1', 'true', 'yes')
+    FACE_QUALITY_MIN_SIZE = int(os.environ.get('FACE_QUALITY_MIN_SIZE') or '0')  # pixels, 0 = detector minimum
+    FACE_QUALITY_MIN_SHARPNESS = float(os.environ.get('FACE_QUALITY_MIN_SHARPNESS') or '20')  # Laplacian variance
+    FACE_QUALITY_MIN_BRIGHTNESS = float(os.environ.get('FACE_QUALITY_MIN_BRIGHTNESS') or '40')
+    FACE_QUALITY_MAX_BRIGHTNESS = float(os.environ.get('FACE_QUALITY_MAX_BRIGHTNESS') or '220')
+    # Motion gate: only run face detection when enough of a tiny gray frame changed
+    MOTION_GATE_ENABLED = (os.environ.get('MOTION_GATE_ENABLED') or 'true').lower() in ('1', 'true', 'yes')
+    MOTION_PIXEL_THRESHOLD = int(os.environ.get('MOTION_PIXEL_THRESHOLD') or '25')
+    MOTION_MIN_CHANGED = float(os.environ.get('MOTION_MIN_CHANGED') or '0.005')  # fraction of pixels
+    MOTION_KEEPALIVE_SEC = float(os.environ.get('MOTION_KEEPALIVE_SEC') or '2.0')
 
 class DevelopmentConfig(Config):
     """Development configuration"""
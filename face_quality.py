@@ -0,0 +1,99 @@
+"""
+Face-quality gate for UniSync recognition
+Rejects detected face crops that LBPH would only answer with "Unknown"
+before they are resized and predicted: faces too small to carry detail,
+faces clipped by the frame edge (the crop is no longer square), under- or
+over-exposed faces and motion blur (low variance of the Laplacian).
+
+A rejected face is still tracked but gets no prediction, so it casts no
+vote in the tracker and never reaches the identity stabilizer window.
+"""
+
+import threading
+from collections import Counter
+from typing import Optional
+
+import cv2
+
+REJECT_REASONS = ('small', 'aspect', 'dark', 'bright', 'blur')
+SHARPNESS_SIZE = (64, 64)  # crops are reduced to this before measuring blur, so the score ignores face size
+
+
+def sharpness(crop) -> float:
+    """Variance of the Laplacian of a grayscale crop reduced to SHARPNESS_SIZE"""
+    small = cv2.resize(crop, SHARPNESS_SIZE, interpolation=cv2.INTER_AREA)
+    _, std = cv2.meanStdDev(cv2.Laplacian(small, cv2.CV_16S))
+    return float(std[0][0]) ** 2
+
+
+class FaceQualityGate:
+    """Cheapest checks first: size and aspect ratio from the crop shape, then brightness, then blur."""
+
+    def __init__(self, min_size: int = 60, min_sharpness: float = 20.0, min_aspect: float = 0.75,
+                 min_brightness: float = 40.0, max_brightness: float = 220.0):
+        self.min_size = min_size              # pixels, shorter side of the full-resolution crop
+        self.min_sharpness = min_sharpness    # Laplacian variance
+        self.min_aspect = min_aspect          # shorter / longer side; Haar boxes are square unless clipped
+        self.min_brightness = min_brightness  # mean gray level
+        self.max_brightness = max_brightness
+        self._lock = threading.Lock()
+        # Statistics
+        self.checked = 0
+        self.rejected = Counter()
+
+    def settings(self) -> dict:
+        """Constructor arguments, to build the same gate in a worker process"""
+        return {'min_size': self.min_size, 'min_sharpness': self.min_sharpness, 'min_aspect': self.min_aspect,
+                'min_brightness': self.min_brightness, 'max_brightness': self.max_brightness}
+
+    def check(self, crop) -> Optional[str]:
+        """Reject reason for a grayscale face crop, or None when it is worth predicting"""
+        reason = self._reason(crop)
+        with self._lock:
+            self.checked += 1
+            if reason is not None:
+                self.rejected[reason] += 1
+        return reason
+
+    def drain(self) -> dict:
+        """Counts since the last drain (a worker process sends these back with each result)"""
+        with self._lock:
+            counts = {'checked': self.checked, **self.rejected}
+            self.checked = 0
+            self.rejected.clear()
+        return counts
+
+    def merge(self, counts: dict):
+        """Add counts drained from a worker's gate"""
+        with self._lock:
+            for key, value in counts.items():
+                if key == 'checked':
+                    self.checked += value
+                else:
+                    self.rejected[key] += value
+
+    def stats(self) -> dict:
+        with self._lock:
+            rejected = sum(self.rejected.values())
+            return {
+                'checked': self.checked,
+                'passed': self.checked - rejected,
+                'rejected': {reason: self.rejected[reason] for reason in REJECT_REASONS},
+                'rejected_ratio': round(rejected / self.checked, 3) if self.checked else None,
+                'settings': self.settings()
+            }
+
+    def _reason(self, crop) -> Optional[str]:
+        height, width = crop.shape[:2]
+        if min(height, width) < self.min_size:
+            return 'small'
+        if min(height, width) / max(height, width) < self.min_aspect:
+            return 'aspect'
+        brightness = cv2.mean(crop)[0]
+        if brightness < self.min_brightness:
+            return 'dark'
+        if brightness > self.max_brightness:
+            return 'bright'
+        if sharpness(crop) < self.min_sharpness:
+            return 'blur'
+        return None
@@ -0,0 +1,239 @@
+"""
+IoU face tracker for UniSync recognition
+Keeps faces as tracks with stable IDs so a student standing in front of the
+camera is not re-detected over the whole frame and re-predicted by LBPH on
+every tick:
+
+- full-frame detection runs every ``detect_every`` ticks, or as soon as
+  there are no tracks or one was lost; in between each track is only
+  re-detected inside a small search region around its last box
+- a track carries its resolved identity (same label ``resolve_count``
+  times) and is only re-predicted once its identity confidence has decayed
+  below ``identity_floor``; confidence halves every ``identity_half_life``
+  seconds and drops further when the box moves
+
+The tracker is pure Python. ``plan()`` says what to detect and which tracks
+need a prediction, the detector (in-process or a recognition worker)
+executes it, and ``apply()`` folds the results back in.
+"""
+
+import itertools
+import threading
+from collections import Counter
+from typing import List, Optional, Sequence, Tuple
+
+Box = Tuple[int, int, int, int]  # x, y, w, h
+
+UNKNOWN = -1  # vote for "no label under the confidence threshold"
+
+
+def iou(a: Box, b: Box) -> float:
+    ax, ay, aw, ah = a
+    bx, by, bw, bh = b
+    ix = max(0, min(ax + aw, bx + bw) - max(ax, bx))
+    iy = max(0, min(ay + ah, by + bh) - max(ay, by))
+    inter = ix * iy
+    union = aw * ah + bw * bh - inter
+    return inter / union if union else 0.0
+
+
+def match_boxes(tracked: Sequence[Box], detections: Sequence[Box], threshold: float) -> List[Optional[int]]:
+    """Greedy IoU matching; for each detection the index of its tracked box, or None"""
+    pairs = sorted(((iou(t, d), ti, di) for ti, t in enumerate(tracked) for di, d in enumerate(detections)),
+                   reverse=True)
+    matches: List[Optional[int]] = [None] * len(detections)
+    used = set()
+    for score, ti, di in pairs:
+        if score < threshold:
+            break
+        if ti in used or matches[di] is not None:
+            continue
+        matches[di] = ti
+        used.add(ti)
+    return matches
+
+
+def search_region(box: Box, margin: float = 0.5) -> Box:
+    """Box grown by ``margin`` of its size on every side (caller clips to the image)"""
+    x, y, w, h = box
+    dx, dy = int(w * margin), int(h * margin)
+    return x - dx, y - dy, w + 2 * dx, h + 2 * dy
+
+
+class Track:
+    """One face followed across frames."""
+
+    __slots__ = ('id', 'box', 'created', 'last_seen', 'hits', 'misses', 'votes',
+                 'label', 'last_label', 'distance', 'identity', 'identity_time', 'predicted_at')
+
+    def __init__(self, track_id: int, box: Box, now: float):
+        self.id = track_id
+        self.box = box
+        self.created = now
+        self.last_seen = now
+        self.hits = 1
+        self.misses = 0
+        self.votes = Counter()      # label (or UNKNOWN) -> predictions while unresolved
+        self.label: Optional[int] = None  # resolved label, None until resolved
+        self.last_label: Optional[int] = None  # label of the latest prediction
+        self.distance = 0.0         # LBPH distance of the latest prediction
+        self.identity = 0.0         # 1.0 when resolved, decays towards 0
+        self.identity_time = now
+        self.predicted_at = 0.0
+
+    @property
+    def resolved(self) -> bool:
+        return self.label is not None
+
+    def to_dict(self) -> dict:
+        return {'id': self.id, 'box': list(self.box), 'label': self.label,
+                'distance': round(self.distance, 1), 'identity': round(self.identity, 2),
+                'hits': self.hits, 'misses': self.misses}
+
+
+class FaceTracker:
+    """Per-camera IoU tracker; all methods are safe to call from several threads."""
+
+    _ids = itertools.count(1)  # unique across cameras, so IDs can be logged without the camera
+
+    def __init__(self, detect_every: int = 10, iou_threshold: float = 0.3, max_misses: int = 2,
+                 resolve_count: int = 3, identity_half_life: float = 5.0, identity_floor: float = 0.5,
+                 confidence_threshold: float = 150.0):
+        self.detect_every = max(detect_every, 1)
+        self.iou_threshold = iou_threshold
+        self.max_misses = max_misses
+        self.resolve_count = resolve_count
+        self.identity_half_life = identity_half_life
+        self.identity_floor = identity_floor
+        self.confidence_threshold = confidence_threshold
+        self.tracks: List[Track] = []
+        self._since_full = 0
+        self._lost = False
+        self._lock = threading.Lock()
+        # Statistics
+        self.ticks = 0
+        self.full_detections = 0
+        self.region_detections = 0
+        self.predictions = 0
+        self.carried = 0            # face ticks served from a resolved identity
+        self.tracks_created = 0
+        self.tracks_lost = 0
+
+    def plan(self, now: float) -> dict:
+        """What the detector should do this tick.
+
+        ``{'full': bool, 'tracks': [(track_id, box, needs_prediction), ...],
+        'iou_threshold': float}`` -- plain data, so it can be sent to a worker
+        process.
+        """
+        with self._lock:
+            full = not self.tracks or self._lost or self._since_full + 1 >= self.detect_every
+            tracks = []
+            for track in self.tracks:
+                self._decay(track, now)
+                tracks.append((track.id, track.box, not track.resolved or track.identity < self.identity_floor))
+            return {'full': full, 'tracks': tracks, 'iou_threshold': self.iou_threshold}
+
+    def apply(self, plan: dict, results: Sequence[tuple], now: float) -> List[Track]:
+        """Fold detector results into the tracks and return the tracks seen this tick.
+
+        Each result is ``(track_id or None, box, label, distance)``; ``label``
+        is None when no prediction was made for that face.
+        """
+        with self._lock:
+            self.ticks += 1
+            if plan['full']:
+                self.full_detections += 1
+                self._since_full = 0
+                self._lost = False
+            else:
+                self.region_detections += 1
+                self._since_full += 1
+            by_id = {track.id: track for track in self.tracks}
+            seen = []
+            for track_id, box, label, distance in results:
+                track = by_id.pop(track_id, None) if track_id is not None else None
+                if track is None:
+                    track = Track(next(self._ids), tuple(box), now)
+                    self.tracks.append(track)
+                    self.tracks_created += 1
+                else:
+                    # Movement makes the carried identity less certain
+                    track.identity *= max(iou(track.box, tuple(box)), 0.5)
+                    track.box = tuple(box)
+                    track.hits += 1
+                    track.misses = 0
+                    track.last_seen = now
+                if label is not None:
+                    self.predictions += 1
+                    self._vote(track, label, distance, now)
+                elif track.resolved:
+                    self.carried += 1
+                seen.append(track)
+            # Tracks in the plan that were not found this tick
+            planned = {track_id for track_id, _, _ in plan['tracks']}
+            for track in by_id.values():
+                if track.id not in planned:
+                    continue  # created after the plan was made
+                track.misses += 1
+                if track.misses > self.max_misses:
+                    self.tracks.remove(track)
+                    self.tracks_lost += 1
+                    self._lost = True
+            if not plan['full'] and len(seen) < len(planned):
+                self._lost = True  # a face may have moved out of its search region
+            return seen
+
+    def track_ids(self) -> set:
+        with self._lock:
+            return {track.id for track in self.tracks}
+
+    def forget_identities(self):
+        """Drop resolved identities (e.g. after retraining changed the labels), keeping the tracks"""
+        with self._lock:
+            for track in self.tracks:
+                track.label = track.last_label = None
+                track.identity = 0.0
+                track.votes.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            tracks = [track.to_dict() for track in self.tracks]
+        face_ticks = self.predictions + self.carried
+        return {
+            'tracks': tracks,
+            'ticks': self.ticks,
+            'full_detections': self.full_detections,
+            'region_detections': self.region_detections,
+            'predictions': self.predictions,
+            'carried_identities': self.carried,
+            'prediction_ratio': round(self.predictions / face_ticks, 3) if face_ticks else None,
+            'tracks_created': self.tracks_created,
+            'tracks_lost': self.tracks_lost
+        }
+
+    # ---------- internals ----------
+    def _decay(self, track: Track, now: float):
+        if track.identity and self.identity_half_life > 0:
+            track.identity *= 0.5 ** ((now - track.identity_time) / self.identity_half_life)
+        track.identity_time = now
+
+    def _vote(self, track: Track, label: int, distance: float, now: float):
+        vote = label if distance < self.confidence_threshold else UNKNOWN
+        track.last_label = label
+        track.distance = distance
+        track.predicted_at = now
+        if track.resolved:
+            if vote == track.label:
+                track.identity = 1.0
+                return
+            # Re-prediction disagrees: resolve again from scratch
+            track.label = None
+            track.identity = 0.0
+            track.votes.clear()
+        track.votes[vote] += 1
+        if track.votes[vote] >= self.resolve_count:
+            track.label = vote
+            track.identity = 1.0
+            track.identity_time = now
+            track.votes.clear()
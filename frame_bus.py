@@ -0,0 +1,380 @@
+"""
+Shared-memory frame bus for UniSync
+Lets one capture-owner process publish camera frames and recognition results
+that any number of web worker processes read without their own camera
+connection or recognition state.
+
+Each camera gets a ring of fixed-size JPEG slots in a
+``multiprocessing.shared_memory`` segment:
+
+    header  magic, version, capacity, slot size, latest sequence number
+    slot i  sequence, timestamp, length, JPEG bytes (frame seq % capacity)
+
+The writer clears a slot's sequence number before overwriting it and sets it
+last, so a reader can tell a complete frame from one being replaced.
+Recognition results are a JSON document in a separate segment guarded by a
+version counter (odd while it is being written).
+"""
+
+import json
+import struct
+import threading
+import time
+from collections import Counter
+from multiprocessing import shared_memory
+from typing import Callable, Dict, Optional
+
+from frame_store import Frame
+
+MAGIC = b'UFB1'
+VERSION = 1
+HEADER = struct.Struct('<4sIIIQ')       # magic, version, capacity, slot_size, latest seq
+SLOT_HEADER = struct.Struct('<QdI4x')   # seq, timestamp, length
+STATUS_HEADER = struct.Struct('<QI4x')  # version (odd = writing), JSON length
+
+
+def _open_segment(name: str, create: bool = False, size: int = 0,
+                  shared_tracker: bool = False) -> shared_memory.SharedMemory:
+    if create:
+        try:
+            shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        except FileExistsError:
+            # Left behind by an owner that did not shut down cleanly
+            stale = shared_memory.SharedMemory(name=name)
+            stale.close()
+            stale.unlink()
+            shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        return shm
+    if shared_tracker:
+        # multiprocessing children report to the creator's resource tracker,
+        # where registering the segment again is harmless
+        return shared_memory.SharedMemory(name=name)
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        # Python < 3.13 registers attached segments with the resource tracker,
+        # which would unlink them when this (reader) process exits
+        shm = shared_memory.SharedMemory(name=name)
+        try:
+            from multiprocessing import resource_tracker
+            resource_tracker.unregister(shm._name, 'shared_memory')
+        except Exception:
+            pass
+        return shm
+
+
+class SharedFrameRing:
+    """Single-writer, multi-reader ring of JPEG frames in shared memory."""
+
+    def __init__(self, shm: shared_memory.SharedMemory, owner: bool):
+        self._shm = shm
+        self.owner = owner
+        magic, version, self.capacity, self.slot_size, _ = HEADER.unpack_from(shm.buf, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f'{shm.name} is not a frame bus segment')
+        self._stride = SLOT_HEADER.size + self.slot_size
+        view = shm.buf if owner else shm.buf.toreadonly()
+        self._view = view
+        self.dropped = 0  # frames larger than a slot
+
+    @classmethod
+    def create(cls, name: str, capacity: int = 8, slot_size: int = 512 * 1024) -> 'SharedFrameRing':
+        size = HEADER.size + capacity * (SLOT_HEADER.size + slot_size)
+        shm = _open_segment(name, create=True, size=size)
+        shm.buf[:size] = bytes(size)
+        HEADER.pack_into(shm.buf, 0, MAGIC, VERSION, capacity, slot_size, 0)
+        return cls(shm, owner=True)
+
+    @classmethod
+    def attach(cls, name: str, shared_tracker: bool = False) -> 'SharedFrameRing':
+        return cls(_open_segment(name, shared_tracker=shared_tracker), owner=False)
+
+    @property
+    def name(self) -> str:
+        return self._shm.name
+
+    @property
+    def seq(self) -> int:
+        return HEADER.unpack_from(self._view, 0)[4]
+
+    @property
+    def nbytes(self) -> int:
+        return self._shm.size
+
+    def _offset(self, seq: int) -> int:
+        return HEADER.size + (seq % self.capacity) * self._stride
+
+    def write(self, jpeg, timestamp: float) -> int:
+        """Publish a frame (owner only); returns its sequence number, 0 if it does not fit"""
+        length = len(jpeg)
+        if length > self.slot_size:
+            self.dropped += 1
+            return 0
+        buf = self._shm.buf
+        seq = self.seq + 1
+        off = self._offset(seq)
+        SLOT_HEADER.pack_into(buf, off, 0, 0.0, 0)
+        data = off + SLOT_HEADER.size
+        buf[data:data + length] = jpeg
+        SLOT_HEADER.pack_into(buf, off, seq, timestamp, length)
+        struct.pack_into('<Q', buf, HEADER.size - 8, seq)
+        return seq
+
+    def read(self, seq: int):
+        """(timestamp, read-only view) of frame ``seq`` while it is still in the ring, else None.
+
+        The view aliases shared memory: it is overwritten ``capacity`` frames
+        later, which ``is_resident(seq)`` reports.
+        """
+        if seq <= 0:
+            return None
+        off = self._offset(seq)
+        slot_seq, timestamp, length = SLOT_HEADER.unpack_from(self._view, off)
+        if slot_seq != seq:
+            return None
+        data = off + SLOT_HEADER.size
+        return timestamp, self._view[data:data + length]
+
+    def is_resident(self, seq: int) -> bool:
+        return seq > 0 and SLOT_HEADER.unpack_from(self._view, self._offset(seq))[0] == seq
+
+    def close(self):
+        self._view.release()
+        self._shm.close()
+        if self.owner:
+            self._shm.unlink()
+
+
+class SharedStatusBoard:
+    """Latest recognition results as one JSON document in shared memory."""
+
+    def __init__(self, shm: shared_memory.SharedMemory, owner: bool):
+        self._shm = shm
+        self.owner = owner
+
+    @classmethod
+    def create(cls, name: str, size: int = 64 * 1024) -> 'SharedStatusBoard':
+        shm = _open_segment(name, create=True, size=size)
+        STATUS_HEADER.pack_into(shm.buf, 0, 0, 0)
+        return cls(shm, owner=True)
+
+    @classmethod
+    def attach(cls, name: str) -> 'SharedStatusBoard':
+        return cls(_open_segment(name), owner=False)
+
+    @property
+    def size(self) -> int:
+        return self._shm.size
+
+    def publish(self, status: dict) -> bool:
+        """Write ``status``; False (previous document kept) when it does not fit the segment"""
+        data = json.dumps(status, default=str).encode()
+        buf = self._shm.buf
+        if STATUS_HEADER.size + len(data) > self._shm.size:
+            return False
+        version = STATUS_HEADER.unpack_from(buf, 0)[0]
+        STATUS_HEADER.pack_into(buf, 0, version + 1, 0)
+        buf[STATUS_HEADER.size:STATUS_HEADER.size + len(data)] = data
+        STATUS_HEADER.pack_into(buf, 0, version + 2, len(data))
+        return True
+
+    def read(self, retries: int = 50) -> Optional[dict]:
+        buf = self._shm.buf
+        for _ in range(retries):
+            version, length = STATUS_HEADER.unpack_from(buf, 0)
+            if version == 0:
+                return None
+            if version % 2:
+                time.sleep(0.001)
+                continue
+            data = bytes(buf[STATUS_HEADER.size:STATUS_HEADER.size + length])
+            if STATUS_HEADER.unpack_from(buf, 0)[0] == version:
+                return json.loads(data)
+        return None
+
+    def close(self):
+        self._shm.close()
+        if self.owner:
+            self._shm.unlink()
+
+
+class BusSlot:
+    """Read side of a SharedFrameRing with the FrameSlot interface used by viewers.
+
+    Each frame is copied out of shared memory once per process and shared by
+    every viewer in it; the ring is attached lazily, so web workers may start
+    before the capture owner.
+    """
+
+    def __init__(self, name: str, poll_interval: float = 0.01, reattach_sec: float = 5.0):
+        self.name = name
+        self.poll_interval = poll_interval
+        self.reattach_sec = reattach_sec
+        self.subscribers = Counter()
+        self._ring: Optional[SharedFrameRing] = None
+        self._frame: Optional[Frame] = None
+        self._lock = threading.Lock()
+        self._next_attach = 0.0
+        self._seen_seq = -1
+
+    def _get_ring(self) -> Optional[SharedFrameRing]:
+        ring = self._ring
+        now = time.time()
+        if ring is not None and now >= self._next_attach:
+            # A restarted owner creates a new segment under the same name; re-attach
+            # when ours has been quiet for a while
+            seq = ring.seq
+            if seq == self._seen_seq:
+                self.close()
+                ring = None
+            else:
+                self._seen_seq = seq
+                self._next_attach = now + self.reattach_sec
+        if ring is None and now >= self._next_attach:
+            try:
+                ring = self._ring = SharedFrameRing.attach(self.name)
+                self._seen_seq = ring.seq
+                self._next_attach = now + self.reattach_sec
+            except (FileNotFoundError, ValueError):
+                self._next_attach = now + 1.0
+        return ring
+
+    @property
+    def seq(self) -> int:
+        ring = self._get_ring()
+        return ring.seq if ring is not None else 0
+
+    @property
+    def nbytes(self) -> int:
+        frame = self._frame
+        return len(frame.jpeg) if frame is not None else 0
+
+    def latest(self) -> Optional[Frame]:
+        ring = self._get_ring()
+        if ring is None:
+            return None
+        seq = ring.seq
+        frame = self._frame
+        if frame is not None and frame.seq == seq:
+            return frame
+        entry = ring.read(seq)
+        if entry is None:
+            return frame
+        # WSGI servers only write bytes, so take the one copy per process here and
+        # re-check the slot afterwards in case the writer lapped us meanwhile
+        jpeg = bytes(entry[1])
+        entry[1].release()
+        if not ring.is_resident(seq):
+            return frame
+        with self._lock:
+            # One Frame per sequence number, so variants are still encoded once per process
+            if self._frame is None or self._frame.seq < seq:
+                self._frame = Frame(seq, jpeg, entry[0])
+            return self._frame
+
+    def newer_than(self, seq: int) -> Optional[Frame]:
+        frame = self.latest()
+        if frame is None or frame.seq <= seq:
+            return None
+        return frame
+
+    def wait_newer(self, seq: int, timeout: Optional[float] = None) -> Optional[Frame]:
+        """Poll until a frame newer than ``seq`` is published; None on timeout"""
+        deadline = time.time() + timeout if timeout is not None else None
+        while True:
+            frame = self.newer_than(seq)
+            if frame is not None:
+                return frame
+            if deadline is not None and time.time() >= deadline:
+                return None
+            time.sleep(self.poll_interval)
+
+    def subscribe(self, variant: str):
+        with self._lock:
+            self.subscribers[variant] += 1
+
+    def unsubscribe(self, variant: str):
+        with self._lock:
+            self.subscribers[variant] -= 1
+            if self.subscribers[variant] <= 0:
+                del self.subscribers[variant]
+
+    def close(self):
+        ring, self._ring = self._ring, None
+        if ring is not None:
+            try:
+                ring.close()
+            except BufferError:
+                pass
+
+
+class FrameBusPublisher:
+    """Owner side: mirrors FrameSlots into shared rings and publishes status."""
+
+    def __init__(self, prefix: str = 'unisync', capacity: int = 8, slot_size: int = 512 * 1024,
+                 status_size: int = 64 * 1024):
+        self.prefix = prefix
+        self.capacity = capacity
+        self.slot_size = slot_size
+        self._rings: Dict[str, SharedFrameRing] = {}
+        self._listeners = {}
+        self.status = SharedStatusBoard.create(status_name(prefix), status_size)
+        # Status publish statistics
+        self.status_publishes = 0
+        self.status_overflows = 0   # documents that did not fit and were trimmed
+        self.status_dropped = 0     # documents that did not fit even trimmed
+
+    def publish_slot(self, key, slot):
+        """Copy every frame published to ``slot`` into the ring for camera ``key``"""
+        key = str(key)
+        if key in self._rings:
+            return
+        ring = self._rings[key] = SharedFrameRing.create(ring_name(self.prefix, key), self.capacity, self.slot_size)
+
+        def _on_frame(frame):
+            ring.write(frame.jpeg, frame.timestamp)
+
+        self._listeners[key] = (slot, _on_frame)
+        slot.add_listener(_on_frame)
+        print(f"[FrameBus] Publishing camera {key} to shared memory {ring.name}")
+
+    def unpublish_slot(self, key):
+        key = str(key)
+        slot, listener = self._listeners.pop(key, (None, None))
+        if slot is not None:
+            slot.remove_listener(listener)
+        ring = self._rings.pop(key, None)
+        if ring is not None:
+            ring.close()
+
+    def publish_status(self, status: dict, trim: Optional[Callable[[dict], dict]] = None) -> bool:
+        """Publish ``status``, or ``trim(status)`` when it outgrows the status segment; False if neither fits"""
+        self.status_publishes += 1
+        if self.status.publish({**status, 'status_board': self.status_stats()}):
+            return True
+        self.status_overflows += 1
+        if trim is not None and self.status.publish({**trim(status), 'status_board': self.status_stats()}):
+            return True
+        self.status_dropped += 1
+        return False
+
+    def status_stats(self) -> dict:
+        return {'segment_bytes': self.status.size, 'publishes': self.status_publishes,
+                'overflows': self.status_overflows, 'dropped': self.status_dropped}
+
+    def stats(self) -> dict:
+        return {key: {'name': ring.name, 'seq': ring.seq, 'dropped': ring.dropped, 'bytes': ring.nbytes}
+                for key, ring in list(self._rings.items())}
+
+    def close(self):
+        for key in list(self._rings):
+            self.unpublish_slot(key)
+        self.status.close()
+
+
+def ring_name(prefix: str, key) -> str:
+    return f'{prefix}_frames_{key}'
+
+
+def status_name(prefix: str) -> str:
+    return f'{prefix}_status'
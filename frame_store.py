@@ -0,0 +1,272 @@
+"""
+Frame storage primitives for UniSync streaming
+A FrameSlot holds the latest camera frame as raw JPEG bytes together with a
+monotonically increasing sequence number; the BGR decode is built on first
+access and shared by every consumer of that frame.
+"""
+
+import threading
+import time
+from collections import Counter
+from typing import Optional
+
+import cv2
+import numpy as np
+
+
+# Resolution/quality variants served to viewers: name -> (max width, JPEG quality).
+# 'full' is always the original camera JPEG.
+JPEG_VARIANTS = {
+    'thumb': (320, 60),
+    'medium': (480, 70),
+}
+DEFAULT_VARIANT = 'full'
+
+# Grayscale decode flags by downscale factor (libjpeg scales during IDCT)
+GRAY_DECODE_FLAGS = {
+    1: cv2.IMREAD_GRAYSCALE,
+    2: cv2.IMREAD_REDUCED_GRAYSCALE_2,
+    4: cv2.IMREAD_REDUCED_GRAYSCALE_4,
+    8: cv2.IMREAD_REDUCED_GRAYSCALE_8,
+}
+
+
+class Frame:
+    """One published camera frame. Treat as immutable."""
+
+    __slots__ = ('seq', 'jpeg', 'timestamp', '_bgr', '_lock', '_variants', '_gray')
+
+    def __init__(self, seq: int, jpeg: bytes, timestamp: float, bgr=None):
+        self.seq = seq
+        self.jpeg = jpeg
+        self.timestamp = timestamp
+        self._bgr = bgr
+        self._lock = threading.RLock()
+        self._variants = {}
+        self._gray = {}
+        if bgr is not None:
+            bgr.flags.writeable = False
+
+    @property
+    def decoded(self) -> bool:
+        return self._bgr is not None
+
+    def bgr(self):
+        """Decoded BGR view (read-only), decoded on first access and memoized"""
+        img = self._bgr
+        if img is not None:
+            return img
+        with self._lock:
+            if self._bgr is None and self.jpeg:
+                img = cv2.imdecode(np.frombuffer(self.jpeg, np.uint8), cv2.IMREAD_COLOR)
+                if img is not None:
+                    img.flags.writeable = False
+                self._bgr = img
+            return self._bgr
+
+    def gray(self, scale: int = 1):
+        """Grayscale view decoded straight from the JPEG at 1/scale size, memoized"""
+        img = self._gray.get(scale)
+        if img is not None:
+            return img
+        with self._lock:
+            img = self._gray.get(scale)
+            if img is None:
+                if self._bgr is not None and scale == 1:
+                    img = cv2.cvtColor(self._bgr, cv2.COLOR_BGR2GRAY)
+                elif self.jpeg:
+                    img = cv2.imdecode(np.frombuffer(self.jpeg, np.uint8), GRAY_DECODE_FLAGS[scale])
+                if img is not None:
+                    img.flags.writeable = False
+                    self._gray[scale] = img
+            return img
+
+    def variant(self, name: str) -> bytes:
+        """JPEG bytes for a resolution variant, encoded at most once per frame"""
+        if name not in JPEG_VARIANTS:
+            return self.jpeg
+        data = self._variants.get(name)
+        if data is not None:
+            return data
+        with self._lock:
+            data = self._variants.get(name)
+            if data is None:
+                data = self._encode_variant(*JPEG_VARIANTS[name])
+                self._variants[name] = data
+            return data
+
+    def _encode_variant(self, max_width: int, quality: int) -> bytes:
+        img = self.bgr()
+        if img is None:
+            return self.jpeg
+        height, width = img.shape[:2]
+        if width <= max_width:
+            return self.jpeg
+        size = (max_width, max(int(round(height * max_width / width)), 1))
+        small = cv2.resize(img, size, interpolation=cv2.INTER_AREA)
+        ok, buf = cv2.imencode('.jpg', small, [cv2.IMWRITE_JPEG_QUALITY, quality])
+        return buf.tobytes() if ok else self.jpeg
+
+
+class FrameSlot:
+    """Single-producer, multi-consumer holder of the latest frame.
+
+    Consumers either poll with ``newer_than(seq)`` or block in
+    ``wait_newer(seq)`` until the producer publishes a newer frame.
+    Listeners added with ``add_listener`` see every published frame on the
+    producer's thread and must return quickly (e.g. enqueue it).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._cond = threading.Condition(self._lock)
+        self._frame: Optional[Frame] = None
+        self._seq = 0
+        self.subscribers = Counter()  # variant name -> connected viewers
+        self._listeners = ()
+
+    @property
+    def seq(self) -> int:
+        """Sequence number of the latest frame (0 = nothing published yet)"""
+        return self._seq
+
+    def publish(self, jpeg: bytes, bgr=None, timestamp: Optional[float] = None) -> int:
+        """Store a new frame and return its sequence number"""
+        with self._cond:
+            self._seq += 1
+            frame = self._frame = Frame(self._seq, jpeg, timestamp or time.time(), bgr)
+            self._cond.notify_all()
+            listeners = self._listeners
+        for listener in listeners:
+            try:
+                listener(frame)
+            except Exception as e:
+                print(f"[FrameSlot] Listener error: {e}")
+        return frame.seq
+
+    def add_listener(self, fn):
+        with self._lock:
+            self._listeners = self._listeners + (fn,)
+
+    def remove_listener(self, fn):
+        with self._lock:
+            self._listeners = tuple(l for l in self._listeners if l != fn)
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes held by the latest frame (JPEG plus decoded view, if built)"""
+        frame = self._frame
+        if frame is None:
+            return 0
+        variants = sum(len(v) for v in list(frame._variants.values()) if v is not frame.jpeg)
+        grays = sum(g.nbytes for g in list(frame._gray.values()))
+        return len(frame.jpeg or b'') + variants + grays + (frame._bgr.nbytes if frame._bgr is not None else 0)
+
+    def latest(self) -> Optional[Frame]:
+        return self._frame
+
+    def newer_than(self, seq: int) -> Optional[Frame]:
+        """Return the latest frame if it is newer than ``seq``, else None"""
+        frame = self._frame
+        if frame is None or frame.seq <= seq:
+            return None
+        return frame
+
+    def wait_newer(self, seq: int, timeout: Optional[float] = None) -> Optional[Frame]:
+        """Block until a frame newer than ``seq`` exists; None on timeout"""
+        with self._cond:
+            if not self._cond.wait_for(lambda: self._seq > seq and self._frame is not None, timeout):
+                return None
+            return self._frame
+
+    def subscribe(self, variant: str):
+        with self._lock:
+            self.subscribers[variant] += 1
+
+    def unsubscribe(self, variant: str):
+        with self._lock:
+            self.subscribers[variant] -= 1
+            if self.subscribers[variant] <= 0:
+                del self.subscribers[variant]
+
+    def clear(self):
+        with self._lock:
+            self._frame = None
+
+
+class FrameRing:
+    """Fixed-capacity ring of preallocated BGR frame buffers.
+
+    The producer copies each frame into the next slot in place, so once the
+    slots exist (and the resolution does not change) writing allocates
+    nothing. Readers get read-only views tagged with a sequence number; a view
+    stays valid until ``capacity`` newer frames have been written, which
+    ``is_resident(seq)`` lets a reader check.
+    """
+
+    def __init__(self, capacity: int = 4):
+        self.capacity = max(capacity, 2)
+        self._slots = [None] * self.capacity
+        self._seqs = [0] * self.capacity
+        self._timestamps = [0.0] * self.capacity
+        self._lock = threading.Lock()
+        self._seq = 0
+        self.reallocations = 0
+
+    @property
+    def seq(self) -> int:
+        return self._seq
+
+    @property
+    def timestamp(self) -> float:
+        """Timestamp of the latest frame (0.0 if empty)"""
+        if self._seq == 0:
+            return 0.0
+        return self._timestamps[self._seq % self.capacity]
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes held by the preallocated slots"""
+        return sum(slot.nbytes for slot in self._slots if slot is not None)
+
+    def __len__(self) -> int:
+        return min(self._seq, self.capacity)
+
+    def write(self, img, timestamp: Optional[float] = None) -> int:
+        """Copy ``img`` into the next slot and return its sequence number"""
+        with self._lock:
+            seq = self._seq + 1
+            idx = seq % self.capacity
+            slot = self._slots[idx]
+            if slot is None or slot.shape != img.shape or slot.dtype != img.dtype:
+                slot = np.empty_like(img)
+                self._slots[idx] = slot
+                self.reallocations += 1
+            np.copyto(slot, img)
+            self._seqs[idx] = seq
+            self._timestamps[idx] = timestamp or time.time()
+            self._seq = seq
+            return seq
+
+    def is_resident(self, seq: int) -> bool:
+        return seq > 0 and self._seqs[seq % self.capacity] == seq and seq > self._seq - self.capacity + 1
+
+    def get(self, seq: int):
+        """Read-only view of frame ``seq``, or None if it was overwritten"""
+        idx = seq % self.capacity
+        slot = self._slots[idx]
+        if slot is None or not self.is_resident(seq):
+            return None
+        view = slot.view()
+        view.flags.writeable = False
+        return view
+
+    def latest(self):
+        """``(seq, timestamp, read-only view)`` of the newest frame, or None"""
+        seq = self._seq
+        if seq == 0:
+            return None
+        view = self.get(seq)
+        if view is None:
+            return None
+        return seq, self._timestamps[seq % self.capacity], view
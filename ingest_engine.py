@@ -0,0 +1,263 @@
+"""
+Asyncio MJPEG ingest engine for UniSync
+Runs every camera connection in a single event loop thread instead of one
+blocking OS thread per camera. CPU-heavy follow-up work (decode, recognition)
+is handed to a bounded thread pool so memory and thread count stay flat as
+cameras are added.
+"""
+
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Optional
+from urllib.parse import urlsplit
+
+from mjpeg_parser import MJPEGStreamParser, boundary_from_content_type
+from reconnect_policy import ReconnectPolicy
+
+READ_CHUNK_SIZE = 64 * 1024
+
+
+class CameraConnection:
+    """State of one camera stream inside the engine."""
+
+    def __init__(self, key, url: str, on_frame: Callable[[bytes], None],
+                 connect_timeout: float, read_timeout: float, policy: ReconnectPolicy):
+        self.key = key
+        self.url = url
+        self.on_frame = on_frame
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.policy = policy
+        self.task: Optional[asyncio.Task] = None
+        self.connected = False
+        self.frames = 0
+        self.bytes_in = 0
+        self.reconnects = 0
+        self.last_error = None
+        self.last_frame_time = 0.0
+
+    def stats(self) -> dict:
+        return {
+            'url': self.url,
+            'connected': self.connected,
+            'frames': self.frames,
+            'bytes_in': self.bytes_in,
+            'reconnects': self.reconnects,
+            'last_error': self.last_error,
+            'last_frame_age_seconds': round(time.time() - self.last_frame_time, 2) if self.last_frame_time else None,
+            'reconnect': self.policy.stats()
+        }
+
+
+class AsyncIngestEngine:
+    """Single event loop that reads every registered MJPEG stream.
+
+    ``on_frame`` callbacks run on the event loop thread and must be cheap
+    (e.g. ``FrameSlot.publish``); anything heavier goes through ``submit()``.
+    """
+
+    def __init__(self, max_workers: int = 4, max_pending: int = 8):
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._ready = threading.Event()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='ingest-worker')
+        self._pending = threading.BoundedSemaphore(max_pending)
+        self._connections: Dict[object, CameraConnection] = {}
+        self.submitted = 0
+        self.dropped = 0
+
+    # ---------- lifecycle ----------
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        if self.running:
+            return
+        self._ready.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True, name='ingest-engine')
+        self._thread.start()
+        self._ready.wait(timeout=5)
+
+    def stop(self):
+        if not self.running:
+            return
+        loop = self._loop
+        try:
+            asyncio.run_coroutine_threadsafe(self._cancel_all(), loop).result(timeout=5)
+        except Exception:
+            pass
+        loop.call_soon_threadsafe(loop.stop)
+        self._thread.join(timeout=5)
+        self._thread = None
+
+    async def _cancel_all(self):
+        # Includes streams of removed cameras that are still unwinding
+        tasks = [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+        self._connections.clear()
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def _run(self):
+        self._loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self._loop)
+        self._ready.set()
+        try:
+            self._loop.run_forever()
+        finally:
+            self._loop.close()
+
+    # ---------- camera management (thread-safe) ----------
+    def add_camera(self, key, url: str, on_frame: Callable[[bytes], None],
+                   connect_timeout: float = 5.0, read_timeout: float = 10.0,
+                   policy: Optional[ReconnectPolicy] = None):
+        """Start ingesting ``url``; replaces any existing stream with the same key.
+
+        Pass the same ``policy`` when re-adding a camera to keep its backoff
+        and circuit state.
+        """
+        self.start()
+        conn = CameraConnection(key, url, on_frame, connect_timeout, read_timeout, policy or ReconnectPolicy())
+
+        def _add():
+            old = self._connections.pop(key, None)
+            if old is not None and old.task is not None:
+                old.task.cancel()
+            self._connections[key] = conn
+            conn.task = self._loop.create_task(self._stream(conn))
+
+        self._loop.call_soon_threadsafe(_add)
+        return conn
+
+    def remove_camera(self, key):
+        if not self.running:
+            return
+
+        def _remove():
+            conn = self._connections.pop(key, None)
+            if conn is not None and conn.task is not None:
+                conn.task.cancel()
+
+        self._loop.call_soon_threadsafe(_remove)
+
+    def submit(self, fn, *args) -> bool:
+        """Run ``fn`` on the bounded executor; drop the job if the queue is full"""
+        if not self._pending.acquire(blocking=False):
+            self.dropped += 1
+            return False
+        self.submitted += 1
+        try:
+            future = self._executor.submit(fn, *args)
+        except RuntimeError:
+            self._pending.release()
+            return False
+        future.add_done_callback(lambda _: self._pending.release())
+        return True
+
+    def stats(self) -> dict:
+        return {
+            'running': self.running,
+            'cameras': {str(key): conn.stats() for key, conn in list(self._connections.items())},
+            'executor_workers': self.max_workers,
+            'jobs_submitted': self.submitted,
+            'jobs_dropped': self.dropped,
+            'threads': threading.active_count()
+        }
+
+    # ---------- stream coroutine ----------
+    async def _stream(self, conn: CameraConnection):
+        policy = conn.policy
+        # A circuit opened before the camera was re-added stays open
+        await asyncio.sleep(policy.remaining())
+        while True:
+            writer = None
+            try:
+                policy.on_attempt()
+                reader, writer, content_type, chunked = await self._open(conn)
+                conn.connected = True
+                parser = MJPEGStreamParser(boundary_from_content_type(content_type))
+                received = False
+                while True:
+                    if chunked:
+                        data = await self._read_chunk(reader, conn.read_timeout)
+                    else:
+                        data = await asyncio.wait_for(reader.read(READ_CHUNK_SIZE), conn.read_timeout)
+                    if not data:
+                        raise ConnectionError('stream closed by camera')
+                    conn.bytes_in += len(data)
+                    for jpg in parser.feed(data):
+                        if len(jpg) < 100:
+                            continue
+                        conn.frames += 1
+                        conn.last_frame_time = time.time()
+                        if not received:
+                            received = True
+                            policy.on_success()
+                        try:
+                            conn.on_frame(bytes(jpg))
+                        except Exception as e:
+                            conn.last_error = f'on_frame: {e}'
+            except asyncio.CancelledError:
+                conn.connected = False
+                if writer is not None:
+                    writer.close()
+                raise
+            except Exception as e:
+                conn.last_error = str(e) or e.__class__.__name__
+            conn.connected = False
+            if writer is not None:
+                writer.close()
+            conn.reconnects += 1
+            # Non-blocking: other cameras keep streaming while this one waits
+            await asyncio.sleep(policy.on_failure(conn.last_error))
+
+    async def _open(self, conn: CameraConnection):
+        parts = urlsplit(conn.url)
+        if parts.scheme != 'http':
+            raise ValueError(f'unsupported scheme: {parts.scheme}')
+        host = parts.hostname
+        port = parts.port or 80
+        path = parts.path or '/'
+        if parts.query:
+            path += '?' + parts.query
+        reader, writer = await asyncio.wait_for(asyncio.open_connection(host, port), conn.connect_timeout)
+        request = (f'GET {path} HTTP/1.1\r\n'
+                   f'Host: {parts.netloc}\r\n'
+                   'Accept: multipart/x-mixed-replace, image/jpeg\r\n'
+                   'Connection: close\r\n\r\n')
+        writer.write(request.encode('latin-1'))
+        await writer.drain()
+        head = await asyncio.wait_for(reader.readuntil(b'\r\n\r\n'), conn.connect_timeout)
+        lines = head.decode('latin-1').split('\r\n')
+        status = lines[0].split(' ', 2)
+        if len(status) < 2 or status[1] != '200':
+            writer.close()
+            raise ConnectionError(f'camera returned {lines[0]!r}')
+        headers = {}
+        for line in lines[1:]:
+            if ':' in line:
+                name, value = line.split(':', 1)
+                headers[name.strip().lower()] = value.strip()
+        # The CameraWebServer firmware sends the stream with chunked encoding over HTTP/1.1
+        chunked = 'chunked' in headers.get('transfer-encoding', '').lower()
+        return reader, writer, headers.get('content-type'), chunked
+
+    @staticmethod
+    async def _read_chunk(reader: asyncio.StreamReader, timeout: float) -> bytes:
+        """Data of the next chunk of a chunked body; b'' at the last chunk"""
+        line = await asyncio.wait_for(reader.readuntil(b'\r\n'), timeout)
+        try:
+            size = int(line.split(b';', 1)[0].strip(), 16)  # chunk extensions are ignored
+        except ValueError:
+            raise ConnectionError(f'bad chunk size line {line[:32]!r}')
+        if size == 0:
+            return b''
+        data = await asyncio.wait_for(reader.readexactly(size + 2), timeout)
+        if data[-2:] != b'\r\n':
+            raise ConnectionError('chunk not terminated by CRLF')
+        return data[:-2]
@@ -0,0 +1,248 @@
+"""
+Incremental MJPEG parser for UniSync
+Splits a multipart/x-mixed-replace byte stream (as sent by the ESP32-CAM) into
+complete JPEG frames without re-scanning or re-copying the buffered data.
+"""
+
+import re
+from typing import Iterator, List, Optional
+
+JPEG_SOI = b'\xff\xd8'
+JPEG_EOI = b'\xff\xd9'
+HEADER_END = b'\r\n\r\n'
+
+# Largest header block we accept before deciding the stream has no part headers
+MAX_HEADER_SIZE = 1024
+
+_CONTENT_LENGTH_RE = re.compile(rb'content-length\s*:\s*(\d+)', re.IGNORECASE)
+_BOUNDARY_RE = re.compile(r'boundary="?([^";]+)"?', re.IGNORECASE)
+
+
+def boundary_from_content_type(content_type: Optional[str]) -> Optional[bytes]:
+    """Extract the multipart boundary from a Content-Type header value"""
+    if not content_type:
+        return None
+    match = _BOUNDARY_RE.search(content_type)
+    if not match:
+        return None
+    boundary = match.group(1).strip()
+    if boundary.startswith('--'):
+        boundary = boundary[2:]
+    return boundary.encode('latin-1')
+
+
+class MJPEGStreamParser:
+    """Incremental parser for multipart MJPEG streams.
+
+    Bytes are appended into a preallocated ``bytearray``. When a part carries
+    a ``Content-Length`` header the JPEG body is sliced out directly; otherwise
+    the parser falls back to scanning for the SOI/EOI markers, resuming from
+    where the previous scan stopped instead of searching the whole buffer.
+
+    Frames are returned as ``memoryview`` slices of the internal buffer. A view
+    is only valid until the next call to ``feed()``/``read_from()``; callers
+    that need to keep a frame must copy it (``bytes(view)``).
+    """
+
+    def __init__(self, boundary: Optional[bytes] = None, capacity: int = 256 * 1024,
+                 max_frame_size: int = 4 * 1024 * 1024):
+        self.boundary = boundary
+        self.max_frame_size = max_frame_size
+        self._buf = bytearray(capacity)
+        self._view = memoryview(self._buf)
+        self._start = 0         # first unconsumed byte
+        self._end = 0           # end of buffered data
+        self._scan = 0          # where the pending search resumes
+        self._body = -1         # start of the current part body (-1 = reading headers)
+        self._length = None     # Content-Length of the current part, if known
+        self._soi = -1          # SOI offset while scanning for markers
+        # Statistics
+        self.frames = 0
+        self.bytes_in = 0
+        self.resyncs = 0
+
+    @property
+    def capacity(self) -> int:
+        return len(self._buf)
+
+    @property
+    def buffered(self) -> int:
+        return self._end - self._start
+
+    def reset(self):
+        """Drop all buffered data, e.g. after reconnecting to the camera"""
+        self._start = self._end = self._scan = 0
+        self._body = -1
+        self._length = None
+        self._soi = -1
+
+    def feed(self, data) -> List[memoryview]:
+        """Append received bytes and return every frame completed by them"""
+        size = len(data)
+        if size == 0:
+            return []
+        self._reserve(size)
+        self._view[self._end:self._end + size] = data
+        self._end += size
+        self.bytes_in += size
+        return self._parse()
+
+    def read_from(self, raw, chunk_size: int = 16 * 1024) -> Optional[List[memoryview]]:
+        """Read straight from a file-like object into the buffer.
+
+        ``chunk_size`` is an upper bound: a live stream must return whatever
+        has arrived, or a frame smaller than the chunk waits for the next
+        one. Short reads (``readinto1``/``read1``, as on buffered files,
+        pipes and ``http.client.HTTPResponse``) are preferred; ``readinto``
+        and ``read`` are only used when the object has nothing else, and
+        then must not block for a full chunk (raw sockets, in-memory data).
+        No intermediate chunk is allocated on the ``readinto`` paths.
+        Returns ``None`` at end of stream.
+        """
+        readinto = getattr(raw, 'readinto1', None)
+        if readinto is None and hasattr(raw, 'read1'):
+            data = raw.read1(chunk_size)
+            if not data:
+                return None
+            return self.feed(data)
+        if readinto is None:
+            readinto = getattr(raw, 'readinto', None)
+        if readinto is None:
+            data = raw.read(chunk_size)
+            if not data:
+                return None
+            return self.feed(data)
+        self._reserve(chunk_size)
+        n = readinto(self._view[self._end:self._end + chunk_size])
+        if not n:
+            return None
+        self._end += n
+        self.bytes_in += n
+        return self._parse()
+
+    def iter_frames(self, raw, chunk_size: int = 16 * 1024) -> Iterator[memoryview]:
+        """Yield frames from a file-like object until it is exhausted"""
+        while True:
+            frames = self.read_from(raw, chunk_size)
+            if frames is None:
+                return
+            for frame in frames:
+                yield frame
+
+    # ---------- internals ----------
+    def _reserve(self, size: int):
+        """Make room for ``size`` more bytes, compacting before growing"""
+        if self._end + size <= len(self._buf):
+            return
+        pending = self._end - self._start
+        if pending + size > self.max_frame_size + MAX_HEADER_SIZE:
+            # Runaway part (lost sync or corrupt stream): start over
+            self.resyncs += 1
+            self.reset()
+            pending = 0
+        elif self._start > 0:
+            self._buf[0:pending] = self._view[self._start:self._end]
+            self._shift(self._start)
+        if pending + size > len(self._buf):
+            new_size = len(self._buf)
+            while new_size < pending + size:
+                new_size *= 2
+            new_buf = bytearray(new_size)
+            new_buf[0:pending] = self._view[0:pending]
+            self._buf = new_buf
+            self._view = memoryview(new_buf)
+
+    def _shift(self, offset: int):
+        self._start -= offset
+        self._end -= offset
+        self._scan = max(self._scan - offset, 0)
+        if self._body >= 0:
+            self._body -= offset
+        if self._soi >= 0:
+            self._soi -= offset
+
+    def _parse(self) -> List[memoryview]:
+        frames = []
+        buf = self._buf
+        while True:
+            if self._body < 0:
+                if not self._parse_headers():
+                    break
+            if self._length is not None:
+                end = self._body + self._length
+                if end > self._end:
+                    break
+                frame = self._view[self._body:end]
+                self._finish_part(end)
+                if frame[:2] != JPEG_SOI:
+                    self.resyncs += 1
+                    continue
+                frames.append(frame)
+                continue
+            # Marker fallback: resume the search where the last one stopped
+            if self._soi < 0:
+                soi = buf.find(JPEG_SOI, self._scan, self._end)
+                if soi < 0:
+                    # Drop the junk, keeping one byte in case the marker is split
+                    self._start = self._body = self._scan = max(self._end - 1, self._body)
+                    break
+                self._soi = soi
+                self._scan = soi + 2
+            eoi = buf.find(JPEG_EOI, self._scan, self._end)
+            if eoi < 0:
+                self._scan = max(self._end - 1, self._soi + 2)
+                break
+            frame = self._view[self._soi:eoi + 2]
+            self._finish_part(eoi + 2)
+            frames.append(frame)
+        self.frames += len(frames)
+        return frames
+
+    def _parse_headers(self) -> bool:
+        """Locate the next part header block; False if more data is needed"""
+        buf = self._buf
+        start = self._start
+        hdr_end = buf.find(HEADER_END, max(self._scan, start), self._end)
+        if hdr_end < 0:
+            soi = buf.find(JPEG_SOI, start, self._end)
+            if soi >= 0 or self._end - start > MAX_HEADER_SIZE:
+                # Headerless stream (bare concatenated JPEGs): scan markers
+                self._body = start
+                self._length = None
+                self._scan = start
+                return True
+            self._scan = max(self._end - 3, start)
+            return False
+        header = bytes(self._view[start:hdr_end])
+        soi = header.find(JPEG_SOI)
+        if soi >= 0:
+            # The "header" actually ran into JPEG data
+            self._body = start + soi
+            self._length = None
+            self._scan = self._body
+            return True
+        if self.boundary is None:
+            for line in header.split(b'\r\n'):
+                if line.startswith(b'--'):
+                    self.boundary = line[2:].strip()
+                    break
+        self._body = hdr_end + len(HEADER_END)
+        match = _CONTENT_LENGTH_RE.search(header)
+        if match:
+            length = int(match.group(1))
+            if 0 < length <= self.max_frame_size:
+                self._length = length
+                return True
+        self._length = None
+        self._scan = self._body
+        return True
+
+    def _finish_part(self, end: int):
+        self._start = end
+        self._scan = end
+        self._body = -1
+        self._length = None
+        self._soi = -1
+        if self._start == self._end:
+            # Fully drained: rewind so the buffer never needs compacting
+            self._start = self._end = self._scan = 0
@@ -0,0 +1,88 @@
+"""
+Motion gate for UniSync face recognition
+Decides per frame whether the Haar cascade needs to run, by differencing a
+tiny grayscale copy of the frame against the previous one. Static scenes
+(an empty entrance) skip detection except for a periodic keep-alive run.
+"""
+
+import threading
+import time
+
+import cv2
+
+# Size the frame is reduced to before differencing
+MOTION_SIZE = (80, 60)
+
+
+class MotionGate:
+    """Frame-differencing gate in front of face detection.
+
+    ``should_detect(gray)`` takes any grayscale image (ideally an already
+    reduced decode such as ``Frame.gray(8)``) and returns True when enough
+    pixels changed since the previous frame, while faces were seen recently,
+    or when ``keepalive_sec`` has passed since the last detection.
+    """
+
+    def __init__(self, pixel_threshold: int = 25, min_changed: float = 0.005,
+                 keepalive_sec: float = 2.0, hold_sec: float = 1.0):
+        self.pixel_threshold = pixel_threshold  # per-pixel gray level change that counts
+        self.min_changed = min_changed          # fraction of changed pixels that counts as motion
+        self.keepalive_sec = keepalive_sec
+        self.hold_sec = hold_sec                # keep detecting this long after motion or a face
+        self._prev = None
+        self._hold_until = 0.0
+        self._last_detection = 0.0
+        self._lock = threading.Lock()
+        # Statistics
+        self.frames = 0
+        self.detections = 0
+        self.motion_frames = 0
+        self.keepalives = 0
+        self.last_changed = 0.0
+
+    def should_detect(self, gray) -> bool:
+        now = time.time()
+        tiny = cv2.resize(gray, MOTION_SIZE, interpolation=cv2.INTER_AREA)
+        tiny = cv2.GaussianBlur(tiny, (3, 3), 0)
+        with self._lock:
+            prev = self._prev
+            self._prev = tiny
+            self.frames += 1
+            if prev is None:
+                changed = 1.0
+            else:
+                diff = cv2.absdiff(tiny, prev)
+                _, mask = cv2.threshold(diff, self.pixel_threshold, 255, cv2.THRESH_BINARY)
+                changed = cv2.countNonZero(mask) / float(mask.size)
+            self.last_changed = changed
+            if changed >= self.min_changed:
+                self.motion_frames += 1
+                self._hold_until = now + self.hold_sec
+            elif now >= self._hold_until:
+                if now - self._last_detection < self.keepalive_sec:
+                    return False
+                self.keepalives += 1
+            self.detections += 1
+            self._last_detection = now
+            return True
+
+    def note_faces(self, count: int):
+        """Keep detecting while faces are in view, even if they hold still"""
+        if count > 0:
+            with self._lock:
+                self._hold_until = time.time() + self.hold_sec
+
+    @property
+    def skipped(self) -> int:
+        return self.frames - self.detections
+
+    def stats(self) -> dict:
+        return {
+            'frames': self.frames,
+            'detections': self.detections,
+            'skipped': self.skipped,
+            'skip_ratio': round(self.skipped / self.frames, 3) if self.frames else 0.0,
+            'motion_frames': self.motion_frames,
+            'keepalive_detections': self.keepalives,
+            'last_changed_fraction': round(self.last_changed, 4)
+        }
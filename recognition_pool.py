@@ -0,0 +1,339 @@
+"""
+Process-pool face recognition for UniSync
+Runs Haar detection and LBPH prediction in worker processes, each with its
+own cascade and recognizer, so recognition no longer competes with request
+handling for the GIL.
+
+Frames travel through a shared-memory JPEG ring (frame_bus.SharedFrameRing);
+the task and result queues only carry small metadata tuples. Face tracking,
+identity stabilization and attendance marking stay in the parent process:
+each task carries a face_tracker plan and each result is applied through the
+``on_result`` callback.
+"""
+
+import multiprocessing
+import os
+import queue
+import shutil
+import tempfile
+import threading
+import time
+from typing import Callable, Optional
+
+from face_quality import FaceQualityGate
+from face_tracker import iou, match_boxes, search_region
+from frame_bus import SharedFrameRing
+
+CASCADE_FILE = 'haarcascade_frontalface_default.xml'
+TASK_TIMEOUT_SEC = 10.0  # a task not answered by then (dead worker) frees its context again
+FULL_DETECTION = {'full': True, 'tracks': [], 'iou_threshold': 0.3}  # plan without a tracker
+
+
+def detect_faces(gray, face_cascade, scale: int = 1, min_size: int = 60, max_size: int = 300):
+    """Run the cascade on a 1/scale grayscale image and return full-resolution boxes"""
+    min_side = max(min_size // scale, 12)
+    max_side = max(max_size // scale, min_side + 1)
+    # Use more sensitive parameters for low-quality video
+    faces_rects = face_cascade.detectMultiScale(
+        gray,
+        scaleFactor=1.05,  # More sensitive scaling
+        minNeighbors=3,    # Fewer neighbors required
+        minSize=(min_side, min_side),  # Larger minimum face size
+        maxSize=(max_side, max_side)   # Maximum face size
+    )
+    if scale == 1:
+        return faces_rects
+    return [(int(x * scale), int(y * scale), int(w * scale), int(h * scale)) for (x, y, w, h) in faces_rects]
+
+
+def detect_in_region(gray, face_cascade, box, scale: int = 1):
+    """Re-detect a tracked face inside a search region around its last box (full-resolution coordinates)"""
+    rx, ry, rw, rh = (v // scale for v in search_region(box))
+    height, width = gray.shape[:2]
+    x0, y0 = max(rx, 0), max(ry, 0)
+    x1, y1 = min(rx + rw, width), min(ry + rh, height)
+    side = box[2] // scale
+    if x1 - x0 < side or y1 - y0 < side:
+        return None
+    faces_rects = face_cascade.detectMultiScale(
+        gray[y0:y1, x0:x1],
+        scaleFactor=1.05,
+        minNeighbors=3,
+        minSize=(max(int(side * 0.7), 12),) * 2,  # the face can only grow or shrink a little between ticks
+        maxSize=(int(side * 1.4) + 1,) * 2
+    )
+    candidates = [(int((x + x0) * scale), int((y + y0) * scale), int(w * scale), int(h * scale))
+                  for (x, y, w, h) in faces_rects]
+    if not candidates:
+        return None
+    return max(candidates, key=lambda candidate: iou(box, candidate))
+
+
+def recognize_plan(small, load_gray, face_cascade, recognizer, plan: dict, scale: int = 1, face_size=(160, 160),
+                   min_size: int = 60, max_size: int = 300, quality: Optional[FaceQualityGate] = None) -> list:
+    """Execute a face_tracker plan on one frame.
+
+    ``small`` is the 1/scale grayscale image, ``load_gray()`` returns the
+    full-resolution one (only called when a face needs predicting). Crops
+    ``quality`` rejects are not predicted. Returns
+    ``[(track_id or None, (x, y, w, h), label or None, confidence or None)]``.
+    """
+    import cv2
+
+    tracks = plan['tracks']
+    if plan['full']:
+        boxes = [tuple(int(v) for v in rect) for rect in detect_faces(small, face_cascade, scale, min_size, max_size)]
+        matches = match_boxes([box for _, box, _ in tracks], boxes, plan['iou_threshold'])
+    else:
+        boxes, matches = [], []
+        for index, (_, box, _) in enumerate(tracks):
+            found = detect_in_region(small, face_cascade, box, scale)
+            if found is not None:
+                boxes.append(found)
+                matches.append(index)
+    predict = []
+    if recognizer is not None:
+        predict = [i for i, index in enumerate(matches) if index is None or tracks[index][2]]
+    predictions = {}
+    if predict:
+        # Full-resolution gray only when a face needs predicting
+        gray = load_gray()
+        crops = []
+        for i in predict:
+            x, y, w, h = boxes[i]
+            crops.append((i, gray[y:y + h, x:x + w]))
+        if quality is not None:
+            # Blurred, clipped or badly lit faces would only come back "Unknown"
+            crops = [(i, crop) for i, crop in crops if quality.check(crop) is None]
+        rois = [cv2.resize(crop, face_size) for _, crop in crops]
+        if not rois:
+            predicted = []
+        elif hasattr(recognizer, 'predict_batch'):
+            # lbp_recognizer scores all crops of the frame in one vectorized pass
+            predicted = [best[0] for best in recognizer.predict_batch(rois)]
+        else:
+            predicted = [recognizer.predict(roi) for roi in rois]
+        predictions = {i: (int(label), float(confidence)) for (i, _), (label, confidence) in zip(crops, predicted)}
+    results = []
+    for i, (box, index) in enumerate(zip(boxes, matches)):
+        label, confidence = predictions.get(i, (None, None))
+        results.append((tracks[index][0] if index is not None else None, box, label, confidence))
+    return results
+
+
+def _worker_main(ring_name: str, tasks, results, scale: int, face_size, min_size: int, max_size: int,
+                 quality: Optional[dict]):
+    """Worker process: decode frames named by the task queue and execute their tracker plans"""
+    import cv2
+    import numpy as np
+    from frame_store import GRAY_DECODE_FLAGS
+    from lbp_recognizer import load_recognizer
+
+    cv2.setNumThreads(1)  # parallelism comes from the processes
+    ring = SharedFrameRing.attach(ring_name, shared_tracker=True)
+    face_cascade = cv2.CascadeClassifier(cv2.data.haarcascades + CASCADE_FILE)
+    gate = FaceQualityGate(**quality) if quality is not None else None
+    recognizer = None
+    model_version = 0
+    pid = os.getpid()
+    while True:
+        task = tasks.get()
+        if task is None:
+            break
+        task_id, seq, model, plan = task
+        started = time.perf_counter()
+        faces = []
+        size = None
+        error = None
+        entry = data = None
+        try:
+            if model is not None and model[0] != model_version:
+                recognizer = load_recognizer(model[1])
+                model_version = model[0]
+            entry = ring.read(seq)
+            if entry is None:
+                raise RuntimeError('frame overwritten before it was read')
+            data = np.frombuffer(entry[1], np.uint8)
+            small = cv2.imdecode(data, GRAY_DECODE_FLAGS[scale])
+            if small is None:
+                raise RuntimeError('could not decode frame')
+            size = (small.shape[1] * scale, small.shape[0] * scale)
+            faces = recognize_plan(small, lambda: small if scale == 1 else cv2.imdecode(data, cv2.IMREAD_GRAYSCALE),
+                                   face_cascade, recognizer, plan, scale, face_size, min_size, max_size, gate)
+            if not ring.is_resident(seq):
+                raise RuntimeError('frame overwritten while it was read')
+        except Exception as e:
+            error = str(e)
+            faces = []
+        finally:
+            data = None
+            if entry is not None:
+                entry[1].release()
+        quality_counts = gate.drain() if gate is not None else {}
+        results.put((task_id, pid, faces, size, (time.perf_counter() - started) * 1000.0, error, quality_counts))
+    ring.close()
+
+
+class RecognitionPool:
+    """Pool of recognition processes fed through a shared-memory frame ring.
+
+    ``submit(frame, context, plan)`` copies the frame's JPEG into the ring and
+    queues it with a face_tracker plan; ``on_result(context, result)`` is
+    called on the pool's collector thread with ``result = {'seq', 'timestamp',
+    'size', 'plan', 'faces', 'elapsed_ms', 'error', 'quality'}`` where
+    ``faces`` is the ``recognize_plan()`` output, ``size`` the frame's
+    (width, height) and ``quality`` the worker's face-quality gate counts for
+    the task. At most one frame per context is in flight; newer frames are
+    dropped until it returns.
+    """
+
+    def __init__(self, on_result: Callable[[object, dict], None], processes: int = 2,
+                 scale: int = 2, face_size=(160, 160), min_size: int = 60, max_size: int = 300,
+                 slot_size: int = 512 * 1024, quality: Optional[dict] = None):
+        self.on_result = on_result
+        self.processes = max(processes, 1)
+        self.max_inflight = self.processes * 2
+        self._ctx = multiprocessing.get_context('spawn')  # never fork the web server's threads
+        self._ring = SharedFrameRing.create(f'unisync_rec_{os.getpid()}', self.max_inflight + 1, slot_size)
+        self._tasks = self._ctx.Queue()
+        self._results = self._ctx.Queue()
+        self._worker_args = (self._ring.name, self._tasks, self._results, scale, tuple(face_size), min_size, max_size,
+                             quality)
+        self._workers = []
+        self._lock = threading.Lock()
+        self._pending = {}      # task id -> (context, frame seq, frame timestamp, plan, submitted at)
+        self._busy = set()      # id(context) of contexts with a task in flight
+        self._task_ids = 0
+        self._model = None      # (version, path) sent with every task
+        self._stale_model = None  # version before it, removed on the next set_model()
+        self._model_dir = tempfile.mkdtemp(prefix='unisync-model-')
+        self._collector: Optional[threading.Thread] = None
+        self.running = False
+        # Statistics
+        self.submitted = 0
+        self.completed = 0
+        self.dropped = 0
+        self.errors = 0
+        self.avg_ms = 0.0
+        self.avg_latency_ms = 0.0
+        self.per_process = {}   # pid -> completed tasks
+
+    def start(self):
+        if self.running:
+            return
+        self.running = True
+        for i in range(self.processes):
+            p = self._ctx.Process(target=_worker_main, args=self._worker_args, daemon=True,
+                                  name=f'recognition-{i}')
+            p.start()
+            self._workers.append(p)
+        self._collector = threading.Thread(target=self._collect, daemon=True, name='recognition-results')
+        self._collector.start()
+        print(f"[RecognitionPool] Started {self.processes} worker process(es)")
+
+    def stop(self):
+        if not self.running:
+            return
+        self.running = False
+        for _ in self._workers:
+            self._tasks.put(None)
+        for p in self._workers:
+            p.join(timeout=5)
+            if p.is_alive():
+                p.terminate()
+        self._workers = []
+        self._results.put(None)
+        self._collector.join(timeout=5)
+        self._ring.close()
+        shutil.rmtree(self._model_dir, ignore_errors=True)
+
+    def set_model(self, recognizer):
+        """Hand a trained recognizer (either backend) to the workers (they reload it on their next task)"""
+        with self._lock:
+            version = (self._model[0] if self._model is not None else 0) + 1
+            path = os.path.join(self._model_dir, f'lbph-{version}{getattr(recognizer, "MODEL_SUFFIX", ".yml")}')
+            recognizer.write(path)
+            previous = self._model
+            self._model = (version, path)
+            stale, self._stale_model = self._stale_model, previous
+        # Workers may still be loading the previous version, never the one before it
+        if stale is not None:
+            try:
+                os.remove(stale[1])
+            except OSError:
+                pass
+
+    def submit(self, frame, context, plan: Optional[dict] = None) -> bool:
+        """Queue ``frame`` for ``context``; False if that context is busy or the pool is full"""
+        plan = plan or FULL_DETECTION
+        with self._lock:
+            self._expire_locked()
+            if not self.running or id(context) in self._busy or len(self._pending) >= self.max_inflight:
+                self.dropped += 1
+                return False
+            seq = self._ring.write(frame.jpeg, frame.timestamp)
+            if not seq:
+                self.dropped += 1
+                return False
+            self._task_ids += 1
+            task_id = self._task_ids
+            self._pending[task_id] = (context, frame.seq, frame.timestamp, plan, time.time())
+            self._busy.add(id(context))
+            self.submitted += 1
+            model = self._model
+        self._tasks.put((task_id, seq, model, plan))
+        return True
+
+    def stats(self) -> dict:
+        return {
+            'processes': self.processes,
+            'alive': sum(1 for p in self._workers if p.is_alive()),
+            'in_flight': len(self._pending),
+            'submitted': self.submitted,
+            'completed': self.completed,
+            'dropped_busy': self.dropped,
+            'errors': self.errors,
+            'avg_process_ms': round(self.avg_ms, 1),
+            'avg_latency_ms': round(self.avg_latency_ms, 1),
+            'per_process': {str(pid): count for pid, count in list(self.per_process.items())},
+            'model_version': self._model[0] if self._model is not None else None
+        }
+
+    def _expire_locked(self):
+        now = time.time()
+        for task_id, (context, _, _, _, submitted_at) in list(self._pending.items()):
+            if now - submitted_at > TASK_TIMEOUT_SEC:
+                del self._pending[task_id]
+                self._busy.discard(id(context))
+                self.errors += 1
+
+    def _collect(self):
+        while True:
+            try:
+                item = self._results.get(timeout=1.0)
+            except queue.Empty:
+                if not self.running:
+                    break
+                continue
+            if item is None:
+                break
+            task_id, pid, faces, size, elapsed_ms, error, quality_counts = item
+            with self._lock:
+                pending = self._pending.pop(task_id, None)
+                if pending is None:
+                    continue
+                context, frame_seq, frame_ts, plan, submitted_at = pending
+                self._busy.discard(id(context))
+            self.completed += 1
+            self.per_process[pid] = self.per_process.get(pid, 0) + 1
+            self.avg_ms = 0.9 * self.avg_ms + 0.1 * elapsed_ms if self.completed > 1 else elapsed_ms
+            latency = (time.time() - submitted_at) * 1000.0
+            self.avg_latency_ms = 0.9 * self.avg_latency_ms + 0.1 * latency if self.completed > 1 else latency
+            if error:
+                self.errors += 1
+            try:
+                self.on_result(context, {'seq': frame_seq, 'timestamp': frame_ts, 'size': size, 'plan': plan,
+                                         'faces': faces, 'elapsed_ms': elapsed_ms, 'error': error,
+                                         'quality': quality_counts})
+            except Exception as e:
+                print(f"[RecognitionPool] Result handler error: {e}")
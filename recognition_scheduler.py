@@ -0,0 +1,133 @@
+"""
+Adaptive recognition scheduler for UniSync
+Replaces the fixed sleep between recognition passes of a camera with an
+interval that follows a CPU budget and what is in front of the camera:
+
+- the pass-to-pass interval is sized so recognition keeps about
+  ``cpu_budget`` of a core busy for this camera; a pass costs the CPU time
+  of the recognizing thread (in-process) or the wall time of the
+  single-threaded recognition worker that ran it
+- while faces are tracked or the motion gate sees something entering, the
+  camera runs at that budget rate (never faster than ``min_interval``)
+- every pass over an empty, static scene stretches the interval by
+  ``idle_backoff``, up to ``max_interval``
+- when the machine is overloaded (1-minute load average above the number
+  of cores) the interval is stretched by the overload factor, at most
+  ``MAX_OVERLOAD_FACTOR`` times, since the budget already bounds the cost
+
+``stats()['throttled_by']`` names what set the current interval.
+
+Loops call ``begin()`` when a pass starts, ``record()`` once its cost is
+known (for worker processes that is when the result comes back), and sleep
+``delay()`` before the next one.
+"""
+
+import os
+import threading
+import time
+from typing import Optional
+
+MAX_OVERLOAD_FACTOR = 2.0  # the load average stretches the interval at most this much
+
+
+def system_load() -> Optional[float]:
+    """1-minute load average per core, or None where the OS has no load average (Windows)"""
+    if not hasattr(os, 'getloadavg'):
+        return None
+    try:
+        return os.getloadavg()[0] / (os.cpu_count() or 1)
+    except OSError:
+        return None
+
+
+class RecognitionScheduler:
+    """Per-camera recognition rate controller; safe to call from several threads."""
+
+    def __init__(self, cpu_budget: float = 0.25, min_interval: float = 0.05, max_interval: float = 1.0,
+                 idle_backoff: float = 1.5, smoothing: float = 0.2):
+        self.cpu_budget = max(cpu_budget, 0.01)  # fraction of one core
+        self.min_interval = min_interval
+        self.max_interval = max(max_interval, min_interval)
+        self.idle_backoff = idle_backoff
+        self.smoothing = smoothing             # EWMA weight of the newest pass
+        self.interval = min_interval
+        self.state = 'starting'                # 'active', 'idle' or 'overloaded' after the first pass
+        self.throttled_by = None               # 'min_interval', 'cpu_budget', 'idle_backoff', 'system_load', 'max_interval'
+        self.load: Optional[float] = None
+        self._cost = None                      # CPU seconds per pass (EWMA)
+        self._usage = 0.0                      # measured cores in use (EWMA)
+        self._started = 0.0
+        self._previous_start = 0.0
+        self._next_due = 0.0
+        self._lock = threading.Lock()
+        # Statistics
+        self.passes = 0
+        self.idle_passes = 0
+        self.overloaded_passes = 0
+
+    def begin(self, now: Optional[float] = None):
+        """A recognition pass starts now; the next one is due one interval later"""
+        now = time.time() if now is None else now
+        with self._lock:
+            self._previous_start, self._started = self._started, now
+            self._next_due = now + self.interval
+
+    def record(self, cost: float, faces: int, motion: bool = False):
+        """Account a finished pass that used ``cost`` seconds of CPU"""
+        load = system_load()
+        with self._lock:
+            self._cost = cost if self._cost is None else self._cost + self.smoothing * (cost - self._cost)
+            if self._previous_start and self._started > self._previous_start:
+                usage = cost / (self._started - self._previous_start)
+                self._usage += self.smoothing * (usage - self._usage)
+            self.passes += 1
+            self.load = load
+            interval = self._cost / self.cpu_budget
+            throttled_by = 'cpu_budget'
+            if faces or motion:
+                self.state = 'active'
+            else:
+                # Empty scene: back off from wherever we are, never faster than the budget allows
+                self.state = 'idle'
+                self.idle_passes += 1
+                if self.interval * self.idle_backoff > interval:
+                    interval = self.interval * self.idle_backoff
+                    throttled_by = 'idle_backoff'
+            if load is not None and load > 1.0:
+                self.state = 'overloaded'
+                self.overloaded_passes += 1
+                interval *= min(load, MAX_OVERLOAD_FACTOR)
+                throttled_by = 'system_load'
+            if interval <= self.min_interval:
+                interval, throttled_by = self.min_interval, 'min_interval'
+            elif interval >= self.max_interval:
+                interval, throttled_by = self.max_interval, 'max_interval'
+            self.interval = interval
+            self.throttled_by = throttled_by
+            self._next_due = self._started + self.interval
+
+    def delay(self, now: Optional[float] = None) -> float:
+        """Seconds to wait before the next pass"""
+        now = time.time() if now is None else now
+        with self._lock:
+            return max(self._next_due - now, 0.0)
+
+    def due(self, now: Optional[float] = None) -> bool:
+        return self.delay(now) <= 0.0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'state': self.state,
+                'throttled_by': self.throttled_by,
+                'interval_ms': round(self.interval * 1000, 1),
+                'rate_hz': round(1.0 / self.interval, 2),
+                'pass_cost_ms': round(self._cost * 1000, 2) if self._cost is not None else None,
+                'cpu_budget': self.cpu_budget,
+                'cpu_usage': round(self._usage, 3),
+                'budget_used': round(self._usage / self.cpu_budget, 3),
+                'system_load': round(self.load, 2) if self.load is not None else None,
+                'passes': self.passes,
+                'idle_passes': self.idle_passes,
+                'overloaded_passes': self.overloaded_passes
+            }
@@ -0,0 +1,122 @@
+"""
+Reconnect policy for UniSync camera sources
+Shared by every capture loop (capture hub reader threads and the asyncio
+ingest engine) so a camera Wi-Fi blip is recovered from quickly without
+hammering a device that is really gone:
+
+- the first retry after a working connection is fast (``fast_retry_delay``)
+- further retries back off exponentially with jitter, up to ``max_delay``
+- after ``failure_threshold`` consecutive failures the circuit opens and the
+  source is only probed every ``open_sec`` (half-open) until it recovers
+"""
+
+import random
+import time
+from typing import Optional
+
+CLOSED = 'closed'        # connected, or never failed
+RETRYING = 'retrying'    # backing off between attempts
+OPEN = 'open'            # too many failures, waiting before the next probe
+HALF_OPEN = 'half_open'  # probing after the open period
+
+
+class ReconnectPolicy:
+    """Jittered exponential backoff with a circuit breaker for one camera source.
+
+    A capture loop calls ``on_attempt()`` before connecting, ``on_success()``
+    once frames arrive and ``on_failure(error)`` when the connection fails or
+    drops; the latter returns how long to wait before the next attempt.
+    """
+
+    def __init__(self, base_delay: float = 0.5, max_delay: float = 30.0, multiplier: float = 2.0,
+                 jitter: float = 0.5, failure_threshold: int = 6, open_sec: float = 60.0,
+                 fast_retry_delay: float = 0.2):
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.multiplier = multiplier
+        self.jitter = jitter                    # delays are drawn from [1 - jitter, 1] x nominal
+        self.failure_threshold = failure_threshold
+        self.open_sec = open_sec
+        self.fast_retry_delay = fast_retry_delay
+        self.state = CLOSED
+        self.failures = 0                       # consecutive failures
+        self.retry_at = 0.0
+        self.last_delay = 0.0
+        self.last_error = None
+        self._fast_retry_pending = False        # set by a success, used by the next failure
+        self._outage_started: Optional[float] = None
+        # Statistics
+        self.total_failures = 0
+        self.circuit_opens = 0
+        self.recoveries = 0
+        self.last_recovery_sec: Optional[float] = None
+        self.max_recovery_sec = 0.0
+        self._recovery_total = 0.0
+
+    def remaining(self) -> float:
+        """Seconds until the next attempt is due (0 when it may start now)"""
+        return max(self.retry_at - time.time(), 0.0)
+
+    def on_attempt(self):
+        if self.state == OPEN:
+            self.state = HALF_OPEN
+
+    def on_success(self):
+        now = time.time()
+        if self._outage_started is not None:
+            recovery = now - self._outage_started
+            self.recoveries += 1
+            self.last_recovery_sec = recovery
+            self.max_recovery_sec = max(self.max_recovery_sec, recovery)
+            self._recovery_total += recovery
+            self._outage_started = None
+        self.state = CLOSED
+        self.failures = 0
+        self.retry_at = 0.0
+        self._fast_retry_pending = True
+
+    def on_failure(self, error=None) -> float:
+        """Record a failed or dropped connection and return the delay before the next attempt"""
+        now = time.time()
+        self.failures += 1
+        self.total_failures += 1
+        self.last_error = str(error) if error is not None else None
+        if self._outage_started is None:
+            self._outage_started = now
+        if self._fast_retry_pending:
+            # The source was working a moment ago: most drops are transient
+            self._fast_retry_pending = False
+            self.state = RETRYING
+            delay = self.fast_retry_delay
+        elif self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+            if self.state not in (OPEN, HALF_OPEN):
+                self.circuit_opens += 1
+                print(f"[Reconnect] Circuit open after {self.failures} failures, probing every {self.open_sec:.0f}s")
+            self.state = OPEN
+            delay = self._jittered(self.open_sec)
+        else:
+            self.state = RETRYING
+            delay = self._jittered(min(self.base_delay * self.multiplier ** (self.failures - 1), self.max_delay))
+        self.last_delay = delay
+        self.retry_at = now + delay
+        return delay
+
+    def _jittered(self, delay: float) -> float:
+        return delay * (1.0 - self.jitter * random.random())
+
+    def stats(self) -> dict:
+        outage = time.time() - self._outage_started if self._outage_started is not None else None
+        return {
+            'state': self.state,
+            'consecutive_failures': self.failures,
+            'total_failures': self.total_failures,
+            'next_retry_in_sec': round(self.remaining(), 2),
+            'last_delay_sec': round(self.last_delay, 2),
+            'last_error': self.last_error,
+            'circuit_opens': self.circuit_opens,
+            'current_outage_sec': round(outage, 2) if outage is not None else None,
+            'recoveries': self.recoveries,
+            'last_recovery_sec': round(self.last_recovery_sec, 2) if self.last_recovery_sec is not None else None,
+            'avg_recovery_sec': round(self._recovery_total / self.recoveries, 2) if self.recoveries else None,
+            'max_recovery_sec': round(self.max_recovery_sec, 2)
+        }
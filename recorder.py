@@ -0,0 +1,271 @@
+"""
+Segmented camera recorder for UniSync
+Appends each camera's JPEG frames, unchanged, to rotating segment files and
+keeps a fixed-size timestamp -> offset index next to every segment, so a time
+range can be located with a binary search instead of scanning the footage.
+
+Layout (one directory per camera):
+    <root>/<camera>/<start_ms>.mjpeg   concatenated JPEG frames
+    <root>/<camera>/<start_ms>.idx     INDEX_RECORD entries, one per frame
+"""
+
+import os
+import queue
+import struct
+import threading
+from bisect import bisect_left
+from typing import Iterator, List, Optional, Tuple
+
+# timestamp (float64 seconds), byte offset in the segment, frame length
+INDEX_RECORD = struct.Struct('<dQI')
+
+SEGMENT_EXT = '.mjpeg'
+INDEX_EXT = '.idx'
+
+
+class Segment:
+    """One recorded segment on disk."""
+
+    def __init__(self, directory: str, start_ms: int):
+        self.start_ms = start_ms
+        self.data_path = os.path.join(directory, f'{start_ms}{SEGMENT_EXT}')
+        self.index_path = os.path.join(directory, f'{start_ms}{INDEX_EXT}')
+
+    @property
+    def start(self) -> float:
+        return self.start_ms / 1000.0
+
+    @property
+    def frames(self) -> int:
+        try:
+            return os.path.getsize(self.index_path) // INDEX_RECORD.size
+        except OSError:
+            return 0
+
+    @property
+    def nbytes(self) -> int:
+        total = 0
+        for path in (self.data_path, self.index_path):
+            try:
+                total += os.path.getsize(path)
+            except OSError:
+                pass
+        return total
+
+    def record(self, f, i: int) -> Tuple[float, int, int]:
+        f.seek(i * INDEX_RECORD.size)
+        return INDEX_RECORD.unpack(f.read(INDEX_RECORD.size))
+
+    def end(self) -> Optional[float]:
+        """Timestamp of the last indexed frame"""
+        count = self.frames
+        if count == 0:
+            return None
+        with open(self.index_path, 'rb') as f:
+            return self.record(f, count - 1)[0]
+
+    def to_dict(self) -> dict:
+        return {'start': self.start, 'end': self.end(), 'frames': self.frames, 'bytes': self.nbytes}
+
+
+def list_segments(directory: str) -> List[Segment]:
+    """Segments of one camera directory, oldest first"""
+    try:
+        names = os.listdir(directory)
+    except OSError:
+        return []
+    starts = sorted(int(name[:-len(INDEX_EXT)]) for name in names
+                    if name.endswith(INDEX_EXT) and name[:-len(INDEX_EXT)].isdigit())
+    return [Segment(directory, start) for start in starts]
+
+
+def iter_range(directory: str, start: float, end: float) -> Iterator[Tuple[float, bytes]]:
+    """Yield (timestamp, jpeg) for every recorded frame with start <= timestamp <= end.
+
+    Segment files are named by their start time, so only the segments that can
+    overlap the range are opened; inside the first one the starting frame is
+    found by binary search over the fixed-size index records.
+    """
+    segments = list_segments(directory)
+    starts = [seg.start for seg in segments]
+    first = max(bisect_left(starts, start) - 1, 0)
+    for seg in segments[first:]:
+        if seg.start > end:
+            return
+        count = seg.frames
+        if count == 0:
+            continue
+        try:
+            with open(seg.index_path, 'rb') as idx, open(seg.data_path, 'rb') as data:
+                lo, hi = 0, count
+                while lo < hi:
+                    mid = (lo + hi) // 2
+                    if seg.record(idx, mid)[0] < start:
+                        lo = mid + 1
+                    else:
+                        hi = mid
+                idx.seek(lo * INDEX_RECORD.size)
+                for _ in range(lo, count):
+                    raw = idx.read(INDEX_RECORD.size)
+                    if len(raw) < INDEX_RECORD.size:
+                        break
+                    ts, offset, length = INDEX_RECORD.unpack(raw)
+                    if ts > end:
+                        return
+                    data.seek(offset)
+                    jpeg = data.read(length)
+                    if len(jpeg) == length:
+                        yield ts, jpeg
+        except OSError:
+            # Segment removed by retention while reading
+            continue
+
+
+class SegmentRecorder:
+    """Writes one camera's frames to rotating segments on a background thread.
+
+    ``submit`` is cheap enough to be used as a ``FrameSlot`` listener; frames
+    are dropped (and counted) when the disk cannot keep up.
+    """
+
+    def __init__(self, directory: str, segment_seconds: float = 60.0,
+                 segment_bytes: int = 64 * 1024 * 1024, retention_seconds: float = 72 * 3600,
+                 max_bytes: int = 2 * 1024 * 1024 * 1024, max_pending: int = 64):
+        self.directory = directory
+        self.segment_seconds = segment_seconds
+        self.segment_bytes = segment_bytes
+        self.retention_seconds = retention_seconds
+        self.max_bytes = max_bytes
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._thread: Optional[threading.Thread] = None
+        self._segment: Optional[Segment] = None
+        self._data = None
+        self._index = None
+        self._offset = 0
+        self._closed_bytes = 0  # closed segments on disk, as of the last retention pass
+        # Statistics
+        self.frames = 0
+        self.bytes_written = 0
+        self.dropped = 0
+        self.segments_deleted = 0
+        self.last_error = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        if self.running:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        self._thread = threading.Thread(target=self._run, daemon=True, name='recorder')
+        self._thread.start()
+
+    def stop(self):
+        if not self.running:
+            return
+        try:
+            self._queue.put(None, timeout=2)
+        except queue.Full:
+            pass
+        self._thread.join(timeout=5)
+        self._thread = None
+
+    def submit(self, frame):
+        """Queue a frame_store.Frame (or anything with .jpeg/.timestamp) for writing"""
+        try:
+            self._queue.put_nowait((frame.timestamp, frame.jpeg))
+        except queue.Full:
+            self.dropped += 1
+
+    def stats(self) -> dict:
+        segments = list_segments(self.directory)
+        return {
+            'directory': self.directory,
+            'running': self.running,
+            'frames': self.frames,
+            'bytes_written': self.bytes_written,
+            'dropped': self.dropped,
+            'segments': len(segments),
+            'disk_bytes': sum(seg.nbytes for seg in segments),
+            'segments_deleted': self.segments_deleted,
+            'last_error': self.last_error
+        }
+
+    # ---------- writer thread ----------
+    def _run(self):
+        try:
+            while True:
+                item = self._queue.get()
+                if item is None:
+                    break
+                try:
+                    self._write(*item)
+                except OSError as e:
+                    self.last_error = str(e)
+                    self._close()
+        finally:
+            self._close()
+
+    def _write(self, timestamp: float, jpeg: bytes):
+        seg = self._segment
+        if (self._data is None or timestamp - seg.start >= self.segment_seconds
+                or self._offset + len(jpeg) > self.segment_bytes):
+            self._rotate(timestamp)
+        pending = len(jpeg) + INDEX_RECORD.size
+        if self.max_bytes and self._closed_bytes and \
+                self._closed_bytes + self._current_bytes() + pending > self.max_bytes:
+            # The segment being written counts toward the cap too
+            self._apply_retention(timestamp, pending)
+        self._data.write(jpeg)
+        self._data.flush()
+        # The index entry goes last so readers never see a frame that is not on disk
+        self._index.write(INDEX_RECORD.pack(timestamp, self._offset, len(jpeg)))
+        self._index.flush()
+        self._offset += len(jpeg)
+        self.frames += 1
+        self.bytes_written += len(jpeg) + INDEX_RECORD.size
+
+    def _rotate(self, timestamp: float):
+        self._close()
+        start_ms = int(timestamp * 1000)
+        if self._segment is not None and start_ms <= self._segment.start_ms:
+            start_ms = self._segment.start_ms + 1
+        self._segment = Segment(self.directory, start_ms)
+        self._data = open(self._segment.data_path, 'ab')
+        self._index = open(self._segment.index_path, 'ab')
+        self._offset = self._data.tell()
+        self._apply_retention(timestamp)
+
+    def _current_bytes(self) -> int:
+        """Bytes of the segment being written (data plus index)"""
+        return self._offset + self._index.tell()
+
+    def _apply_retention(self, now: float, pending: int = 0):
+        """Delete the oldest closed segments past the age limit, or while all segments
+        (with ``pending`` bytes about to be written) exceed the size limit"""
+        segments = [seg for seg in list_segments(self.directory) if seg.start_ms != self._segment.start_ms]
+        current = self._current_bytes() + pending
+        total = current + sum(seg.nbytes for seg in segments)
+        for seg in segments:
+            too_old = self.retention_seconds and now - seg.start > self.retention_seconds
+            too_big = self.max_bytes and total > self.max_bytes
+            if not (too_old or too_big):
+                break
+            total -= seg.nbytes
+            for path in (seg.index_path, seg.data_path):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+            self.segments_deleted += 1
+        self._closed_bytes = total - current
+
+    def _close(self):
+        for f in (self._data, self._index):
+            if f is not None:
+                try:
+                    f.close()
+                except OSError:
+                    pass
+        self._data = self._index = None